@@ -0,0 +1,128 @@
+# app/activity_feed.py
+import itertools
+import logging
+import threading
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.core import signing
+
+from app.aws import get_table
+from app.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CURSOR_SALT = 'app.activity_feed'
+
+
+class InvalidCursor(Exception):
+    """Raised for a cursor that was tampered with or belongs to another user."""
+
+
+def encode_cursor(last_evaluated_key):
+    """Opaque, signed token for a query's LastEvaluatedKey (None when there are no more pages)."""
+    if not last_evaluated_key:
+        return None
+    return signing.dumps(last_evaluated_key, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor, user_id):
+    if not cursor:
+        return None
+    try:
+        key = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor("Invalid cursor")
+    if key.get('UserId') != user_id:
+        raise InvalidCursor("Cursor belongs to another user")
+    return key
+
+
+class ActivityFeed:
+    """
+    Newest-first pages of a user's UserActivities, paginated by DynamoDB's
+    LastEvaluatedKey and fetching only the displayed attributes.
+
+    Pages are cached in-process for ``ttl`` seconds. Each user has a generation
+    number that is part of every cache key; ``invalidate`` bumps it, so pages cached
+    before a new activity was written are never served again. Generations are kept
+    in a bounded LRU with the same ``ttl`` as the pages. A user without a generation
+    entry gets the highest generation evicted so far rather than 0, so losing an
+    entry to LRU eviction can only cause cache misses, never serve a page cached
+    before that user's invalidation. Invalidation is local to the process; other
+    workers pick up new activity when their pages expire.
+    """
+
+    FIELDS = ('Activity', 'Timestamp')
+
+    def __init__(self, table_name='UserActivities', page_size=10, max_page_size=100, ttl=30, maxsize=1024):
+        self.table_name = table_name
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._generations = LRUCache(maxsize=maxsize, ttl=ttl, on_evict=self._evicted)
+        self._evicted_floor = 0
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _evicted(self, user_id, generation):
+        with self._lock:
+            self._evicted_floor = max(self._evicted_floor, generation)
+
+    def _generation(self, user_id):
+        return self._generations.get(user_id, self._evicted_floor)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            generation = next(self._counter)
+        self._generations.set(user_id, generation)
+
+    def invalidate_items(self, items):
+        """Invalidate the feeds of every user that ``items`` (activity records) belong to."""
+        for user_id in {item['UserId'] for item in items}:
+            self.invalidate(user_id)
+
+    def page(self, user_id, cursor=None, limit=None):
+        """
+        Return ``(activities, next_cursor)`` for one page of ``user_id``'s activity.
+        Raises InvalidCursor for a bad cursor and ClientError/BotoCoreError on DynamoDB errors.
+        """
+        limit = max(1, min(limit or self.page_size, self.max_page_size))
+        start_key = decode_cursor(cursor, user_id)
+
+        cache_key = (user_id, self._generation(user_id), cursor, limit)
+        page = self._cache.get(cache_key)
+        if page is not None:
+            return page
+
+        kwargs = {
+            'KeyConditionExpression': 'UserId = :uid',
+            'ExpressionAttributeValues': {':uid': user_id},
+            'ProjectionExpression': ', '.join(f'#f{i}' for i in range(len(self.FIELDS))),
+            'ExpressionAttributeNames': {f'#f{i}': field for i, field in enumerate(self.FIELDS)},
+            'Limit': limit,
+            'ScanIndexForward': False,  # Most recent first
+        }
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        response = get_table(self.table_name).query(**kwargs)
+
+        page = (response.get('Items', []), encode_cursor(response.get('LastEvaluatedKey')))
+        self._cache.set(cache_key, page)
+        return page
+
+    def safe_page(self, user_id, cursor=None, limit=None):
+        """Like ``page`` but returns an empty page (and logs) on errors; for HTML views."""
+        try:
+            return self.page(user_id, cursor, limit)
+        except InvalidCursor:
+            return self.safe_page(user_id, None, limit)
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error fetching user activities: {e}")
+            return [], None
+
+    def stats(self):
+        return self._cache.stats()
+
+
+activity_feed = ActivityFeed(page_size=settings.ACTIVITY_FEED_PAGE_SIZE, ttl=settings.ACTIVITY_FEED_CACHE_TTL)
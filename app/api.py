@@ -0,0 +1,153 @@
+# app/api.py
+"""
+Versioned JSON API (``/api/v1/``).
+
+Clients exchange a username and password for a signed bearer token once
+(``POST /api/v1/token/``) and send it as ``Authorization: Bearer <token>``.
+Tokens are verified by signature and age alone, so authenticated requests
+never touch the session table or the Users table.
+"""
+import json
+import logging
+from datetime import datetime
+from functools import wraps
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.core import signing
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from app.audit_log import prediction_log
+from app.mappings import company_mapping, forex_pairs
+from app.passwords import PasswordHasherBusy, check_password
+from app.predictions import PredictionError, predict_forex_pair, predict_stock_price
+from app.ratelimit import rate_limit
+from app.views import get_dynamodb_user
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'app.api.token'
+
+
+def issue_token(username):
+    return signing.dumps({'u': username}, salt=TOKEN_SALT)
+
+
+def verify_token(token):
+    """Return the username a token was issued to, or None if it is invalid or expired."""
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=settings.API_TOKEN_MAX_AGE)['u']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_token_required(view_func):
+    """Authenticate with a bearer token and set ``request.api_user``; 401 otherwise."""
+    @wraps(view_func)
+    def wrapped_view(request, *args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        username = verify_token(token.strip()) if scheme.lower() == 'bearer' else None
+        if username is None:
+            response = error('Invalid or missing token.', 401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        request.api_user = username
+        return view_func(request, *args, **kwargs)
+    return wrapped_view
+
+
+def _credentials(request):
+    if request.content_type == 'application/json':
+        try:
+            body = json.loads(request.body or b'{}')
+        except ValueError:
+            return None, None
+        return body.get('username'), body.get('password')
+    return request.POST.get('username'), request.POST.get('password')
+
+
+@csrf_exempt
+@rate_limit(scope='api_token')
+def token(request):
+    """Exchange ``username`` and ``password`` (form or JSON body) for a bearer token."""
+    if request.method != 'POST':
+        return error('Method not allowed.', 405)
+    username, password = _credentials(request)
+    if not username or not password:
+        return error('username and password are required.', 400)
+    try:
+        user = get_dynamodb_user(username)
+        valid = user is not None and check_password(password, user['password'])
+    except PasswordHasherBusy:
+        return error('Server busy, try again shortly.', 503)
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f"Error authenticating API user {username}: {e}")
+        return error('Authentication unavailable.', 503)
+    if not valid:
+        return error('Invalid credentials.', 401)
+    if not user.get('is_active', True):
+        return error('Account is disabled.', 403)
+    return JsonResponse({'token': issue_token(username), 'expires_in': settings.API_TOKEN_MAX_AGE})
+
+
+def _log_prediction(request, **item):
+    prediction_log.log({'UserId': request.api_user, 'Timestamp': datetime.now().isoformat(), **item})
+
+
+@csrf_exempt
+@api_token_required
+@rate_limit(scope='api_predict')
+def predict_stock(request):
+    """
+    ``GET /api/v1/predict/stock/?company_symbol=<company_mapping key>``. Returns the
+    prediction, the last close and its bar ``timestamp``, and the ``model_version``.
+    """
+    if request.method != 'GET':
+        return error('Method not allowed.', 405)
+    try:
+        company_symbol = int(request.GET['company_symbol'])
+    except KeyError:
+        return error('Missing company_symbol.', 400)
+    except ValueError:
+        return error('Invalid company_symbol. It should be an integer.', 400)
+    if company_symbol not in company_mapping:
+        return error('Invalid company_symbol.', 400)
+
+    try:
+        result = predict_stock_price(company_symbol)
+    except PredictionError as e:
+        return error(e.message, e.status)
+    _log_prediction(request, PredictionType='Stock', Company=result['company'],
+                    PredictionValue=str(result['prediction']))
+    return JsonResponse(result)
+
+
+@csrf_exempt
+@api_token_required
+@rate_limit(scope='api_predict')
+def predict_forex(request):
+    """
+    ``GET /api/v1/predict/forex/?pair=EUR/USD``. Returns ask, bid and spread, the
+    last close and its bar ``timestamp``, and the ``model_version`` of each side.
+    """
+    if request.method != 'GET':
+        return error('Method not allowed.', 405)
+    pair = request.GET.get('pair', '').strip().upper()
+    if not pair:
+        return error('Missing pair.', 400)
+    if pair not in forex_pairs:
+        return error('Invalid pair.', 400)
+
+    try:
+        result = predict_forex_pair(pair)
+    except PredictionError as e:
+        return error(e.message, e.status)
+    for side in ('ASK', 'BID'):
+        _log_prediction(request, PredictionType='Forex', ForexPair=f'{pair} {side}',
+                        PredictionValue=str(result[side.lower()]))
+    return JsonResponse(result)
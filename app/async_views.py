@@ -0,0 +1,160 @@
+# app/async_views.py
+"""
+Async versions of the I/O-heavy views for ASGI deployments.
+
+Blocking calls (yfinance, S3, DynamoDB) run in worker threads via sync_to_async,
+so one event loop can serve many requests that are waiting on slow upstreams.
+Predictions go through the same app.predictions core as the sync views. Routed
+instead of the sync views when settings.ASYNC_VIEWS is enabled.
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+from app.activity_feed import activity_feed
+from app.audit_log import activity_log, prediction_log
+from app.decorators import dynamodb_login_required, session_username
+from app.lazy import lazy_import
+from app.mappings import company_mapping, forex_mapping
+from app.predictions import PredictionError, predict_forex_price, predict_stock_price
+from app.ratelimit import rate_limit
+
+logger = logging.getLogger(__name__)
+
+pd = lazy_import('pandas')
+
+
+def _in_thread(func):
+    """Run a blocking function outside the event loop without serialising on the main thread."""
+    return sync_to_async(func, thread_sensitive=False)
+
+
+def _log_prediction(item):
+    """
+    Queue a prediction record without waiting: ``prediction_log.log`` can block briefly
+    for queue space under backpressure, so it runs on the loop's default executor.
+    """
+    asyncio.get_running_loop().run_in_executor(None, prediction_log.log, item)
+
+
+@dynamodb_login_required
+async def dashboard(request):
+    """Render the dashboard page for authenticated users."""
+    user = await request.auser()
+
+    # Store user activity in DynamoDB (queued; never blocks the event loop)
+    activity_log.log({
+        'UserId': session_username(request),
+        'Activity': 'AccessedDashboard',
+        'Timestamp': datetime.now().isoformat(),
+        'UserAgent': request.META.get('HTTP_USER_AGENT', '')
+    })
+
+    return render(request, 'dashboard.html', {'username': user.username})
+
+
+@dynamodb_login_required
+@rate_limit
+async def predict_stock(request):
+    if request.method == "GET":
+        return render(request, "predict_stock.html", {"company_mapping": company_mapping})
+
+    def error_response(error):
+        return render(request, "predict_stock.html", {"company_mapping": company_mapping, "error": error})
+
+    company_symbol = request.POST.get("company_symbol")
+    if not company_symbol:
+        return error_response("Missing company_symbol")
+    try:
+        company_symbol = int(company_symbol)
+    except ValueError:
+        return error_response("Invalid company_symbol. It should be an integer.")
+    if company_symbol not in company_mapping:
+        return error_response("Invalid company_symbol.")
+
+    # Market data, model and sentiment through the shared prediction core, off the loop
+    try:
+        result = await _in_thread(predict_stock_price)(company_symbol)
+    except PredictionError as e:
+        return error_response(e.message)
+    company, prediction = result['company'], result['prediction']
+
+    # Log prediction in DynamoDB (queued off the event loop; the response doesn't wait)
+    _log_prediction({
+        'UserId': session_username(request),
+        'PredictionType': 'Stock',
+        'Company': company,
+        'PredictionValue': str(prediction),
+        'Timestamp': pd.Timestamp.now().isoformat(),
+    })
+
+    response = render(request, "predict_stock.html", {
+        "company_mapping": company_mapping,
+        "prediction": prediction,
+    })
+    response['X-Prediction-Cache'] = 'hit' if result['cache_hit'] else 'miss'
+    return response
+
+
+@dynamodb_login_required
+@rate_limit
+async def predict_forex(request):
+    if request.method == "GET":
+        return render(request, "predict_forex.html", {"forex_mapping": forex_mapping})
+
+    def error_response(error):
+        return render(request, "predict_forex.html", {"forex_mapping": forex_mapping, "error": error})
+
+    forex_symbol = request.POST.get("forex_symbol")
+    if not forex_symbol:
+        return error_response("Missing forex_symbol")
+    try:
+        forex_symbol = int(forex_symbol)
+    except ValueError:
+        return error_response("Invalid forex_symbol. It should be an integer.")
+    if forex_symbol not in forex_mapping:
+        return error_response("Invalid forex_symbol.")
+
+    # Market data and model through the shared prediction core, off the loop
+    try:
+        result = await _in_thread(predict_forex_price)(forex_symbol)
+    except PredictionError as e:
+        return error_response(e.message)
+    forex_pair_name, prediction = result['name'], result['prediction']
+
+    # Log prediction in DynamoDB (queued off the event loop; the response doesn't wait)
+    _log_prediction({
+        'UserId': session_username(request),
+        'PredictionType': 'Forex',
+        'ForexPair': forex_pair_name,
+        'PredictionValue': str(prediction),
+        'Timestamp': pd.Timestamp.now().isoformat()
+    })
+
+    response = render(request, "predict_forex.html", {
+        "forex_mapping": forex_mapping,
+        "prediction": prediction,
+        "forex_pair_name": forex_pair_name,
+    })
+    response['X-Prediction-Cache'] = 'hit' if result['cache_hit'] else 'miss'
+    return response
+
+
+@dynamodb_login_required
+async def user_profile(request):
+    """
+    Display user profile with activity history, one page at a time.
+    """
+    user = await request.auser()
+    username = session_username(request)
+
+    activities, next_cursor = await _in_thread(activity_feed.safe_page)(username, request.GET.get('cursor'))
+    return render(request, 'profile.html', {
+        'user': user,
+        'username': username,
+        'activities': activities,
+        'next_cursor': next_cursor,
+    })
@@ -0,0 +1,326 @@
+# app/audit_log.py
+import atexit
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+
+from app.activity_feed import activity_feed
+from app.aws import create_resource
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()  # Queue marker asking the flusher to write its partial batch
+
+# Error codes DynamoDB returns when a table is over its throughput
+THROTTLING_ERRORS = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+}
+
+
+class BufferedTableWriter:
+    """
+    Writes audit items to a DynamoDB table off the request thread.
+
+    ``log`` puts the item on a bounded in-memory queue and returns immediately; when
+    the queue is full the item is dropped and counted. A daemon thread drains the
+    queue through ``batch_writer`` (up to 25 items per BatchWriteItem call) whenever
+    a batch fills or ``flush_interval`` seconds pass. Pending items are flushed when
+    the process exits.
+
+    Backpressure is opt-in: with ``block_timeout`` set, ``log`` waits up to that many
+    seconds for queue space, and with ``spill_path`` set, items that still don't fit
+    (or batches DynamoDB keeps throttling after ``max_retries`` backed-off attempts)
+    are appended to a local JSON-lines file instead of being dropped. The flusher
+    replays that file once the queue is idle and the table is no longer throttling.
+
+    ``on_written``, if given, is called with each batch after it has been stored.
+    """
+
+    def __init__(self, table_name, maxsize=10000, batch_size=25, flush_interval=1.0,
+                 overwrite_by_pkeys=None, block_timeout=0, spill_path=None, max_retries=0,
+                 retry_backoff=0.1, on_written=None):
+        self.table_name = table_name
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overwrite_by_pkeys = overwrite_by_pkeys
+        self.block_timeout = block_timeout
+        self.spill_path = str(spill_path) if spill_path else None
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_written = on_written
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = os.getpid()
+        self._table = None
+        self._stopping = threading.Event()
+        self._spill_lock = threading.Lock()
+        self._throttled_until = 0.0
+        self._counters = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+            'retries': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'flush_ms_total': 0.0,
+            'flush_ms_max': 0.0,
+            'flush_ms_last': 0.0,
+        }
+        atexit.register(self.close)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def log(self, item):
+        """
+        Queue ``item`` for writing. Returns False if it was dropped because the queue
+        stayed full and there is no spill file to take it.
+        """
+        self._ensure_thread()
+        try:
+            if self.block_timeout:
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            if self.spill([item]):
+                return True
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def _ensure_thread(self):
+        # Threads don't survive fork(); start a fresh flusher in each worker process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Items queued before fork belong to the parent, which will write them
+                self._queue = queue.Queue(maxsize=self.maxsize)
+                self._table = None
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=f'audit-{self.table_name}', daemon=True)
+            self._thread.start()
+
+    def _get_table(self):
+        # The flusher thread gets its own resource; boto3 resources are not thread-safe
+        if self._table is None:
+            self._table = create_resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def _next_batch(self):
+        """
+        Block until an item arrives, then collect up to batch_size within flush_interval.
+        A flush marker ends the batch early.
+        """
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic() if batch else self.flush_interval
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _FLUSH:
+                self._queue.task_done()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                if not self._stopping.is_set():
+                    self.replay_spill()
+                continue
+            try:
+                self.write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _put_batch(self, items):
+        with self._get_table().batch_writer(overwrite_by_pkeys=self.overwrite_by_pkeys) as writer:
+            for item in items:
+                writer.put_item(Item=item)
+
+    def write_batch(self, items):
+        """
+        Write ``items`` with batch_writer, which also resends unprocessed items. Throttled
+        batches are retried with exponential backoff and then spilled to disk.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                self._put_batch(items)
+                break
+            except (ClientError, BotoCoreError) as e:
+                throttled = isinstance(e, ClientError) and e.response['Error']['Code'] in THROTTLING_ERRORS
+                if throttled and attempt < self.max_retries:
+                    # Puts are idempotent, so resending items that already landed is harmless
+                    self._count('retries')
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+                    attempt += 1
+                    continue
+                if throttled:
+                    self._throttled_until = time.monotonic() + self.flush_interval
+                    if self.spill(items):
+                        logger.warning(f"{self.table_name} is throttling; spilled {len(items)} items to disk")
+                        return False
+                self._count('failed', len(items))
+                logger.error(f"Error writing {len(items)} items to {self.table_name}: {e}")
+                return False
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._counters['written'] += len(items)
+            self._counters['batches'] += 1
+            self._counters['flush_ms_total'] += elapsed_ms
+            self._counters['flush_ms_last'] = elapsed_ms
+            self._counters['flush_ms_max'] = max(self._counters['flush_ms_max'], elapsed_ms)
+        if self.on_written is not None:
+            try:
+                self.on_written(items)
+            except Exception as e:
+                logger.error(f"Error in on_written callback for {self.table_name}: {e}")
+        return True
+
+    @contextlib.contextmanager
+    def _locked_spill(self):
+        """
+        Hold the spill file exclusively. Gunicorn workers share ``spill_path``, so the
+        thread lock is paired with an ``flock`` on a sibling ``.lock`` file.
+        """
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with open(f'{self.spill_path}.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def spill(self, items):
+        """Append ``items`` to the spill file. Returns False if spilling is disabled or fails."""
+        if not self.spill_path:
+            return False
+        try:
+            with self._locked_spill():
+                with open(self.spill_path, 'a') as spill_file:
+                    spill_file.write(''.join(json.dumps(item, default=str) + '\n' for item in items))
+        except OSError as e:
+            logger.error(f"Error spilling {len(items)} items for {self.table_name}: {e}")
+            return False
+        self._count('spilled', len(items))
+        return True
+
+    def replay_spill(self):
+        """
+        Write spilled items back to the table. Items that fail again are re-spilled.
+        Returns the number of items written.
+        """
+        if not self.spill_path or time.monotonic() < self._throttled_until:
+            return 0
+        # The flusher calls this whenever it is idle; don't create or lock anything if nothing was spilled
+        if not os.path.exists(self.spill_path):
+            return 0
+        # Take the file's contents under the lock; later spills (from any worker) start a fresh one
+        try:
+            with self._locked_spill():
+                with open(self.spill_path) as spill_file:
+                    items = [json.loads(line) for line in spill_file if line.strip()]
+                os.remove(self.spill_path)
+        except FileNotFoundError:
+            return 0
+
+        written = 0
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            if self.write_batch(batch):
+                written += len(batch)
+        self._count('replayed', written)
+        if written:
+            logger.info(f"Replayed {written} spilled items into {self.table_name}")
+        return written
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued item has been written. Returns False on timeout."""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout
+        marker_sent = False
+        while True:
+            if not marker_sent:
+                try:
+                    self._queue.put_nowait(_FLUSH)  # Write the partial batch now
+                    marker_sent = True
+                except queue.Full:
+                    pass
+            with self._queue.all_tasks_done:
+                if not self._queue.unfinished_tasks:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(min(remaining, 0.05))
+
+    def close(self, timeout=5.0):
+        """Flush pending items and stop the flusher thread."""
+        flushed = self.flush(timeout)
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        return flushed
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        flush_ms_total = counters.pop('flush_ms_total')
+        counters['flush_ms_avg'] = flush_ms_total / counters['batches'] if counters['batches'] else 0.0
+        counters['queue_depth'] = self._queue.unfinished_tasks
+        counters['spill_bytes'] = (
+            os.path.getsize(self.spill_path) if self.spill_path and os.path.exists(self.spill_path) else 0
+        )
+        return counters
+
+
+activity_log = BufferedTableWriter(
+    'UserActivities',
+    maxsize=settings.AUDIT_LOG_QUEUE_SIZE,
+    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL,
+    overwrite_by_pkeys=['UserId', 'Timestamp'],
+    on_written=activity_feed.invalidate_items,
+)
+
+prediction_log = BufferedTableWriter(
+    'Predictions',
+    maxsize=settings.PREDICTION_LOG_QUEUE_SIZE,
+    flush_interval=settings.PREDICTION_LOG_FLUSH_INTERVAL,
+    block_timeout=settings.PREDICTION_LOG_BLOCK_TIMEOUT,
+    spill_path=settings.PREDICTION_LOG_SPILL_PATH,
+    max_retries=settings.PREDICTION_LOG_MAX_RETRIES,
+)
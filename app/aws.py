@@ -0,0 +1,75 @@
+# app/aws.py
+import threading
+
+from django.conf import settings
+
+from app.lazy import lazy_import
+
+boto3 = lazy_import('boto3')  # Imported when the first client is built
+
+# Process-wide AWS handles, created on first use
+_lock = threading.Lock()
+_clients = {}
+_verified_tables = {}
+
+
+def _build(kind, service):
+    factory = boto3.client if kind == 'client' else boto3.resource
+    return factory(
+        service,
+        region_name=settings.AWS_REGION,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+    )
+
+
+def create_resource(service):
+    """Build a new, unshared resource (e.g. for use on a dedicated thread)."""
+    return _build('resource', service)
+
+
+def _get(kind, service):
+    key = (kind, service)
+    handle = _clients.get(key)
+    if handle is None:
+        with _lock:
+            handle = _clients.get(key)
+            if handle is None:
+                handle = _clients[key] = _build(kind, service)
+    return handle
+
+
+def get_s3_client():
+    """Return the shared S3 client."""
+    return _get('client', 's3')
+
+
+def get_dynamodb_resource():
+    """Return the shared DynamoDB resource."""
+    return _get('resource', 'dynamodb')
+
+
+def get_table(name):
+    """Return a handle for a DynamoDB table on the shared resource."""
+    return get_dynamodb_resource().Table(name)
+
+
+def get_verified_table(name):
+    """
+    Return a table handle whose existence has been checked with DescribeTable.
+    The check runs once per process; later calls return the cached handle.
+    Raises ClientError/BotoCoreError if the table is not accessible.
+    """
+    table = _verified_tables.get(name)
+    if table is None:
+        table = get_table(name)
+        table.table_status  # DescribeTable round trip
+        _verified_tables[name] = table
+    return table
+
+
+def reset_clients():
+    """Drop cached handles so the next access builds fresh connection pools."""
+    with _lock:
+        _clients.clear()
+        _verified_tables.clear()
@@ -0,0 +1,173 @@
+# app/backtest.py
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.mappings import company_mapping, forex_mapping
+from app.model_registry import STOCK_MODEL_FILE
+from app.ohlcv_store import OHLCVStore
+from app.predictions import FOREX_FEATURES, STOCK_FEATURES
+from app.sentiment import NEUTRAL_SENTIMENT
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = ['model', 'symbol', 'bars', 'start', 'end', 'mae', 'rmse', 'mape', 'naive_mae',
+                  'direction_accuracy']
+
+
+def lagged(columns):
+    """
+    Align a symbol's bars for one-step-ahead scoring: features come from bar t-1 and
+    the target is the close of bar t. Returns ``(features, target, timestamps)`` where
+    ``features`` maps column -> array of the previous bar's values.
+    """
+    close = np.asarray(columns['Close'], dtype=np.float64)
+    if len(close) < 2:
+        return None
+    features = {column: np.asarray(columns[column], dtype=np.float64)[:-1] for column in FOREX_FEATURES}
+    return features, close[1:], np.asarray(columns['Timestamp'])[1:]
+
+
+def stock_frame(store, company_symbols, start=None, end=None, interval='1d'):
+    """
+    Stacked lagged feature matrix for several companies: one row per (company, bar)
+    with the stock model's features plus ``symbol``, ``timestamp`` and ``target``.
+    Historical sentiment is not stored, so every row uses the neutral score.
+    """
+    parts = []
+    for company_symbol in company_symbols:
+        ticker = company_mapping[company_symbol]
+        aligned = lagged(store.read(ticker, start, end, interval))
+        if aligned is None:
+            continue
+        features, target, timestamps = aligned
+        parts.append(pd.DataFrame({
+            'Close_Lagged': features['Close'],
+            'Sentiment_Score': NEUTRAL_SENTIMENT,
+            'Company': company_symbol,
+            'symbol': ticker,
+            'timestamp': timestamps,
+            'target': target,
+        }))
+    if not parts:
+        return pd.DataFrame(columns=STOCK_FEATURES + ['symbol', 'timestamp', 'target'])
+    return pd.concat(parts, ignore_index=True)
+
+
+def forex_frame(store, symbol, start=None, end=None, interval='1d'):
+    """Lagged feature matrix for one forex symbol, in the forex models' feature order."""
+    aligned = lagged(store.read(symbol, start, end, interval))
+    if aligned is None:
+        return pd.DataFrame(columns=FOREX_FEATURES + ['symbol', 'timestamp', 'target'])
+    features, target, timestamps = aligned
+    frame = pd.DataFrame({column: features[column] for column in FOREX_FEATURES})
+    frame['symbol'] = symbol
+    frame['timestamp'] = timestamps
+    frame['target'] = target
+    return frame
+
+
+def score_metrics(model_name, frame, predictions, previous_close):
+    """Per-symbol error metrics for one model's predictions over ``frame``."""
+    scored = pd.DataFrame({
+        'symbol': frame['symbol'].to_numpy(),
+        'timestamp': frame['timestamp'].to_numpy(),
+        'error': predictions - frame['target'].to_numpy(),
+        'target': frame['target'].to_numpy(),
+        'naive_error': frame['target'].to_numpy() - previous_close,
+        'hit': np.sign(predictions - previous_close) == np.sign(frame['target'].to_numpy() - previous_close),
+    })
+    scored['abs_error'] = scored['error'].abs()
+    scored['sq_error'] = scored['error'] ** 2
+    scored['pct_error'] = scored['abs_error'] / scored['target'].abs().replace(0, np.nan) * 100
+    scored['naive_abs_error'] = scored['naive_error'].abs()
+
+    grouped = scored.groupby('symbol', sort=False)
+    metrics = grouped.agg(
+        bars=('error', 'size'),
+        start=('timestamp', 'min'),
+        end=('timestamp', 'max'),
+        mae=('abs_error', 'mean'),
+        rmse=('sq_error', 'mean'),
+        mape=('pct_error', 'mean'),
+        naive_mae=('naive_abs_error', 'mean'),
+        direction_accuracy=('hit', 'mean'),
+    ).reset_index()
+    metrics['rmse'] = np.sqrt(metrics['rmse'])
+    metrics['start'] = pd.to_datetime(metrics['start'], utc=True)
+    metrics['end'] = pd.to_datetime(metrics['end'], utc=True)
+    metrics.insert(0, 'model', model_name)
+    return metrics[METRIC_COLUMNS]
+
+
+def run_task(kind, model_path, symbols, store_root, start=None, end=None, interval='1d'):
+    """
+    Backtest one model over ``symbols`` with a single ``predict`` call. ``kind`` is
+    ``'stock'`` (``symbols`` are company_mapping keys) or ``'forex'`` (one
+    forex_mapping key). Runs in a worker process, so it only takes plain arguments.
+    """
+    store = OHLCVStore(store_root)
+    model = joblib.load(model_path)
+    if kind == 'stock':
+        frame = stock_frame(store, symbols, start, end, interval)
+        features = frame[STOCK_FEATURES]
+        previous_close = frame['Close_Lagged'].to_numpy(dtype=np.float64)
+        name = os.path.basename(model_path)
+    else:
+        details = forex_mapping[symbols[0]]
+        frame = forex_frame(store, details['symbol'], start, end, interval)
+        features = frame[FOREX_FEATURES].to_numpy(dtype=np.float64)  # Fitted without feature names
+        previous_close = frame['Close'].to_numpy(dtype=np.float64)
+        name = details['name']
+    if frame.empty:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+    predictions = np.asarray(model.predict(features), dtype=np.float64)
+    return score_metrics(name, frame, predictions, previous_close)
+
+
+def plan(kind, models_dir, workers=1):
+    """
+    Split a backtest into tasks: the stock universe in one chunk per worker (one
+    ``predict`` per chunk) and one task per forex model.
+    """
+    tasks = []
+    if kind in ('stock', 'all'):
+        company_symbols = list(company_mapping)
+        chunks = max(1, min(workers, len(company_symbols)))
+        for chunk in np.array_split(np.array(company_symbols), chunks):
+            tasks.append(('stock', os.path.join(models_dir, STOCK_MODEL_FILE), [int(c) for c in chunk]))
+    if kind in ('forex', 'all'):
+        for forex_symbol, details in forex_mapping.items():
+            tasks.append(('forex', os.path.join(models_dir, details['model_file']), [forex_symbol]))
+    return tasks
+
+
+def run_backtest(kind, store_root, models_dir, start=None, end=None, interval='1d', workers=None):
+    """
+    Backtest the stock and/or forex models over the stored history. Returns a
+    DataFrame of per-symbol metrics. Tasks run on a process pool of ``workers``
+    processes (default: one per CPU); ``workers=0`` runs them in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    tasks = plan(kind, models_dir, max(workers, 1))
+    args = [(task_kind, model_path, symbols, str(store_root), start, end, interval)
+            for task_kind, model_path, symbols in tasks]
+
+    if workers == 0:
+        results = [run_task(*task_args) for task_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args)),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(run_task, *zip(*args)))
+
+    results = [result for result in results if not result.empty]
+    logger.info(f"Backtested {len(args)} tasks, {len(results)} with history")
+    if not results:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+    return pd.concat(results, ignore_index=True)
@@ -0,0 +1,17 @@
+# app/cache_backend.py
+from django.conf import settings
+
+# Backends whose contents are only visible to the process that wrote them
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared(alias='default'):
+    """
+    Whether the ``alias`` cache is visible to every worker and to the background
+    commands (Redis, Memcached, database, file). State kept in a process-local cache
+    (prefetched bars, fetch locks, quota counters) is not.
+    """
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
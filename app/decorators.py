@@ -1,19 +1,68 @@
-from django.http import HttpResponseRedirect
+import hmac
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponseForbidden, HttpResponseRedirect
 from django.shortcuts import redirect
 from django.urls import reverse
 
+def session_username(request):
+    """Username of the DynamoDB-session user, or None if the session is not authenticated."""
+    user = request.session.get('user')
+    if user and user.get('is_authenticated'):
+        return user.get('username')
+    return None
+
+def _login_redirect(request):
+    """Return a redirect to the login page if the session is not authenticated, else None."""
+    # Check if the user is authenticated via session
+    user = request.session.get('user')
+    if not user or not user.get('is_authenticated'):
+        # Redirect to login page with 'next' parameter
+        next_url = request.get_full_path()  # Get the current URL
+        login_url = f"{reverse('login')}?next={next_url}"
+        return HttpResponseRedirect(login_url)
+    return None
+
 def dynamodb_login_required(view_func):
     """
     Custom decorator to ensure the user is authenticated using DynamoDB session-based auth.
     Redirects unauthenticated users to the login page with the 'next' parameter.
+    Works with both sync and async views; async views load the session off the event loop.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapped_view(request, *args, **kwargs):
+            response = await sync_to_async(_login_redirect)(request)
+            if response is not None:
+                return response
+            return await view_func(request, *args, **kwargs)
+        return markcoroutinefunction(async_wrapped_view)
+
+    @wraps(view_func)
+    def wrapped_view(request, *args, **kwargs):
+        response = _login_redirect(request)
+        if response is not None:
+            return response
+        return view_func(request, *args, **kwargs)
+    return wrapped_view
+
+LOOPBACK_ADDRESSES = {'127.0.0.1', '::1'}
+
+def internal_only(view_func):
+    """
+    Restrict an operational endpoint: with METRICS_TOKEN set, require
+    ``Authorization: Bearer <METRICS_TOKEN>``; without it, only serve loopback clients.
     """
+    @wraps(view_func)
     def wrapped_view(request, *args, **kwargs):
-        # Check if the user is authenticated via session
-        user = request.session.get('user')
-        if not user or not user.get('is_authenticated'):
-            # Redirect to login page with 'next' parameter
-            next_url = request.get_full_path()  # Get the current URL
-            login_url = f"{reverse('login')}?next={next_url}"
-            return HttpResponseRedirect(login_url)
+        if settings.METRICS_TOKEN:
+            scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+            allowed = scheme.lower() == 'bearer' and hmac.compare_digest(token.strip(), settings.METRICS_TOKEN)
+        else:
+            allowed = request.META.get('REMOTE_ADDR') in LOOPBACK_ADDRESSES
+        if not allowed:
+            return HttpResponseForbidden()
         return view_func(request, *args, **kwargs)
-    return wrapped_view
\ No newline at end of file
+    return wrapped_view
@@ -1,6 +1,7 @@
 import sys
+import threading
+import time
 
-import boto3
 from botocore.exceptions import ClientError, BotoCoreError
 from datetime import datetime, timedelta
 from django.conf import settings
@@ -8,8 +9,56 @@ from django.contrib.sessions.backends.base import SessionBase, CreateError
 import uuid
 import logging
 
+from app.aws import get_dynamodb_resource, get_verified_table
+from app.lru import LRUCache
+
 logger = logging.getLogger(__name__)
 
+# Process-wide session backend counters, exposed through the metrics view
+_stats_lock = threading.Lock()
+_stats = {
+    'writes': 0,
+    'writes_elided': 0,
+    'near_cache_hits': 0,
+    'near_cache_misses': 0,
+    'near_cache_invalidations': 0,
+}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def session_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['near_cache_size'] = len(_near_cache)
+    return stats
+
+
+# Optional near-cache of session items in front of DynamoDB, enabled when
+# DYNAMODB_SESSION_NEAR_CACHE_TTL > 0. Writes and deletes made by this process
+# invalidate it immediately; writes made by other workers become visible after
+# at most DYNAMODB_SESSION_NEAR_CACHE_TTL seconds.
+_near_cache = LRUCache(maxsize=settings.DYNAMODB_SESSION_NEAR_CACHE_SIZE)
+# Version stamp bumped by every invalidation. A load only populates the near-cache
+# if no invalidation happened while it was reading, so a slow read can't put back
+# data that a concurrent save has already replaced.
+_near_cache_version = 0
+
+
+def _near_cache_enabled():
+    return settings.DYNAMODB_SESSION_NEAR_CACHE_TTL > 0
+
+
+def _invalidate(session_key):
+    global _near_cache_version
+    with _stats_lock:
+        _near_cache_version += 1
+        _stats['near_cache_invalidations'] += 1
+    _near_cache.pop(session_key)
+
 
 class DynamoDBSessionStore(SessionBase):
     """
@@ -19,27 +68,28 @@ class DynamoDBSessionStore(SessionBase):
     def __init__(self, session_key=None):
         super().__init__(session_key)
         self._table = None  # Will be initialized lazily
-        self._session_key = session_key or str(uuid.uuid4())
-
-        # Configure AWS client
-        self.dynamodb = boto3.resource(
-            'dynamodb',
-            region_name=settings.AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        )
+        # New sessions get their key on first save, so nothing tries to load them
+        self._session_key = session_key
+        # Serialized (unsigned) data as last read from / written to DynamoDB. The signed
+        # encoding embeds a timestamp, so it can't be compared across seconds.
+        self._stored_payload = None
+        self._stored_modified = None
 
         # For testing, ensure table exists
         if 'test' in sys.argv:
             self._ensure_table_exists()
 
+    @property
+    def dynamodb(self):
+        """Process-wide DynamoDB resource shared by every session object"""
+        return get_dynamodb_resource()
+
     @property
     def table(self):
-        """Lazy table initialization with existence check"""
+        """Shared table handle; existence is checked once per process, not per request"""
         if self._table is None:
-            self._table = self.dynamodb.Table(settings.DYNAMODB_SESSIONS_TABLE_NAME)
             try:
-                self._table.table_status  # Check if table exists
+                self._table = get_verified_table(settings.DYNAMODB_SESSIONS_TABLE_NAME)
             except (ClientError, BotoCoreError) as e:
                 logger.error(f"Session table access error: {e}")
                 raise CreateError(f"Session table not accessible: {str(e)}")
@@ -56,25 +106,62 @@ class DynamoDBSessionStore(SessionBase):
                     AttributeDefinitions=[{'AttributeName': 'session_key', 'AttributeType': 'S'}],
                     BillingMode='PAY_PER_REQUEST'
                 )
+                self.dynamodb.meta.client.update_time_to_live(
+                    TableName=settings.DYNAMODB_SESSIONS_TABLE_NAME,
+                    TimeToLiveSpecification={
+                        'Enabled': True,
+                        'AttributeName': settings.DYNAMODB_SESSION_TTL_ATTRIBUTE
+                    }
+                )
                 logger.info(f"Created session table {settings.DYNAMODB_SESSIONS_TABLE_NAME}")
         except (ClientError, BotoCoreError) as e:
             logger.error(f"Error ensuring table exists: {e}")
             raise CreateError(f"Failed to create session table: {str(e)}")
 
-    def load(self):
-        """Load session data from DynamoDB"""
-        try:
+    def _get_item(self):
+        """Fetch the session item, from the near-cache when enabled"""
+        if not _near_cache_enabled():
             response = self.table.get_item(
                 Key={'session_key': self._session_key},
                 ConsistentRead=True  # Ensure we get the latest data
             )
-            if 'Item' in response:
-                item = response['Item']
+            return response.get('Item')
+
+        item = _near_cache.get(self._session_key)
+        if item is not None:
+            _count('near_cache_hits')
+            return item
+        _count('near_cache_misses')
+
+        version = _near_cache_version
+        response = self.table.get_item(
+            Key={'session_key': self._session_key},
+            ConsistentRead=True  # Ensure we get the latest data
+        )
+        item = response.get('Item')
+        if item is not None and version == _near_cache_version:
+            _near_cache.set(self._session_key, item, ttl=settings.DYNAMODB_SESSION_NEAR_CACHE_TTL)
+        return item
+
+    def load(self):
+        """Load session data from DynamoDB"""
+        try:
+            item = self._get_item()
+            if item is not None:
                 expires_at = datetime.fromisoformat(item['expires_at'])
                 if expires_at > datetime.now():
-                    return self.decode(item['data'])
-                # Auto-delete expired sessions
-                self.delete(self._session_key)
+                    session_data = self.decode(item['data'])
+                    self._stored_payload = self._payload(session_data)
+                    self._stored_modified = datetime.fromisoformat(item['last_modified'])
+                    if self._expiry_due(session_data):
+                        # SessionMiddleware only saves modified sessions; mark this one so
+                        # an idle but active session still gets its expiry pushed forward
+                        self.modified = True
+                    return session_data
+                # With lazy writes, DynamoDB's TTL sweeper removes expired items
+                if not settings.DYNAMODB_SESSION_LAZY_WRITES:
+                    # Auto-delete expired sessions
+                    self.delete(self._session_key)
             return {}
         except (ClientError, BotoCoreError) as e:
             logger.error(f"Error loading session {self._session_key}: {e}")
@@ -103,13 +190,25 @@ class DynamoDBSessionStore(SessionBase):
         """Save session data to DynamoDB"""
         if not self._session_key:
             self._session_key = str(uuid.uuid4())
+            must_create = True
 
         session_data = self._get_session(no_load=must_create)
+        payload = self._payload(session_data)
+        if not must_create and self._can_elide_write(session_data, payload):
+            _count('writes_elided')
+            return
+
+        encoded = self.encode(session_data)
+        expiry_age = self.get_expiry_age()
+
+        now = datetime.now()
         data = {
             'session_key': self._session_key,
-            'data': self.encode(session_data),
-            'expires_at': (datetime.now() + timedelta(seconds=self.get_expiry_age())).isoformat(),
-            'last_modified': datetime.now().isoformat()
+            'data': encoded,
+            'expires_at': (now + timedelta(seconds=expiry_age)).isoformat(),
+            'last_modified': now.isoformat(),
+            # Epoch seconds for DynamoDB's native TTL expiry
+            settings.DYNAMODB_SESSION_TTL_ATTRIBUTE: int(time.time()) + expiry_age
         }
 
         try:
@@ -123,6 +222,35 @@ class DynamoDBSessionStore(SessionBase):
         except (ClientError, BotoCoreError) as e:
             logger.error(f"Error saving session {self._session_key}: {e}")
             raise CreateError(f"Failed to save session: {str(e)}")
+        finally:
+            _invalidate(self._session_key)
+        _count('writes')
+        self._stored_payload = payload
+        self._stored_modified = now
+
+    def _payload(self, session_data):
+        return self.serializer().dumps(session_data)
+
+    def _expiry_due(self, session_data):
+        """
+        With DYNAMODB_SESSION_LAZY_WRITES, whether DYNAMODB_SESSION_REFRESH_FRACTION of the
+        session age has passed since the expiry was last pushed forward.
+        """
+        if not settings.DYNAMODB_SESSION_LAZY_WRITES or self._stored_modified is None:
+            return False
+        # Pass the expiry explicitly: get_expiry_age() would otherwise load the session
+        expiry_age = self.get_expiry_age(expiry=session_data.get('_session_expiry'))
+        refresh_after = timedelta(seconds=expiry_age * settings.DYNAMODB_SESSION_REFRESH_FRACTION)
+        return datetime.now() - self._stored_modified >= refresh_after
+
+    def _can_elide_write(self, session_data, payload):
+        """
+        With DYNAMODB_SESSION_LAZY_WRITES, skip the write when the data is unchanged and
+        the expiry is not yet due to be refreshed.
+        """
+        if not settings.DYNAMODB_SESSION_LAZY_WRITES or self._stored_payload != payload:
+            return False
+        return not self._expiry_due(session_data)
 
     def delete(self, session_key=None):
         """Delete a session"""
@@ -135,6 +263,8 @@ class DynamoDBSessionStore(SessionBase):
         except (ClientError, BotoCoreError) as e:
             logger.error(f"Error deleting session {key}: {e}")
             # Don't raise exception for delete failures to avoid breaking logout flow
+        finally:
+            _invalidate(key)
 
     def clear(self):
         """Clear all session data"""
@@ -0,0 +1,41 @@
+# app/lazy.py
+import importlib
+import threading
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Lets modules on the request path keep ``pd.DataFrame``-style call sites while
+    heavy dependencies (pandas, yfinance, joblib, boto3, ...) are only imported
+    by the code paths that need them, so worker startup and cheap endpoints such
+    as /health/ don't pay for them.
+    """
+
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+    def _load(self):
+        module = self.__module
+        if module is None:
+            with _lock:
+                if self.__module is None:
+                    self.__module = importlib.import_module(self.__name)
+                module = self.__module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__module is not None else 'not loaded'
+        return f'<lazy module {self.__name!r} ({state})>'
+
+
+def lazy_import(name):
+    """Return ``name`` as a LazyModule."""
+    return LazyModule(name)
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.backtest import run_backtest
+
+
+class Command(BaseCommand):
+    help = ("Replay the stock and forex models over the local OHLCV history (manage.py sync_ohlcv) "
+            "and report one-step-ahead error metrics per symbol.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=['stock', 'forex', 'all'], default='all',
+                            help="Which models to backtest.")
+        parser.add_argument('--start', help="First bar to score (inclusive), e.g. 2020-01-01.")
+        parser.add_argument('--end', help="Last bar to score (exclusive).")
+        parser.add_argument('--interval', default='1d', help="Bar interval in the store.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Worker processes (default: one per CPU; 0 runs in this process).")
+        parser.add_argument('--store', default=settings.OHLCV_STORE_DIR, help="OHLCV store directory.")
+        parser.add_argument('--models', default=settings.MODEL_LOCAL_DIR, help="Directory of .joblib models.")
+        parser.add_argument('--csv', help="Also write the metrics to this CSV file.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        metrics = run_backtest(
+            options['kind'], options['store'], options['models'],
+            start=options['start'], end=options['end'], interval=options['interval'],
+            workers=options['workers'],
+        )
+        if metrics.empty:
+            raise CommandError(f"No history found in {options['store']}; run manage.py sync_ohlcv first.")
+
+        self.stdout.write(metrics.to_string(index=False, float_format=lambda value: f'{value:.4f}'))
+        if options['csv']:
+            metrics.to_csv(options['csv'], index=False)
+        self.stdout.write(f"Scored {int(metrics['bars'].sum())} bars for {len(metrics)} symbol/model pairs "
+                          f"in {time.perf_counter() - started:.1f} s.")
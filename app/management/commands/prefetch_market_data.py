@@ -0,0 +1,48 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.cache_backend import cache_is_shared
+from app.prefetch import Prefetcher, prefetch_symbols
+
+
+class Command(BaseCommand):
+    help = "Keep the shared market-data cache warm for every symbol in company_mapping and forex_mapping."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=settings.MARKET_DATA_PREFETCH_INTERVAL,
+                            help="Seconds between refreshes of each symbol.")
+        parser.add_argument('--workers', type=int, default=settings.MARKET_DATA_PREFETCH_WORKERS,
+                            help="Maximum concurrent upstream fetches.")
+        parser.add_argument('--jitter', type=float, default=0.1,
+                            help="Random spread applied to each interval, as a fraction.")
+        parser.add_argument('--max-backoff', type=int, default=900,
+                            help="Upper bound in seconds for the retry delay of a failing symbol.")
+        parser.add_argument('--once', action='store_true',
+                            help="Refresh every symbol once and exit.")
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            raise CommandError(f"{settings.CACHES['default']['BACKEND']} is local to this process, so the web "
+                               "workers would never see the prefetched bars; set DJANGO_CACHE_BACKEND and "
+                               "DJANGO_CACHE_LOCATION to a shared cache (e.g. Redis).")
+        prefetcher = Prefetcher(
+            prefetch_symbols(),
+            interval=options['interval'],
+            workers=options['workers'],
+            jitter=options['jitter'],
+            max_backoff=options['max_backoff'],
+        )
+
+        if options['once']:
+            prefetcher.next_run = dict.fromkeys(prefetcher.symbols, 0)
+            refreshed = prefetcher.run_once()
+            self.stdout.write(f"Refreshed {refreshed}/{len(prefetcher.symbols)} symbols.")
+            return
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: prefetcher.stop())
+        try:
+            prefetcher.run_forever()
+        except KeyboardInterrupt:
+            prefetcher.stop()
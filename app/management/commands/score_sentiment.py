@@ -0,0 +1,41 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.mappings import company_mapping
+from app.news import news_cache
+from app.sentiment import SentimentEngine
+
+
+class Command(BaseCommand):
+    help = "Score the articles cached in NewsCache and write per-company sentiment to SentimentCache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=settings.SENTIMENT_SCORE_INTERVAL,
+                            help="Seconds between scoring runs.")
+        parser.add_argument('--refresh-news', action='store_true',
+                            help="Refresh news for every company in company_mapping before scoring "
+                                 "(uses the GNews daily quota for stale entries).")
+        parser.add_argument('--once', action='store_true',
+                            help="Score once and exit.")
+
+    def handle(self, *args, **options):
+        engine = SentimentEngine()
+        engine.lexicon  # Fail fast if the lexicon data is missing
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        while not stop.is_set():
+            if options['refresh_news']:
+                for company in company_mapping.values():
+                    news_cache.get(company)
+            scored = engine.run()
+            self.stdout.write(f"Scored {scored} companies.")
+            if options['once']:
+                return
+            try:
+                stop.wait(options['interval'])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from app.ohlcv_store import ohlcv_store, sync_symbol
+from app.prefetch import prefetch_symbols
+
+
+class Command(BaseCommand):
+    help = "Append missing OHLCV bars to the local history store and optionally compact it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*',
+                            help="Symbols to sync. Defaults to every symbol in company_mapping and forex_mapping.")
+        parser.add_argument('--interval', default='1d', help="yfinance bar interval.")
+        parser.add_argument('--workers', type=int, default=4, help="Concurrent upstream downloads.")
+        parser.add_argument('--compact', action='store_true', help="Merge each symbol's segments after syncing.")
+        parser.add_argument('--no-fetch', action='store_true', help="Skip downloading; only compact.")
+
+    def handle(self, *args, **options):
+        symbols = options['symbols'] or prefetch_symbols()
+        interval = options['interval']
+
+        if not options['no_fetch']:
+            def sync(symbol):
+                try:
+                    return symbol, sync_symbol(ohlcv_store, symbol, interval), None
+                except Exception as e:
+                    return symbol, 0, e
+
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                for symbol, appended, error in executor.map(sync, symbols):
+                    if error is not None:
+                        self.stderr.write(f"{symbol}: {error}")
+                    else:
+                        self.stdout.write(f"{symbol}: appended {appended} bars")
+
+        if options['compact']:
+            for symbol in symbols:
+                merged = ohlcv_store.compact(symbol, interval)
+                if merged > 1:
+                    self.stdout.write(f"{symbol}: compacted {merged} segments")
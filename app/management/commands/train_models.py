@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.training import promote, train_all
+
+
+class Command(BaseCommand):
+    help = ("Retrain the stock and forex models from the local OHLCV history (manage.py sync_ohlcv) "
+            "into a versioned directory of .joblib artifacts with JSON metadata.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=['stock', 'forex', 'all'], default='all',
+                            help="Which models to train.")
+        parser.add_argument('--start', help="First bar of the training window (inclusive), e.g. 2020-01-01.")
+        parser.add_argument('--end', help="Last bar of the training window (exclusive).")
+        parser.add_argument('--interval', default='1d', help="Bar interval in the store.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Worker processes (default: one per CPU; 0 trains in this process).")
+        parser.add_argument('--threads', type=int, default=None,
+                            help="BLAS/OpenMP threads per worker (default: CPUs divided between workers).")
+        parser.add_argument('--store', default=settings.OHLCV_STORE_DIR, help="OHLCV store directory.")
+        parser.add_argument('--output', default=settings.MODEL_TRAINING_DIR,
+                            help="Directory the versioned training runs are written to.")
+        parser.add_argument('--name', help="Name of the run's directory (default: UTC timestamp).")
+        parser.add_argument('--promote', action='store_true',
+                            help=f"Copy the trained stock model into {settings.MODEL_LOCAL_DIR}.")
+        parser.add_argument('--promote-forex-side', choices=['ASK', 'BID'], action='append', default=[],
+                            dest='forex_sides',
+                            help="Also promote the forex models of this quote side. Both sides are "
+                                 "trained on the same target, so they come out identical.")
+
+    def handle(self, *args, **options):
+        version_dir, manifest = train_all(
+            options['store'], options['output'], kind=options['kind'],
+            start=options['start'], end=options['end'], interval=options['interval'],
+            workers=options['workers'], threads=options['threads'], version=options['name'],
+        )
+        if not manifest['models']:
+            raise CommandError(f"No history found in {options['store']}; run manage.py sync_ohlcv first.")
+
+        for model_file, hashes in sorted(manifest['models'].items()):
+            self.stdout.write(f"{model_file:<32} {hashes['artifact_sha256'][:12]}")
+        self.stdout.write(f"Trained {len(manifest['models'])} models into {version_dir} "
+                          f"in {manifest['wall_seconds']:.1f} s ({manifest['workers']} workers x "
+                          f"{manifest['threads_per_worker']} threads).")
+        if options['forex_sides'] and not options['promote']:
+            raise CommandError("--promote-forex-side requires --promote.")
+        if options['promote']:
+            promoted = promote(version_dir, settings.MODEL_LOCAL_DIR, forex_sides=options['forex_sides'])
+            self.stdout.write(f"Promoted {len(promoted)} models to {settings.MODEL_LOCAL_DIR}.")
+            skipped = len(manifest['models']) - len(promoted)
+            if skipped:
+                self.stdout.write(f"Left {skipped} forex models alone; pass --promote-forex-side to promote them.")
@@ -0,0 +1,46 @@
+# app/mappings.py
+# Define mappings (replace with your actual mappings)
+company_mapping = {
+    0: 'ADANIPORTS.NS', 1: 'APOLLOHOSP.NS', 2: 'ASIANPAINT.NS', 3: 'AXISBANK.NS',
+    4: 'BAJAJ-AUTO.NS', 5: 'BAJAJFINSV.NS', 6: 'BPCL.NS', 7: 'BRITANNIA.NS', 8: 'CIPLA.NS', 9: 'COALINDIA.NS',
+    10: 'DIVISLAB.NS', 11: 'DRREDDY.NS', 12: 'EICHERMOT.NS', 13: 'GRASIM.NS', 14: 'HCLTECH.NS', 15: 'HDFCLIFE.NS',
+    16: 'HDFCBANK.NS', 17: 'HEROMOTOCO.NS', 18: 'HINDALCO.NS', 19: 'HINDUNILVR.NS', 20: 'ICICIBANK.NS',
+    21: 'INDUSINDBK.NS', 22: 'INFY.NS', 23: 'ITC.NS', 24: 'JIOFIN.NS', 25: 'JSWSTEEL.NS', 26: 'KOTAKBANK.NS',
+    27: 'LT.NS', 28: 'LTIM.NS', 29: 'M&M.NS', 30: 'MARUTI.NS', 31: 'NESTLEIND.NS', 32: 'NIFTY50.NS', 33: 'NTPC.NS',
+    34: 'ONGC.NS', 35: 'POWERGRD.NS', 36: 'RELIANCE.NS', 37: 'SBILIFE.NS', 38: 'SBIN.NS', 39: 'SUNPHARMA.NS',
+    40: 'TCS.NS', 41: 'TATACONSUM.NS', 42: 'TATAMOTORS.NS', 43: 'TATASTEEL.NS', 44: 'TECHM.NS', 45: 'TITAN.NS',
+    46: 'ULTRACEMCO.NS', 47: 'UPL.NS', 48: 'WIPRO.NS'
+}
+
+forex_mapping = {
+    0: {'name': 'AUD/USD ASK', 'model_file': 'AUD-USD-ASK.joblib', 'symbol': 'AUDUSD=X'},
+    1: {'name': 'AUD/USD BID', 'model_file': 'AUD-USD-BID.joblib', 'symbol': 'AUDUSD=X'},
+    2: {'name': 'EUR/USD ASK', 'model_file': 'EUR-USD-ASK.joblib', 'symbol': 'EURUSD=X'},
+    3: {'name': 'EUR/USD BID', 'model_file': 'EUR-USD-BID.joblib', 'symbol': 'EURUSD=X'},
+    4: {'name': 'GBP/USD ASK', 'model_file': 'GBP-USD-ASK.joblib', 'symbol': 'GBPUSD=X'},
+    5: {'name': 'GBP/USD BID', 'model_file': 'GBP-USD-BID.joblib', 'symbol': 'GBPUSD=X'},
+    6: {'name': 'NZD/USD ASK', 'model_file': 'NZD-USD-ASK.joblib', 'symbol': 'NZDUSD=X'},
+    7: {'name': 'NZD/USD BID', 'model_file': 'NZD-USD-BID.joblib', 'symbol': 'NZDUSD=X'},
+    8: {'name': 'USD/CAD ASK', 'model_file': 'USD-CAD-ASK.joblib', 'symbol': 'USDCAD=X'},
+    9: {'name': 'USD/CAD BID', 'model_file': 'USD-CAD-BID.joblib', 'symbol': 'USDCAD=X'},
+    10: {'name': 'USD/CHF ASK', 'model_file': 'USD-CHF-ASK.joblib', 'symbol': 'USDCHF=X'},
+    11: {'name': 'USD/CHF BID', 'model_file': 'USD-CHF-BID.joblib', 'symbol': 'USDCHF=X'},
+    12: {'name': 'USD/JPY ASK', 'model_file': 'USD-JPY-ASK.joblib', 'symbol': 'USDJPY=X'},
+    13: {'name': 'USD/JPY BID', 'model_file': 'USD-JPY-BID.joblib', 'symbol': 'USDJPY=X'},
+    14: {'name': 'XAG/USD ASK', 'model_file': 'XAG-USD-ASK.joblib', 'symbol': 'XAGUSD=X'},
+    15: {'name': 'XAG/USD BID', 'model_file': 'XAG-USD-BID.joblib', 'symbol': 'XAGUSD=X'},
+}
+
+
+def _group_forex_pairs(mapping):
+    """Group forex_mapping into pairs sharing one symbol, each with an ASK and a BID model."""
+    pairs = {}
+    for entry in mapping.values():
+        pair_name, side = entry['name'].rsplit(' ', 1)
+        pair = pairs.setdefault(pair_name, {'symbol': entry['symbol']})
+        pair[side] = entry['model_file']
+    return pairs
+
+
+# e.g. {'EUR/USD': {'symbol': 'EURUSD=X', 'ASK': 'EUR-USD-ASK.joblib', 'BID': 'EUR-USD-BID.joblib'}}
+forex_pairs = _group_forex_pairs(forex_mapping)
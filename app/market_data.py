@@ -0,0 +1,262 @@
+# app/market_data.py
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from app.cache_backend import cache_is_shared
+from app.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+yf = lazy_import('yfinance')
+
+BAR_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Length of each yfinance bar interval in seconds
+INTERVAL_SECONDS = {
+    '1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800,
+    '60m': 3600, '90m': 5400, '1h': 3600, '1d': 86400, '5d': 432000,
+    '1wk': 604800, '1mo': 2592000,
+}
+
+
+def _bar_from_frame(data):
+    """Convert the last row of a yfinance history frame into a bar dict."""
+    row = data.iloc[-1]
+    bar = {field: float(row[field]) for field in BAR_FIELDS}
+    bar['Timestamp'] = data.index[-1].isoformat()
+    return bar
+
+
+def fetch_latest_bar(symbol, period="1d", interval="1d"):
+    """
+    Download the most recent OHLCV bar for a stock or forex pair.
+    One upstream request per call.
+    """
+    ticker = yf.Ticker(symbol)
+    data = ticker.history(period=period, interval=interval)
+    if data.empty:
+        raise ValueError(f"No data found for symbol: {symbol}")
+    return _bar_from_frame(data)
+
+
+def fetch_latest_bars(symbols, period="1d", interval="1d"):
+    """
+    Download the most recent OHLCV bar for several symbols in one multi-symbol request.
+    Returns a dict of symbol -> bar, with None for symbols that returned no data.
+    """
+    data = yf.download(list(symbols), period=period, interval=interval, group_by='ticker',
+                       auto_adjust=True, multi_level_index=True, progress=False)
+    bars = {}
+    for symbol in symbols:
+        frame = None
+        if data is not None and symbol in data.columns.get_level_values(0):
+            frame = data[symbol].dropna(subset=['Close'])
+        bars[symbol] = _bar_from_frame(frame) if frame is not None and not frame.empty else None
+    return bars
+
+
+def bar_ttl(interval="1d"):
+    """Cache lifetime for a bar: one bar interval, capped by MARKET_DATA_MAX_TTL."""
+    return min(INTERVAL_SECONDS.get(interval, 86400), settings.MARKET_DATA_MAX_TTL)
+
+
+def cache_key(symbol, interval="1d"):
+    return f"market_data:{interval}:{symbol}"
+
+
+class _Flight:
+    """A single in-progress upstream fetch that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class MarketDataCache:
+    """
+    Read-through cache for latest bars with single-flight fetching.
+
+    Concurrent misses for the same symbol inside a worker wait on one thread's
+    fetch. Across workers, a short-lived lock key taken with ``cache.add`` lets
+    one worker fetch while the others poll the shared cache for its result.
+    Cross-worker coalescing needs a shared CACHES backend (Redis, Memcached,
+    database); with the default LocMemCache it only applies within a process.
+    MARKET_DATA_PREFETCHED is ignored with a process-local backend, since the
+    prefetcher's bars would never reach the web workers.
+    """
+
+    def __init__(self, fetcher=fetch_latest_bar, batch_fetcher=fetch_latest_bars):
+        self.fetcher = fetcher
+        self.batch_fetcher = batch_fetcher
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._warned_local_prefetch = False
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'upstream_fetches': 0,
+            'upstream_errors': 0,
+            'coalesced_waiters': 0,
+            'remote_waiters': 0,
+            'cold_misses': 0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def prefetched(self):
+        """Whether request handlers should only read bars written by the prefetcher."""
+        if not settings.MARKET_DATA_PREFETCHED:
+            return False
+        if cache_is_shared():
+            return True
+        if not self._warned_local_prefetch:
+            self._warned_local_prefetch = True
+            logger.warning("MARKET_DATA_PREFETCHED is set but the cache backend is process-local; "
+                           "fetching market data in the request path instead")
+        return False
+
+    def get(self, symbol, interval="1d"):
+        """Return the latest bar for ``symbol`` from cache, fetching it at most once on a miss."""
+        key = cache_key(symbol, interval)
+        bar = cache.get(key)
+        if bar is not None:
+            self._count('hits')
+            return bar
+        self._count('misses')
+        if self.prefetched():
+            # Only the prefetcher talks to Yahoo
+            self._count('cold_misses')
+            return None
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._counters['coalesced_waiters'] += 1
+
+        if not leader:
+            flight.done.wait(settings.MARKET_DATA_LOCK_TIMEOUT)
+            return flight.result
+
+        try:
+            flight.result = self._fetch_shared(key, symbol, interval)
+        finally:
+            flight.done.set()
+            with self._lock:
+                self._inflight.pop(key, None)
+        return flight.result
+
+    def get_many(self, symbols, interval="1d"):
+        """
+        Return latest bars for ``symbols``, fetching every cache miss in one upstream request.
+        Symbols that could not be fetched map to None.
+        """
+        keys = {cache_key(symbol, interval): symbol for symbol in symbols}
+        cached = cache.get_many(list(keys))
+        bars = {keys[key]: bar for key, bar in cached.items()}
+        missing = [symbol for symbol in symbols if symbol not in bars]
+        self._count('hits', len(bars))
+        self._count('misses', len(missing))
+        if not missing:
+            return bars
+        if self.prefetched():
+            self._count('cold_misses', len(missing))
+            bars.update(dict.fromkeys(missing))
+            return bars
+
+        self._count('upstream_fetches')
+        try:
+            fetched = self.batch_fetcher(missing, interval=interval)
+        except Exception as e:
+            self._count('upstream_errors')
+            logger.error(f"Error fetching market data for {len(missing)} symbols: {e}")
+            fetched = {}
+        cache.set_many(
+            {cache_key(symbol, interval): bar for symbol, bar in fetched.items() if bar is not None},
+            timeout=bar_ttl(interval),
+        )
+        for symbol in missing:
+            bars[symbol] = fetched.get(symbol)
+        return bars
+
+    def store(self, symbol, bar, interval="1d", timeout=None):
+        """Write a bar into the shared cache."""
+        cache.set(cache_key(symbol, interval), bar, timeout=timeout or bar_ttl(interval))
+
+    def refresh(self, symbol, interval="1d", timeout=None):
+        """Fetch ``symbol`` from upstream and overwrite the cached bar. Raises on failure."""
+        bar = self._fetch_upstream(symbol, interval)
+        self.store(symbol, bar, interval, timeout)
+        return bar
+
+    def _fetch_upstream(self, symbol, interval):
+        self._count('upstream_fetches')
+        try:
+            return self.fetcher(symbol, interval=interval)
+        except Exception:
+            self._count('upstream_errors')
+            raise
+
+    def _fetch_shared(self, key, symbol, interval):
+        lock_key = f"{key}:lock"
+        lock_timeout = settings.MARKET_DATA_LOCK_TIMEOUT
+        token = f"{os.getpid()}:{uuid.uuid4().hex}"
+
+        if not cache.add(lock_key, token, timeout=lock_timeout):
+            # Another worker is fetching this symbol; wait for its result
+            self._count('remote_waiters')
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(settings.MARKET_DATA_POLL_INTERVAL)
+                bar = cache.get(key)
+                if bar is not None:
+                    return bar
+                if cache.get(lock_key) is None:
+                    break
+            cache.add(lock_key, token, timeout=lock_timeout)
+
+        try:
+            return self.refresh(symbol, interval)
+        except Exception as e:
+            logger.error(f"Error fetching market data for {symbol}: {e}")
+            return None
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters['inflight'] = len(self._inflight)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = counters['hits'] / lookups if lookups else 0.0
+        return counters
+
+
+market_data_cache = MarketDataCache()
+
+
+def get_latest_bar(symbol, interval="1d"):
+    """
+    Fetch the latest OHLCV bar for a stock or forex pair.
+    Returns a dict with Open, High, Low, Close, Volume and Timestamp, or None on failure.
+    """
+    return market_data_cache.get(symbol, interval)
+
+
+def get_latest_bars(symbols, interval="1d"):
+    """
+    Fetch the latest OHLCV bar for several symbols with at most one upstream request.
+    Returns a dict of symbol -> bar, with None for symbols that could not be fetched.
+    """
+    return market_data_cache.get_many(symbols, interval)
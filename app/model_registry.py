@@ -0,0 +1,230 @@
+# app/model_registry.py
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+
+from app.aws import get_s3_client
+from app.lazy import lazy_import
+from app.mappings import forex_mapping
+
+logger = logging.getLogger(__name__)
+
+joblib = lazy_import('joblib')
+
+STOCK_MODEL_FILE = 'stock_price_predictor_model.joblib'
+
+
+def all_model_files():
+    """The stock model followed by every forex model in forex_mapping."""
+    return [STOCK_MODEL_FILE] + [pair['model_file'] for pair in forex_mapping.values()]
+
+
+def _file_md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _Entry:
+    __slots__ = ('model', 'version', 'source', 'checked_at', 'loaded_at', 'load_time')
+
+    def __init__(self, model, version, source, load_time):
+        self.model = model
+        self.version = version
+        self.source = source
+        self.load_time = load_time
+        self.loaded_at = time.time()
+        self.checked_at = time.monotonic()
+
+
+class ModelRegistry:
+    """
+    In-process cache of joblib models backed by S3.
+
+    Each model is downloaded and unpickled once per process and then served from
+    memory. The S3 ETag is re-checked at most once every ``check_interval`` seconds,
+    on a background thread (one per model at a time) while requests keep getting the
+    loaded copy, and the model is only reloaded when it has changed. If S3 is
+    unreachable the registry falls back to the copy in ``local_dir``.
+    """
+
+    def __init__(self, bucket_name, key_prefix='models/', cache_dir='/tmp', local_dir=None,
+                 check_interval=300):
+        self.bucket_name = bucket_name
+        self.key_prefix = key_prefix
+        self.cache_dir = cache_dir
+        self.local_dir = local_dir
+        self.check_interval = check_interval
+
+        self._models = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._revalidations = {}
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'loads': 0,
+            'reloads': 0,
+            'etag_checks': 0,
+            'load_errors': 0,
+            'load_time_total': 0.0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _load_lock(self, model_file):
+        with self._lock:
+            return self._load_locks.setdefault(model_file, threading.Lock())
+
+    def get(self, model_file):
+        """Return the model for ``model_file``, loading it on first use."""
+        entry = self._models.get(model_file)
+        if entry is not None:
+            if self.check_interval and time.monotonic() - entry.checked_at >= self.check_interval:
+                self._schedule_revalidate(model_file, entry)
+            self._count('hits')
+            return entry.model
+
+        self._count('misses')
+        with self._load_lock(model_file):
+            entry = self._models.get(model_file)
+            if entry is None:
+                entry = self._load(model_file)
+        return entry.model
+
+    def version(self, model_file):
+        """Identity of the currently loaded model (S3 ETag or file hash), or None."""
+        entry = self._models.get(model_file)
+        return entry.version if entry is not None else None
+
+    def warm(self, model_files=None):
+        """Load every model up front. Returns the number of models loaded."""
+        loaded = 0
+        for model_file in model_files or all_model_files():
+            try:
+                self.get(model_file)
+                loaded += 1
+            except Exception as e:
+                logger.error(f"Error warming model {model_file}: {e}")
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            models = {
+                name: {
+                    'version': entry.version,
+                    'source': entry.source,
+                    'load_time_ms': round(entry.load_time * 1000, 3),
+                    'loaded_at': entry.loaded_at,
+                }
+                for name, entry in self._models.items()
+            }
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = counters['hits'] / lookups if lookups else 0.0
+        counters['load_time_total_ms'] = round(counters.pop('load_time_total') * 1000, 3)
+        counters['models'] = models
+        return counters
+
+    def _key(self, model_file):
+        return f'{self.key_prefix}{model_file}'
+
+    def _schedule_revalidate(self, model_file, entry):
+        """Start a background ETag check for ``model_file`` unless one is already running."""
+        with self._lock:
+            running = self._revalidations.get(model_file)
+            if running is not None and running.is_alive():
+                return running
+            thread = threading.Thread(target=self._revalidate_in_background, args=(model_file, entry),
+                                      name=f'model-revalidate-{model_file}', daemon=True)
+            self._revalidations[model_file] = thread
+        thread.start()
+        return thread
+
+    def _revalidate_in_background(self, model_file, entry):
+        try:
+            self._revalidate(model_file, entry)
+        except Exception as e:
+            logger.error(f"Error revalidating model {model_file}: {e}")
+
+    def _revalidate(self, model_file, entry):
+        """Reload the model if its S3 ETag changed since it was loaded."""
+        with self._load_lock(model_file):
+            current = self._models.get(model_file)
+            if current is not entry or time.monotonic() - entry.checked_at < self.check_interval:
+                return current or entry
+            entry.checked_at = time.monotonic()
+            self._count('etag_checks')
+            try:
+                head = get_s3_client().head_object(Bucket=self.bucket_name, Key=self._key(model_file))
+            except (ClientError, BotoCoreError) as e:
+                logger.warning(f"Could not check ETag for {model_file}, keeping loaded model: {e}")
+                return entry
+            if head['ETag'].strip('"') == entry.version:
+                return entry
+            logger.info(f"Model {model_file} changed in S3, reloading")
+            try:
+                entry = self._load(model_file)
+                self._count('reloads')
+            except Exception as e:
+                logger.error(f"Error reloading model {model_file}, keeping previous version: {e}")
+            return entry
+
+    def _load(self, model_file):
+        started = time.perf_counter()
+        try:
+            path, version, source = self._download(model_file)
+            model = joblib.load(path)
+        except Exception as e:
+            self._count('load_errors')
+            logger.error(f"Error loading model {model_file}: {e}")
+            raise
+        load_time = time.perf_counter() - started
+
+        entry = _Entry(model, version, source, load_time)
+        with self._lock:
+            self._models[model_file] = entry
+            self._counters['loads'] += 1
+            self._counters['load_time_total'] += load_time
+        logger.info(f"Loaded model {model_file} from {source} in {load_time * 1000:.1f} ms")
+        return entry
+
+    def _download(self, model_file):
+        """Fetch the model file from S3, falling back to the bundled copy."""
+        local_path = os.path.join(self.cache_dir, model_file)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            s3 = get_s3_client()
+            head = s3.head_object(Bucket=self.bucket_name, Key=self._key(model_file))
+            tmp_path = f'{local_path}.{os.getpid()}.part'
+            s3.download_file(self.bucket_name, self._key(model_file), tmp_path)
+            os.replace(tmp_path, local_path)
+            return local_path, head['ETag'].strip('"'), 's3'
+        except (ClientError, BotoCoreError) as e:
+            fallback = os.path.join(self.local_dir, model_file) if self.local_dir else None
+            if not fallback or not os.path.exists(fallback):
+                raise
+            logger.warning(f"Error downloading {model_file} from S3, using local copy: {e}")
+            return fallback, _file_md5(fallback), 'local'
+
+
+model_registry = ModelRegistry(
+    bucket_name=settings.MODEL_BUCKET_NAME,
+    key_prefix=settings.MODEL_KEY_PREFIX,
+    cache_dir=settings.MODEL_CACHE_DIR,
+    local_dir=settings.MODEL_LOCAL_DIR,
+    check_interval=settings.MODEL_REGISTRY_CHECK_INTERVAL,
+)
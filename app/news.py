@@ -0,0 +1,242 @@
+# app/news.py
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.core.cache import cache
+
+from app.aws import get_table
+from app.cache_backend import cache_is_shared
+from app.lazy import lazy_import
+from app.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+requests = lazy_import('requests')
+
+GNEWS_BASE_URL = "https://gnews.io/api/v4/search"
+GNEWS_COUNTER_KEY = "gnews_daily_counter"  # Also read by the api_usage view
+
+
+def build_http_session(pool_size):
+    """A requests session with a keep-alive connection pool and no automatic retries."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class NewsCache:
+    """
+    Tiered cache of recent news articles per company.
+
+    Lookups go to an in-process LRU, then the ``NewsCache`` DynamoDB table, then
+    GNews. Entries younger than ``fresh_ttl`` are served as-is. Entries up to
+    ``stale_ttl`` old are served immediately while one background refresh per
+    company fetches a new copy. Only missing or fully expired entries make the
+    caller wait on GNews. Before going upstream, a refresh re-reads the table in
+    case another worker has already stored a fresh copy. Upstream calls are counted
+    against ``daily_limit`` with an atomic counter in the Django cache, which must be
+    a shared backend for the limit to hold across workers.
+    """
+
+    def __init__(self, table_name='NewsCache', fresh_ttl=86400, stale_ttl=7 * 86400, local_size=256,
+                 daily_limit=100, timeout=(3.05, 10), pool_size=4, refresh_workers=2):
+        self.table_name = table_name
+        self.fresh_ttl = timedelta(seconds=fresh_ttl)
+        self.stale_ttl = timedelta(seconds=stale_ttl)
+        self.daily_limit = daily_limit
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.refresh_workers = refresh_workers
+
+        self._local = LRUCache(maxsize=local_size, ttl=stale_ttl)
+        self._lock = threading.Lock()
+        self._company_locks = {}
+        self._session = None
+        self._executor = None
+        self._pid = None
+        self._warned_local_quota = False
+        self._counters = {
+            'local_hits': 0,
+            'table_hits': 0,
+            'stale_served': 0,
+            'refreshes_scheduled': 0,
+            'upstream_fetches': 0,
+            'upstream_errors': 0,
+            'quota_exhausted': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _company_lock(self, company_name):
+        with self._lock:
+            return self._company_locks.setdefault(company_name, threading.Lock())
+
+    def _ensure_process(self):
+        # Pooled connections and executor threads don't survive fork(); rebuild per process
+        with self._lock:
+            if self._pid != os.getpid():
+                self._session = build_http_session(self.pool_size)
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                    thread_name_prefix='news-refresh')
+                self._pid = os.getpid()
+
+    def get(self, company_name):
+        """Return the cached articles for ``company_name``, fetching them if needed."""
+        entry = self._local.get(company_name)
+        if entry is not None:
+            self._count('local_hits')
+        else:
+            entry = self._load(company_name)
+            if entry is not None:
+                self._count('table_hits')
+                self._local.set(company_name, entry)
+
+        if entry is not None:
+            articles, fetched_at = entry
+            age = datetime.now() - fetched_at
+            if self._is_fresh(entry):
+                return articles
+            if age < self.stale_ttl:
+                self._count('stale_served')
+                self.schedule_refresh(company_name)
+                return articles
+
+        articles = self.refresh(company_name)
+        if articles is None:
+            return entry[0] if entry is not None else []
+        return articles
+
+    def _load(self, company_name):
+        try:
+            response = get_table(self.table_name).get_item(Key={'Company': company_name})
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error reading news cache for {company_name}: {e}")
+            return None
+        item = response.get('Item')
+        if item is None:
+            return None
+        return item['Articles'], datetime.fromisoformat(item['Timestamp'])
+
+    def schedule_refresh(self, company_name):
+        """Refresh ``company_name`` in the background unless a refresh is already running."""
+        self._ensure_process()
+        lock = self._company_lock(company_name)
+        if lock.locked():
+            return False
+        self._count('refreshes_scheduled')
+        self._executor.submit(self.refresh, company_name, False)
+        return True
+
+    def refresh(self, company_name, wait=True):
+        """
+        Fetch ``company_name`` from GNews and store it in both cache tiers. Concurrent
+        refreshes of one company are coalesced. Returns the articles, or None if the
+        fetch failed, the daily quota is used up, or (with ``wait=False``) another
+        refresh is already running.
+        """
+        lock = self._company_lock(company_name)
+        if not lock.acquire(blocking=wait):
+            return None
+        try:
+            # Another thread, or another worker via the table, may have refreshed already
+            entry = self._local.get(company_name)
+            if entry is not None and self._is_fresh(entry):
+                return entry[0]
+            entry = self._load(company_name)
+            if entry is not None and self._is_fresh(entry):
+                self._count('table_hits')
+                self._local.set(company_name, entry)
+                return entry[0]
+            return self._fetch(company_name)
+        finally:
+            lock.release()
+
+    def _is_fresh(self, entry):
+        return datetime.now() - entry[1] < self.fresh_ttl
+
+    def _take_quota(self):
+        if not cache_is_shared() and not self._warned_local_quota:
+            self._warned_local_quota = True
+            logger.warning("The GNews quota counter is in a process-local cache, so each worker gets the "
+                           "full daily limit; set DJANGO_CACHE_BACKEND to a shared cache")
+        cache.add(GNEWS_COUNTER_KEY, 0, timeout=86400)  # Window starts at the first call of the day
+        try:
+            count = cache.incr(GNEWS_COUNTER_KEY)
+        except ValueError:
+            cache.add(GNEWS_COUNTER_KEY, 1, timeout=86400)
+            count = 1
+        if count > self.daily_limit:
+            cache.decr(GNEWS_COUNTER_KEY)
+            return False
+        return True
+
+    def _fetch(self, company_name):
+        if not self._take_quota():
+            self._count('quota_exhausted')
+            logger.warning("Daily GNews API limit reached. Using cached data only.")
+            return None
+
+        self._ensure_process()
+        self._count('upstream_fetches')
+        params = {
+            'q': company_name,
+            'lang': 'en',
+            'max': 5,
+            'apikey': settings.GNEWS_API_KEY
+        }
+        try:
+            response = self._session.get(GNEWS_BASE_URL, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            articles = response.json().get('articles', [])
+        except (requests.RequestException, ValueError) as e:
+            self._count('upstream_errors')
+            logger.error(f"Error fetching news for {company_name}: {e}")
+            return None
+
+        fetched_at = datetime.now()
+        self._local.set(company_name, (articles, fetched_at))
+        try:
+            get_table(self.table_name).put_item(Item={
+                'Company': company_name,
+                'Articles': articles,
+                'Timestamp': fetched_at.isoformat()
+            })
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error caching news for {company_name}: {e}")
+        return articles
+
+    def clear(self):
+        self._local.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters['local'] = self._local.stats()
+        return counters
+
+
+news_cache = NewsCache(
+    fresh_ttl=settings.NEWS_CACHE_TTL,
+    stale_ttl=settings.NEWS_CACHE_STALE_TTL,
+    local_size=settings.NEWS_CACHE_LOCAL_SIZE,
+    daily_limit=settings.GNEWS_DAILY_LIMIT,
+    timeout=(settings.NEWS_CONNECT_TIMEOUT, settings.NEWS_READ_TIMEOUT),
+)
+
+
+def fetch_recent_news(company_name):
+    """
+    Fetch recent news articles about a company, served from the tiered news cache.
+    Returns a list of GNews article dicts (empty if nothing is cached and GNews is
+    unavailable or over quota).
+    """
+    return news_cache.get(company_name)
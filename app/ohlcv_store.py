@@ -0,0 +1,262 @@
+# app/ohlcv_store.py
+import contextlib
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+COLUMNS = ('Timestamp',) + PRICE_COLUMNS
+
+# Written into a segment that supersedes older ones, listing their names
+REPLACES_FILE = 'replaces'
+
+
+def _to_ns(value):
+    """Nanoseconds since the epoch for a timestamp-like value, treating naive values as UTC."""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+    return ts.value
+
+
+class OHLCVStore:
+    """
+    On-disk columnar store of OHLCV bars, one directory per (interval, symbol).
+
+    Each append writes a new immutable segment holding one ``.npy`` file per column:
+    ``Timestamp`` as int64 nanoseconds since the epoch (UTC) and the price columns as
+    float64. Reads memory-map the segments, so a range that falls inside one segment
+    is returned as zero-copy views. ``compact`` merges a symbol's segments into one.
+
+    Rewrites never modify a segment in place: the new segment is committed by an
+    atomic rename and lists the segments it supersedes, which readers skip and the
+    next writer removes if a crash left them behind. Writers (any thread, any
+    process) hold an ``flock`` on the symbol directory's ``.lock`` file.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, symbol, interval):
+        with self._locks_lock:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    @contextlib.contextmanager
+    def _locked(self, symbol, interval):
+        """
+        Hold ``symbol`` exclusively. sync_ohlcv and the web workers can write the same
+        store, so the thread lock is paired with an ``flock`` on the symbol's ``.lock``
+        file. Finishes any rewrite a crashed writer left half done.
+        """
+        with self._lock(symbol, interval):
+            path = self._symbol_dir(symbol, interval)
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, '.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._recover(path)
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _recover(self, path):
+        for name in os.listdir(path):
+            if name.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        segments = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.startswith('seg-')]
+        if segments:
+            self._remove_replaced(segments[-1])
+
+    def _symbol_dir(self, symbol, interval):
+        return os.path.join(self.root, interval, symbol.replace(os.sep, '_'))
+
+    def symbols(self, interval='1d'):
+        path = os.path.join(self.root, interval)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def segments(self, symbol, interval='1d'):
+        """Segment directories for ``symbol`` in time order."""
+        path = self._symbol_dir(symbol, interval)
+        if not os.path.isdir(path):
+            return []
+        names = [name for name in sorted(os.listdir(path)) if name.startswith('seg-')]
+        # Only the newest segment can supersede others; the next writer deletes them
+        replaced = self._replaced(os.path.join(path, names[-1])) if names else set()
+        return [os.path.join(path, name) for name in names if name not in replaced]
+
+    def _replaced(self, segment):
+        try:
+            with open(os.path.join(segment, REPLACES_FILE)) as f:
+                return set(f.read().split())
+        except FileNotFoundError:
+            return set()
+
+    def _remove_replaced(self, segment):
+        path = os.path.dirname(segment)
+        for name in self._replaced(segment):
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(segment, REPLACES_FILE))
+
+    def _load_column(self, segment, column):
+        return np.load(os.path.join(segment, f'{column}.npy'), mmap_mode='r')
+
+    def last_timestamp(self, symbol, interval='1d'):
+        """Timestamp of the newest stored bar, or None if the symbol has no data."""
+        segments = self.segments(symbol, interval)
+        if not segments:
+            return None
+        timestamps = self._load_column(segments[-1], 'Timestamp')
+        return pd.Timestamp(int(timestamps[-1]), tz='UTC')
+
+    def _write_segment(self, symbol, interval, columns, number, replaces=()):
+        """
+        Write a segment and commit it with one rename. If it ``replaces`` older
+        segments they are deleted only after the commit.
+        """
+        path = self._symbol_dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        tmp = os.path.join(path, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(tmp)
+        for column in COLUMNS:
+            np.save(os.path.join(tmp, f'{column}.npy'), columns[column])
+        if replaces:
+            with open(os.path.join(tmp, REPLACES_FILE), 'w') as f:
+                f.write('\n'.join(os.path.basename(segment) for segment in replaces))
+        segment = os.path.join(path, f'seg-{number:08d}')
+        os.rename(tmp, segment)
+        if replaces:
+            self._remove_replaced(segment)
+        return segment
+
+    def _next_segment_number(self, segments):
+        if not segments:
+            return 1
+        return int(os.path.basename(segments[-1])[4:]) + 1
+
+    def append(self, symbol, frame, interval='1d'):
+        """
+        Append bars newer than the last stored bar. ``frame`` is indexed by a DatetimeIndex
+        and has Open/High/Low/Close/Volume columns. A bar with the same timestamp as the
+        last stored one replaces it when its values differ, so a partial bar for the
+        current session is corrected by the next sync. Returns the number of rows written.
+        """
+        if frame is None or frame.empty:
+            return 0
+        index = pd.DatetimeIndex(frame.index)
+        index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+        timestamps = index.asi8
+
+        with self._locked(symbol, interval):
+            segments = self.segments(symbol, interval)
+            last = self.last_timestamp(symbol, interval)
+            keep = timestamps >= last.value if last is not None else np.ones(len(timestamps), dtype=bool)
+            if not keep.any():
+                return 0
+            order = np.argsort(timestamps[keep], kind='stable')
+            timestamps = timestamps[keep][order]
+            # Keep the last row of each timestamp: later rows in the frame are fresher
+            unique = np.concatenate((np.diff(timestamps) > 0, [True]))
+
+            columns = {'Timestamp': timestamps[unique]}
+            for column in PRICE_COLUMNS:
+                columns[column] = frame[column].to_numpy(dtype=np.float64)[keep][order][unique]
+
+            replaced = None
+            if last is not None and columns['Timestamp'][0] == last.value:
+                stored = {column: self._load_column(segments[-1], column) for column in COLUMNS}
+                if all(stored[column][-1] == columns[column][0] for column in PRICE_COLUMNS):
+                    # Unchanged last bar: only write the newer ones
+                    columns = {column: values[1:] for column, values in columns.items()}
+                else:
+                    # Rewrite the last segment without its final bar, followed by the new bars
+                    replaced = segments[-1]
+            written = len(columns['Timestamp'])
+            if not written:
+                return 0
+
+            if replaced is not None:
+                columns = {column: np.concatenate((stored[column][:-1], columns[column])) for column in COLUMNS}
+            self._write_segment(symbol, interval, columns, self._next_segment_number(segments),
+                                replaces=[replaced] if replaced is not None else ())
+            return written
+
+    def read(self, symbol, start=None, end=None, interval='1d'):
+        """
+        Return ``{column: array}`` for bars with ``start <= Timestamp < end``.
+        Arrays are memory-mapped views when the range lies within one segment.
+        """
+        start_ns = _to_ns(start)
+        end_ns = _to_ns(end)
+
+        parts = []
+        for segment in self.segments(symbol, interval):
+            timestamps = self._load_column(segment, 'Timestamp')
+            lo = np.searchsorted(timestamps, start_ns, side='left') if start_ns is not None else 0
+            hi = np.searchsorted(timestamps, end_ns, side='left') if end_ns is not None else len(timestamps)
+            if lo < hi:
+                parts.append((segment, lo, hi))
+
+        if not parts:
+            return {column: np.empty(0, dtype=np.int64 if column == 'Timestamp' else np.float64)
+                    for column in COLUMNS}
+        if len(parts) == 1:
+            segment, lo, hi = parts[0]
+            return {column: self._load_column(segment, column)[lo:hi] for column in COLUMNS}
+        return {
+            column: np.concatenate([self._load_column(segment, column)[lo:hi] for segment, lo, hi in parts])
+            for column in COLUMNS
+        }
+
+    def read_frame(self, symbol, start=None, end=None, interval='1d'):
+        """Bars as a DataFrame indexed by UTC timestamp (copies the data)."""
+        columns = self.read(symbol, start, end, interval)
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(columns['Timestamp']), utc=True), name='Date')
+        return pd.DataFrame({column: np.asarray(columns[column]) for column in PRICE_COLUMNS}, index=index)
+
+    def compact(self, symbol, interval='1d'):
+        """Merge all of a symbol's segments into one. Returns the number of segments merged."""
+        if not self.segments(symbol, interval):
+            return 0
+        with self._locked(symbol, interval):
+            segments = self.segments(symbol, interval)
+            if len(segments) <= 1:
+                return len(segments)
+            columns = {
+                column: np.concatenate([self._load_column(segment, column) for segment in segments])
+                for column in COLUMNS
+            }
+            self._write_segment(symbol, interval, columns, self._next_segment_number(segments), replaces=segments)
+            return len(segments)
+
+
+def sync_symbol(store, symbol, interval='1d'):
+    """
+    Download only the bars missing from the store for ``symbol`` and append them.
+    Returns the number of rows appended.
+    """
+    last = store.last_timestamp(symbol, interval)
+    ticker = yf.Ticker(symbol)
+    if last is None:
+        data = ticker.history(period='max', interval=interval)
+    else:
+        data = ticker.history(start=last.tz_convert(None).date().isoformat(), interval=interval)
+    appended = store.append(symbol, data, interval)
+    logger.info(f"Appended {appended} {interval} bars for {symbol}")
+    return appended
+
+
+ohlcv_store = OHLCVStore(settings.OHLCV_STORE_DIR)
@@ -0,0 +1,142 @@
+# app/passwords.py
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashing jobs are already queued."""
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _checkpw(password, hashed_password):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_rounds(hashed_password):
+    """The bcrypt cost factor recorded in a hash (``$2b$<rounds>$...``)."""
+    return int(hashed_password.split('$')[2])
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a pool of worker processes so request threads don't burn their
+    worker's CPU for the duration of a hash.
+
+    ``workers`` bounds how many hashes run at once; at most ``max_pending`` jobs may
+    be queued or running, and a caller that can't get a slot within ``queue_timeout``
+    seconds gets PasswordHasherBusy. With ``workers=0`` bcrypt runs inline. The pool
+    uses the spawn start method (forking a threaded server is unsafe) and is created
+    on first use in each process.
+    """
+
+    def __init__(self, workers=None, rounds=None, max_pending=None, queue_timeout=None):
+        self._workers = workers
+        self._rounds = rounds
+        self._max_pending = max_pending
+        self._queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._counters = {'hashes': 0, 'checks': 0, 'rehashes': 0, 'rejected': 0}
+
+    @property
+    def workers(self):
+        return settings.PASSWORD_HASH_WORKERS if self._workers is None else self._workers
+
+    @property
+    def rounds(self):
+        return settings.BCRYPT_ROUNDS if self._rounds is None else self._rounds
+
+    def _ensure_pool(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                max_pending = self._max_pending or settings.PASSWORD_HASH_MAX_PENDING
+                self._slots = threading.BoundedSemaphore(max_pending)
+                self._executor = None
+                if self.workers:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+                self._pid = os.getpid()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _run(self, func, *args):
+        self._ensure_pool()
+        timeout = self._queue_timeout if self._queue_timeout is not None else settings.PASSWORD_HASH_QUEUE_TIMEOUT
+        if not self._slots.acquire(timeout=timeout):
+            self._count('rejected')
+            raise PasswordHasherBusy("Password hashing queue is full")
+        try:
+            if self._executor is None:
+                return func(*args)
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash ``password`` with the configured cost factor."""
+        self._count('hashes')
+        return self._run(_hashpw, password, self.rounds)
+
+    def check(self, password, hashed_password):
+        """Return True if ``password`` matches ``hashed_password``."""
+        self._count('checks')
+        return self._run(_checkpw, password, hashed_password)
+
+    def needs_rehash(self, hashed_password):
+        """True if the hash was made with a different cost factor than the configured one."""
+        return hash_rounds(hashed_password) != self.rounds
+
+    def rehash(self, password):
+        self._count('rehashes')
+        return self.hash(password)
+
+    def warm(self):
+        """Start the worker processes now rather than on the first login."""
+        self._ensure_pool()
+        if self._executor is not None:
+            for future in [self._executor.submit(hash_rounds, '$2b$04$') for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+            self._pid = None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters['workers'] = self.workers
+        counters['rounds'] = self.rounds
+        return counters
+
+
+password_hasher = PasswordHasher()
+
+
+def hash_password(password):
+    """Hash a password using bcrypt"""
+    return password_hasher.hash(password)
+
+
+def check_password(password, hashed_password):
+    """Check if password matches the hashed version"""
+    return password_hasher.check(password, hashed_password)
@@ -0,0 +1,273 @@
+# app/predictions.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from app.lazy import lazy_import
+from app.lru import LRUCache
+from app.mappings import company_mapping, forex_mapping, forex_pairs
+from app.market_data import BAR_FIELDS, get_latest_bar, get_latest_bars
+from app.model_registry import model_registry, STOCK_MODEL_FILE
+from app.sentiment import sentiment_scores
+
+logger = logging.getLogger(__name__)
+
+pd = lazy_import('pandas')
+
+STOCK_FEATURES = ['Close_Lagged', 'Sentiment_Score', 'Company']
+FOREX_FEATURES = ['Close', 'High', 'Low', 'Volume']
+
+
+class PredictionError(Exception):
+    """A prediction that could not be made. ``status`` is the matching HTTP status code."""
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def load_model(model_file):
+    """Return ``(model, version)`` from the registry, raising PredictionError if it cannot be loaded."""
+    try:
+        return model_registry.get(model_file), model_registry.version(model_file)
+    except Exception as e:
+        logger.error(f"Error loading model {model_file}: {e}")
+        raise PredictionError("Model loading failed.", status=503)
+
+
+def stock_features(company_symbol, close, sentiment):
+    return pd.DataFrame([[close, sentiment, company_symbol]], columns=STOCK_FEATURES)
+
+
+def forex_features(bar):
+    # The forex models were fitted without feature names
+    return pd.DataFrame([bar], columns=FOREX_FEATURES).to_numpy()
+
+
+def predict_one(model, features):
+    try:
+        return float(model.predict(features)[0])
+    except Exception as e:
+        logger.error(f"Error during prediction: {e}")
+        raise PredictionError("Prediction failed.")
+
+
+class PredictionCache:
+    """
+    In-process cache of model outputs, keyed by everything a prediction depends on:
+    the model file and version, the symbol, the feature bar and the sentiment score
+    fed to the model. The bar is identified by its timestamp and prices, because a
+    bar that is still forming keeps its timestamp while its prices move. A new bar,
+    a reloaded model or a changed sentiment score changes the key, so stale
+    predictions are never served; they age out of the LRU.
+    """
+
+    def __init__(self, maxsize=4096):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    @staticmethod
+    def key(model_file, model_version, symbol, bar, sentiment=None):
+        prices = tuple(bar.get(field) for field in BAR_FIELDS)
+        return model_file, model_version, symbol, bar['Timestamp'], prices, sentiment
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, prediction):
+        self._cache.set(key, prediction)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+prediction_cache = PredictionCache(maxsize=settings.PREDICTION_CACHE_SIZE)
+
+
+def get_current_sentiment(company):
+    """
+    Fetch sentiment score for a company (0 to 1, 0.5 is neutral).
+    Scores are computed offline by ``manage.py score_sentiment``; this is an
+    in-memory lookup of the latest SentimentCache snapshot.
+    """
+    return sentiment_scores.get(company)
+
+
+def score_stock(company_symbol, bar, model, model_version, sentiment=None):
+    """
+    Predict company ``company_symbol`` from ``bar``, through the prediction cache.
+    Returns ``(prediction, cache_hit)``. ``sentiment`` defaults to the current score.
+    """
+    company = company_mapping[company_symbol]
+    if sentiment is None:
+        sentiment = get_current_sentiment(company)
+    key = prediction_cache.key(STOCK_MODEL_FILE, model_version, company, bar, sentiment)
+    prediction = prediction_cache.get(key)
+    if prediction is not None:
+        return prediction, True
+    prediction = predict_one(model, stock_features(company_symbol, bar['Close'], sentiment))
+    prediction_cache.set(key, prediction)
+    return prediction, False
+
+
+def score_forex(model_file, symbol, bar, model, model_version):
+    """Predict ``symbol`` from ``bar`` with one forex model, through the prediction cache."""
+    key = prediction_cache.key(model_file, model_version, symbol, bar)
+    prediction = prediction_cache.get(key)
+    if prediction is not None:
+        return prediction, True
+    prediction = predict_one(model, forex_features(bar))
+    prediction_cache.set(key, prediction)
+    return prediction, False
+
+
+def predict_stocks(company_symbols):
+    """
+    Predict prices for several companies with one market-data fetch and one model.predict call.
+
+    ``company_symbols`` are keys of company_mapping. Returns ``(results, errors)`` where
+    ``results`` is a list of per-company dicts and ``errors`` maps ticker -> message.
+    Cached predictions are reused; only the rest go through model.predict.
+    Raises PredictionError if the stock model cannot be loaded.
+    """
+    model, model_version = load_model(STOCK_MODEL_FILE)
+
+    tickers = [company_mapping[company_symbol] for company_symbol in company_symbols]
+    bars = get_latest_bars(tickers)
+
+    results = []
+    misses = []
+    errors = {}
+    for company_symbol, ticker in zip(company_symbols, tickers):
+        bar = bars.get(ticker)
+        if bar is None:
+            errors[ticker] = "Failed to fetch stock data."
+            continue
+        sentiment = get_current_sentiment(ticker)
+        key = prediction_cache.key(STOCK_MODEL_FILE, model_version, ticker, bar, sentiment)
+        prediction = prediction_cache.get(key)
+        result = {
+            'company_symbol': company_symbol,
+            'company': ticker,
+            'close': bar['Close'],
+            'timestamp': bar['Timestamp'],
+            'prediction': prediction,
+            'model_version': model_version,
+            'cache_hit': prediction is not None,
+        }
+        results.append(result)
+        if prediction is None:
+            misses.append((result, key, [bar['Close'], sentiment, company_symbol]))
+
+    if misses:
+        features = pd.DataFrame([row for _, _, row in misses], columns=STOCK_FEATURES)
+        for (result, key, _), prediction in zip(misses, model.predict(features)):
+            result['prediction'] = float(prediction)
+            prediction_cache.set(key, result['prediction'])
+    return results, errors
+
+
+def predict_stock_price(company_symbol):
+    """
+    Predict one company (a company_mapping key). Returns a result dict as in
+    ``predict_stocks``; raises PredictionError.
+    """
+    company = company_mapping[company_symbol]
+    model, model_version = load_model(STOCK_MODEL_FILE)
+    bar = get_latest_bar(company)
+    if bar is None:
+        raise PredictionError("Failed to fetch stock data.", status=503)
+    prediction, cache_hit = score_stock(company_symbol, bar, model, model_version)
+    return {
+        'company_symbol': company_symbol,
+        'company': company,
+        'close': bar['Close'],
+        'timestamp': bar['Timestamp'],
+        'prediction': prediction,
+        'model_version': model_version,
+        'cache_hit': cache_hit,
+    }
+
+
+def predict_forex_price(forex_symbol):
+    """
+    Predict one forex model (a forex_mapping key, i.e. one side of a pair).
+    Returns a result dict; raises PredictionError.
+    """
+    details = forex_mapping[forex_symbol]
+    model, model_version = load_model(details['model_file'])
+    bar = get_latest_bar(details['symbol'])
+    if bar is None:
+        raise PredictionError("Failed to fetch forex data.", status=503)
+    prediction, cache_hit = score_forex(details['model_file'], details['symbol'], bar, model, model_version)
+    return {
+        'forex_symbol': forex_symbol,
+        'name': details['name'],
+        'symbol': details['symbol'],
+        'close': bar['Close'],
+        'timestamp': bar['Timestamp'],
+        'prediction': prediction,
+        'model_version': model_version,
+        'cache_hit': cache_hit,
+    }
+
+
+def _fetch_bars_concurrently(symbols):
+    """Fetch the latest bar for each symbol on a bounded thread pool."""
+    if not symbols:
+        return {}
+    workers = min(len(symbols), settings.MARKET_DATA_FETCH_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(symbols, executor.map(get_latest_bar, symbols)))
+
+
+def _predict_pair(name, bar):
+    """Score both sides of forex pair ``name`` on ``bar``; raises PredictionError."""
+    pair = forex_pairs[name]
+    if bar is None:
+        raise PredictionError("Failed to fetch forex data.", status=503)
+    ask_model, ask_version = load_model(pair['ASK'])
+    bid_model, bid_version = load_model(pair['BID'])
+    ask, ask_hit = score_forex(pair['ASK'], pair['symbol'], bar, ask_model, ask_version)
+    bid, bid_hit = score_forex(pair['BID'], pair['symbol'], bar, bid_model, bid_version)
+    return {
+        'pair': name,
+        'symbol': pair['symbol'],
+        'close': bar['Close'],
+        'timestamp': bar['Timestamp'],
+        'ask': ask,
+        'bid': bid,
+        'spread': ask - bid,
+        'model_version': {'ask': ask_version, 'bid': bid_version},
+        'cache_hit': ask_hit and bid_hit,
+    }
+
+
+def predict_forex_pair(name):
+    """Predict ASK and BID for one forex pair (a forex_pairs key); raises PredictionError."""
+    return _predict_pair(name, get_latest_bar(forex_pairs[name]['symbol']))
+
+
+def predict_forex_pairs(pair_names):
+    """
+    Predict ASK and BID prices for several forex pairs.
+
+    ``pair_names`` are keys of forex_pairs (e.g. ``'EUR/USD'``). Each distinct symbol is
+    fetched once, concurrently, and both of a pair's models score the same feature row.
+    Returns ``(results, errors)`` where ``errors`` maps pair name -> message.
+    """
+    symbols = list(dict.fromkeys(forex_pairs[name]['symbol'] for name in pair_names))
+    bars = _fetch_bars_concurrently(symbols)
+
+    results = []
+    errors = {}
+    for name in pair_names:
+        try:
+            results.append(_predict_pair(name, bars.get(forex_pairs[name]['symbol'])))
+        except PredictionError as e:
+            errors[name] = e.message
+    return results, errors
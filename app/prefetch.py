@@ -0,0 +1,98 @@
+# app/prefetch.py
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.mappings import company_mapping, forex_mapping
+from app.market_data import bar_ttl, market_data_cache
+
+logger = logging.getLogger(__name__)
+
+
+def prefetch_symbols():
+    """Every distinct yfinance symbol used by the stock and forex views."""
+    symbols = list(company_mapping.values()) + [pair['symbol'] for pair in forex_mapping.values()]
+    return list(dict.fromkeys(symbols))
+
+
+class Prefetcher:
+    """
+    Keeps the shared market-data cache warm for a set of symbols.
+
+    Each symbol is refreshed every ``interval`` seconds (with +/- ``jitter`` spread so
+    symbols don't synchronise), on a thread pool of ``workers`` threads. A symbol that
+    fails backs off exponentially up to ``max_backoff`` seconds. Bars are stored for
+    ``ttl_multiplier`` refresh intervals so a single missed refresh never empties the cache.
+    """
+
+    def __init__(self, symbols, interval=60, workers=4, jitter=0.1, max_backoff=900,
+                 ttl_multiplier=3, market_data=market_data_cache):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.workers = workers
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.ttl_multiplier = ttl_multiplier
+        self.market_data = market_data
+
+        now = time.monotonic()
+        # Stagger the first refresh of each symbol over a short window
+        self.next_run = {symbol: now + random.uniform(0, interval * jitter) for symbol in self.symbols}
+        self.failures = {symbol: 0 for symbol in self.symbols}
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _jittered(self, seconds):
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def refresh(self, symbol):
+        """Refresh one symbol and schedule its next run. Returns True on success."""
+        timeout = max(bar_ttl(), int(self.interval * self.ttl_multiplier))
+        try:
+            self.market_data.refresh(symbol, timeout=timeout)
+            ok = True
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {symbol}: {e}")
+            ok = False
+
+        with self._lock:
+            if ok:
+                self.failures[symbol] = 0
+                delay = self._jittered(self.interval)
+            else:
+                self.failures[symbol] += 1
+                delay = self._jittered(min(self.interval * 2 ** self.failures[symbol], self.max_backoff))
+            self.next_run[symbol] = time.monotonic() + delay
+            self._inflight.discard(symbol)
+        return ok
+
+    def due(self, now=None):
+        """Symbols whose refresh is due and not already running."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [symbol for symbol, at in self.next_run.items()
+                   if at <= now and symbol not in self._inflight]
+            self._inflight.update(due)
+        return due
+
+    def run_once(self, executor=None):
+        """Refresh every symbol that is due. Returns the number refreshed successfully."""
+        due = self.due()
+        if executor is None:
+            return sum(self.refresh(symbol) for symbol in due)
+        for symbol in due:
+            executor.submit(self.refresh, symbol)
+        return len(due)
+
+    def run_forever(self, tick=1.0):
+        logger.info(f"Prefetching {len(self.symbols)} symbols every {self.interval}s with {self.workers} workers")
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='prefetch') as executor:
+            while not self._stop.is_set():
+                self.run_once(executor)
+                self._stop.wait(tick)
+
+    def stop(self):
+        self._stop.set()
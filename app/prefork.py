@@ -0,0 +1,60 @@
+# app/prefork.py
+import gc
+import importlib
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily on the request path (see app.lazy); a pre-forking master
+# imports them once so every worker shares the pages.
+SHARED_MODULES = ('numpy', 'pandas', 'sklearn', 'joblib', 'yfinance', 'boto3', 'requests')
+
+
+def warm():
+    """
+    Load everything workers should share before the server forks: heavy libraries,
+    the URL conf (and with it every view module, mapping table and singleton), the
+    sentiment snapshot and, if MODEL_REGISTRY_WARM_ON_START is set, every model.
+    Then freeze the garbage
+    collector so collections in the workers don't write to the shared objects and
+    un-share their pages.
+    """
+    from django.urls import get_resolver
+
+    for name in SHARED_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Could not preload {name}: {e}")
+    get_resolver().url_patterns
+
+    from app.sentiment import sentiment_scores
+
+    sentiment_scores.refresh()
+
+    models = 0
+    if settings.MODEL_REGISTRY_WARM_ON_START:
+        from app.model_registry import model_registry
+
+        models = model_registry.warm()
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded {len(SHARED_MODULES)} libraries and {models} models before fork")
+    return models
+
+
+def reset_after_fork():
+    """
+    Drop state a forked worker must not share with its parent: pooled AWS
+    connections and database connections. Background writers, the news cache's
+    HTTP session and the password hashing pool notice the new pid and rebuild
+    themselves on first use.
+    """
+    from django.db import connections
+
+    from app import aws
+
+    aws.reset_clients()
+    connections.close_all()
@@ -0,0 +1,176 @@
+# app/ratelimit.py
+import math
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Parse ``'<limit>/<period>'`` (e.g. ``'5/h'``, ``'100/10m'``) into ``(limit, seconds)``."""
+    if isinstance(rate, (tuple, list)):
+        return int(rate[0]), int(rate[1])
+    limit, period = rate.split('/')
+    multiplier = period[:-1] or '1'
+    return int(limit), int(multiplier) * _PERIODS[period[-1]]
+
+
+def client_identity(request):
+    """Who a request counts against: the API token or DynamoDB session user, else the client address."""
+    if getattr(request, 'api_user', None):
+        return f"user:{request.api_user}"
+    user = request.session.get('user') if hasattr(request, 'session') else None
+    if user and user.get('is_authenticated') and user.get('username'):
+        return f"user:{user['username']}"
+    return f"ip:{request.META.get('REMOTE_ADDR', 'unknown')}"
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window counter rate limiter on the Django cache.
+
+    Each (scope, identity) pair keeps one counter per fixed window. A request
+    atomically increments the current window's counter and estimates the
+    sliding-window count as ``current + previous * (1 - elapsed fraction)``, so a
+    check costs one ``incr`` and one ``get`` regardless of traffic. Rejected
+    requests give their increment back so they don't extend the lockout. With a
+    shared cache backend (Redis, Memcached) the quota holds across workers.
+    """
+
+    def __init__(self, cache=cache, key_prefix='ratelimit'):
+        self.cache = cache
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._counters = {'allowed': 0, 'limited': 0}
+
+    def _key(self, scope, identity, window):
+        return f'{self.key_prefix}:{scope}:{identity}:{window}'
+
+    def _incr(self, key, timeout):
+        # add() is a no-op when the counter exists; retry once if it expired in between
+        for _ in range(2):
+            self.cache.add(key, 0, timeout=timeout)
+            try:
+                return self.cache.incr(key)
+            except ValueError:
+                continue
+        raise RuntimeError(f'Rate limit counter {key} expired repeatedly')
+
+    def hit(self, scope, identity, limit, period, now=None):
+        """
+        Count one request. Returns ``(allowed, remaining, retry_after)`` where
+        ``retry_after`` is the number of seconds until a request would be admitted
+        (0 when allowed).
+        """
+        now = time.time() if now is None else now
+        window = int(now // period)
+        elapsed = (now - window * period) / period
+        key = self._key(scope, identity, window)
+
+        current = self._incr(key, timeout=2 * period)
+        previous = self.cache.get(self._key(scope, identity, window - 1), 0)
+        weight = previous * (1 - elapsed)
+        if current + weight <= limit:
+            self._count('allowed')
+            return True, max(0, int(limit - current - weight)), 0
+
+        self.cache.decr(key)
+        self._count('limited')
+        return False, 0, self._retry_after(limit, period, current - 1, previous, elapsed)
+
+    @staticmethod
+    def _retry_after(limit, period, current, previous, elapsed):
+        """Seconds until ``current + 1 + previous * (1 - fraction) <= limit``."""
+        if current < limit and previous:
+            # Admitted later in this window, once enough of the previous window slides out
+            fraction = 1 - (limit - current - 1) / previous
+            wait = (fraction - elapsed) * period
+        else:
+            # This window's requests become the weighted "previous" window
+            fraction = max(0.0, 1 - (limit - 1) / current) if current else 0.0
+            wait = (1 - elapsed + fraction) * period
+        return max(1, math.ceil(wait))
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+limiter = SlidingWindowLimiter()
+
+
+def get_rate(scope, identity):
+    """
+    Quota for ``identity`` on ``scope``. Per-user overrides in RATE_LIMIT_USER_QUOTAS
+    win over per-endpoint RATE_LIMITS, which win over RATE_LIMITS['default'].
+    """
+    if identity.startswith('user:'):
+        override = settings.RATE_LIMIT_USER_QUOTAS.get(identity[len('user:'):])
+        if isinstance(override, dict):
+            override = override.get(scope, override.get('default'))
+        if override:
+            return parse_rate(override)
+    rates = settings.RATE_LIMITS
+    return parse_rate(rates.get(scope, rates['default']))
+
+
+def check_rate_limit(request, scope):
+    """Return a 429 response if ``request`` is over its quota for ``scope``, else None."""
+    identity = client_identity(request)
+    limit, period = get_rate(scope, identity)
+    allowed, remaining, retry_after = limiter.hit(scope, identity, limit, period)
+    request.rate_limit = {'limit': limit, 'remaining': remaining}
+    if allowed:
+        return None
+    response = JsonResponse({"error": "Rate limit exceeded", "retry_after": retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    _add_headers(request, response)
+    return response
+
+
+def _add_headers(request, response):
+    info = getattr(request, 'rate_limit', None)
+    if info is not None:
+        response['X-RateLimit-Limit'] = str(info['limit'])
+        response['X-RateLimit-Remaining'] = str(info['remaining'])
+    return response
+
+
+def rate_limit(view_func=None, scope=None):
+    """
+    Limit a view to its configured quota per session user (or client address).
+    Use bare (``@rate_limit``, scoped to the view's name) or as
+    ``@rate_limit(scope='predict')`` to share one quota between views.
+    """
+    if view_func is None:
+        return lambda func: rate_limit(func, scope=scope)
+    scope = scope or view_func.__name__
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapped_view(request, *args, **kwargs):
+            response = await sync_to_async(check_rate_limit)(request, scope)
+            if response is not None:
+                return response
+            return _add_headers(request, await view_func(request, *args, **kwargs))
+
+        return markcoroutinefunction(async_wrapped_view)
+
+    @wraps(view_func)
+    def wrapped_view(request, *args, **kwargs):
+        response = check_rate_limit(request, scope)
+        if response is not None:
+            return response
+        return _add_headers(request, view_func(request, *args, **kwargs))
+
+    return wrapped_view
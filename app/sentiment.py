@@ -0,0 +1,203 @@
+# app/sentiment.py
+import logging
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+
+from app.aws import get_table
+from app.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+NEUTRAL_SENTIMENT = 0.5
+VADER_LEXICON = 'sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt'
+VADER_ALPHA = 15  # VADER's normalisation constant for compound scores
+TOKEN_PATTERN = r"[a-z][a-z'-]*"
+
+
+def load_lexicon():
+    """
+    Load NLTK's VADER lexicon as a Series of token -> valence. Raises LookupError if
+    the data is not installed (``python -m nltk.downloader vader_lexicon``).
+    """
+    import nltk
+
+    text = nltk.data.load(VADER_LEXICON, format='text')
+    tokens, valences = [], []
+    for line in text.splitlines():
+        fields = line.strip().split('\t')
+        if len(fields) >= 2:
+            tokens.append(fields[0])
+            valences.append(float(fields[1]))
+    return pd.Series(valences, index=tokens, dtype=np.float64)
+
+
+def article_text(article):
+    return ' '.join(filter(None, (article.get('title'), article.get('description'))))
+
+
+def score_texts(texts, lexicon):
+    """
+    Compound lexicon score in [-1, 1] for each text, computed for the whole batch at
+    once: tokens are valence-summed per text and normalised as in VADER. Negation and
+    intensifier rules are not applied.
+    """
+    texts = pd.Series(list(texts), dtype=object).fillna('')
+    tokens = texts.str.lower().str.findall(TOKEN_PATTERN).explode()
+    valence = tokens.map(lexicon).fillna(0.0)
+    totals = valence.groupby(level=0).sum().reindex(texts.index, fill_value=0.0).to_numpy(dtype=np.float64)
+    return totals / np.sqrt(totals * totals + VADER_ALPHA)
+
+
+def score_companies(articles_by_company, lexicon):
+    """
+    Score every company's articles in one vectorized pass. Returns a DataFrame indexed
+    by company with ``score`` (mean compound mapped to [0, 1], 0.5 is neutral) and
+    ``article_count``. Companies without articles score neutral.
+    """
+    rows = [(company, article_text(article))
+            for company, articles in articles_by_company.items() for article in articles]
+    frame = pd.DataFrame(rows, columns=['company', 'text'])
+    frame['compound'] = score_texts(frame['text'], lexicon)
+    scores = frame.groupby('company')['compound'].agg(['mean', 'size'])
+    scores = scores.reindex(list(articles_by_company))
+    return pd.DataFrame({
+        'score': ((scores['mean'] + 1) / 2).fillna(NEUTRAL_SENTIMENT),
+        'article_count': scores['size'].fillna(0).astype(int),
+    })
+
+
+class SentimentEngine:
+    """
+    Offline scorer: reads every company's cached articles from ``NewsCache``, scores
+    them with a local lexicon and writes one score per company to ``SentimentCache``.
+    """
+
+    def __init__(self, lexicon=None, news_table='NewsCache', sentiment_table='SentimentCache'):
+        self._lexicon = lexicon
+        self.news_table = news_table
+        self.sentiment_table = sentiment_table
+
+    @property
+    def lexicon(self):
+        if self._lexicon is None:
+            self._lexicon = load_lexicon()
+        return self._lexicon
+
+    def load_news(self):
+        """Return ``{company: articles}`` for every item in the news cache."""
+        table = get_table(self.news_table)
+        kwargs = {'ProjectionExpression': 'Company, Articles'}
+        articles_by_company = {}
+        while True:
+            response = table.scan(**kwargs)
+            for item in response.get('Items', []):
+                articles_by_company[item['Company']] = item.get('Articles', [])
+            if 'LastEvaluatedKey' not in response:
+                return articles_by_company
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def run(self):
+        """Score all cached news and store the results. Returns the number of companies scored."""
+        scores = score_companies(self.load_news(), self.lexicon)
+        timestamp = datetime.now().isoformat()
+        with get_table(self.sentiment_table).batch_writer() as writer:
+            for company, row in scores.iterrows():
+                writer.put_item(Item={
+                    'Company': company,
+                    'Score': Decimal(str(round(float(row['score']), 4))),
+                    'ArticleCount': int(row['article_count']),
+                    'Timestamp': timestamp,
+                })
+        logger.info(f"Scored sentiment for {len(scores)} companies")
+        return len(scores)
+
+
+class SentimentScores:
+    """
+    Per-process snapshot of ``SentimentCache`` for request handlers.
+
+    ``get`` is a dict lookup. The first lookup in a process loads the snapshot
+    (``prefork.warm`` does this before gunicorn forks, so workers inherit it). After
+    that, a lookup that finds the snapshot older than ``refresh_interval`` seconds
+    starts one background Scan and keeps serving the previous snapshot until it
+    completes. Unknown companies score neutral.
+    """
+
+    def __init__(self, table_name='SentimentCache', refresh_interval=300):
+        self.table_name = table_name
+        self.refresh_interval = refresh_interval
+        self._scores = {}
+        self._version = None
+        self._loaded_at = None
+        self._refresh_lock = threading.Lock()
+        self.reloads = 0
+        self.errors = 0
+
+    def _stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def refresh(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            scores, version = {}, None
+            table = get_table(self.table_name)
+            kwargs = {'ProjectionExpression': 'Company, Score, #ts',
+                      'ExpressionAttributeNames': {'#ts': 'Timestamp'}}
+            while True:
+                response = table.scan(**kwargs)
+                for item in response.get('Items', []):
+                    scores[item['Company']] = float(item['Score'])
+                    version = max(version or '', item.get('Timestamp', ''))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            self._scores, self._version = scores, version
+            self.reloads += 1
+            return True
+        except (ClientError, BotoCoreError) as e:
+            self.errors += 1
+            logger.error(f"Error loading sentiment scores: {e}")
+            return False
+        finally:
+            # Failed loads also wait out the interval rather than retrying on every request
+            self._loaded_at = time.monotonic()
+            self._refresh_lock.release()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            self.refresh()
+        elif self._stale() and not self._refresh_lock.locked():
+            # refresh() takes the lock without blocking, so extra threads exit at once
+            threading.Thread(target=self.refresh, name='sentiment-refresh', daemon=True).start()
+
+    def get(self, company, default=NEUTRAL_SENTIMENT):
+        self._ensure_loaded()
+        return self._scores.get(company, default)
+
+    def version(self):
+        """Timestamp of the newest scoring run in the snapshot, or None."""
+        self._ensure_loaded()
+        return self._version
+
+    def clear(self):
+        self._scores, self._version, self._loaded_at = {}, None, None
+
+    def stats(self):
+        return {
+            'companies': len(self._scores),
+            'version': self._version,
+            'reloads': self.reloads,
+            'errors': self.errors,
+        }
+
+
+sentiment_scores = SentimentScores(refresh_interval=settings.SENTIMENT_REFRESH_INTERVAL)
@@ -1,13 +1,58 @@
-from django.test import TestCase, Client
+import collections
+import contextlib
+import fcntl
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import bcrypt
+import boto3
+import botocore.client
+import joblib
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, Client, TestCase, override_settings
 from django.urls import reverse
 from moto import mock_aws
-import boto3
+
+from app import async_views, aws, prefork
+from app.activity_feed import ActivityFeed
+from app.api import issue_token
+from app.audit_log import BufferedTableWriter, activity_log, prediction_log
+from app.backtest import run_backtest
+from app.dynamodb_session_backend import SessionStore, _near_cache
+from app.lazy import lazy_import
+from app.market_data import MarketDataCache, get_latest_bar
+from app.model_registry import ModelRegistry
+from app.news import NewsCache
+from app.ohlcv_store import OHLCVStore
+from app.passwords import PasswordHasher, PasswordHasherBusy, hash_rounds
+from app.predictions import PredictionCache, prediction_cache, predict_stocks, score_stock
+from app.prefetch import Prefetcher
+from app.ratelimit import SlidingWindowLimiter
+from app.sentiment import SentimentEngine, SentimentScores, score_texts
+from app.training import promote, train_all
+from app.users import DeferredUserUpdates, user_updates
 from app.views import create_dynamodb_user, get_dynamodb_user
-import time  # Import time module
+
 
 @mock_aws
 class BaseTestCase(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
 
@@ -40,6 +85,12 @@ class BaseTestCase(TestCase):
         # Create a test user in DynamoDB
         create_dynamodb_user('testuser', 'testuser@example.com', 'testpass123')
 
+    def tearDown(self):
+        # Drain background audit writes while the AWS mock is still active
+        activity_log.flush()
+        prediction_log.flush()
+        user_updates.flush()
+
 
 @mock_aws
 class BasicViewTests(BaseTestCase):
@@ -127,4 +178,1184 @@ class RegistrationTests(BaseTestCase):
 
         # Verify user was not created in DynamoDB
         user = get_dynamodb_user('newuser')
-        self.assertIsNone(user)
\ No newline at end of file
+        self.assertIsNone(user)
+
+@mock_aws
+class ModelRegistryTests(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.local_dir = tempfile.mkdtemp()
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket='test-models')
+        self._upload('model.joblib', {'version': 1})
+
+    def _upload(self, model_file, obj):
+        buffer = io.BytesIO()
+        joblib.dump(obj, buffer)
+        self.s3.put_object(Bucket='test-models', Key=f'models/{model_file}', Body=buffer.getvalue())
+
+    def _registry(self, check_interval=300):
+        return ModelRegistry('test-models', cache_dir=self.cache_dir, local_dir=self.local_dir,
+                             check_interval=check_interval)
+
+    def test_model_loaded_once_and_served_from_memory(self):
+        registry = self._registry()
+        self.assertEqual(registry.get('model.joblib'), {'version': 1})
+        self.assertEqual(registry.get('model.joblib'), {'version': 1})
+
+        stats = registry.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['loads'], 1)
+        self.assertEqual(stats['etag_checks'], 0)
+        self.assertEqual(stats['models']['model.joblib']['source'], 's3')
+
+    def test_changed_etag_triggers_reload(self):
+        registry = self._registry(check_interval=0.01)
+        registry.get('model.joblib')
+        old_version = registry.version('model.joblib')
+
+        self._upload('model.joblib', {'version': 2})
+        time.sleep(0.02)
+        self.assertEqual(registry.get('model.joblib'), {'version': 1})  # Served while the check runs
+        registry._revalidations['model.joblib'].join()
+        self.assertEqual(registry.get('model.joblib'), {'version': 2})
+        self.assertNotEqual(registry.version('model.joblib'), old_version)
+        self.assertEqual(registry.stats()['reloads'], 1)
+
+    def test_revalidation_runs_off_the_request_thread_once_per_model(self):
+        registry = self._registry(check_interval=0.01)
+        registry.get('model.joblib')
+        time.sleep(0.02)
+
+        release = threading.Event()
+        revalidate = registry._revalidate
+        with mock.patch.object(registry, '_revalidate',
+                               side_effect=lambda *args: release.wait(5) and revalidate(*args)) as check:
+            for _ in range(5):
+                self.assertEqual(registry.get('model.joblib'), {'version': 1})
+            release.set()
+            registry._revalidations['model.joblib'].join()
+        self.assertEqual(check.call_count, 1)
+        self.assertEqual(registry.stats()['etag_checks'], 1)
+
+    def test_falls_back_to_local_copy(self):
+        joblib.dump({'version': 'local'}, os.path.join(self.local_dir, 'missing.joblib'))
+        registry = self._registry()
+        self.assertEqual(registry.get('missing.joblib'), {'version': 'local'})
+        self.assertEqual(registry.stats()['models']['missing.joblib']['source'], 'local')
+
+
+def make_history(close=1.1, high=1.2, low=1.0, volume=0.0, index=None):
+    """Build a one-row frame shaped like yfinance's Ticker.history output."""
+    return pd.DataFrame(
+        {'Open': [close], 'High': [high], 'Low': [low], 'Close': [close], 'Volume': [volume]},
+        index=pd.DatetimeIndex(index or ['2025-04-08 00:00:00+00:00']),
+    )
+
+
+@mock_aws
+class BufferedTableWriterTests(BaseTestCase):
+    def test_login_activity_written_in_background(self):
+        self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass123'})
+        self.assertTrue(activity_log.flush())
+        items = self.dynamodb.Table('UserActivities').query(
+            KeyConditionExpression='UserId = :uid',
+            ExpressionAttributeValues={':uid': 'testuser'},
+        )['Items']
+        self.assertEqual([item['Activity'] for item in items], ['Login'])
+
+    def test_batches_writes_and_counts_drops(self):
+        writer = BufferedTableWriter('UserActivities', maxsize=30, flush_interval=5)
+        self.addCleanup(writer.close)
+        with mock.patch.object(writer, 'write_batch', wraps=writer.write_batch) as write_batch:
+            with mock.patch.object(writer, '_ensure_thread'):  # Keep the flusher stopped while filling
+                logged = [writer.log({'UserId': 'bulk', 'Timestamp': f'{i:04d}', 'Activity': 'Test'})
+                          for i in range(31)]
+            self.assertEqual(logged.count(False), 1)
+            writer._ensure_thread()
+            self.assertTrue(writer.flush())
+
+        self.assertEqual([len(call.args[0]) for call in write_batch.call_args_list], [25, 5])
+        stats = writer.stats()
+        self.assertEqual((stats['written'], stats['dropped'], stats['queue_depth']), (30, 1, 0))
+
+    def _throttled(self):
+        return ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'BatchWriteItem')
+
+    def test_throttled_batch_retried_then_spilled_and_replayed(self):
+        spill_path = os.path.join(tempfile.mkdtemp(), 'spill.jsonl')
+        writer = BufferedTableWriter('UserActivities', spill_path=spill_path, max_retries=2, retry_backoff=0)
+        items = [{'UserId': 'spill', 'Timestamp': f'{i:04d}', 'Activity': 'Test'} for i in range(3)]
+
+        with mock.patch.object(writer, '_put_batch', side_effect=self._throttled()) as put_batch:
+            self.assertFalse(writer.write_batch(items))
+        self.assertEqual(put_batch.call_count, 3)
+        stats = writer.stats()
+        self.assertEqual((stats['retries'], stats['spilled'], stats['failed']), (2, 3, 0))
+        self.assertGreater(stats['spill_bytes'], 0)
+
+        writer._throttled_until = 0
+        self.assertEqual(writer.replay_spill(), 3)
+        self.assertFalse(os.path.exists(spill_path))
+        stored = self.dynamodb.Table('UserActivities').query(
+            KeyConditionExpression='UserId = :uid',
+            ExpressionAttributeValues={':uid': 'spill'},
+        )['Items']
+        self.assertEqual(len(stored), 3)
+        self.assertEqual(writer.stats()['replayed'], 3)
+
+    def test_full_queue_blocks_briefly_then_spills(self):
+        spill_path = os.path.join(tempfile.mkdtemp(), 'spill.jsonl')
+        writer = BufferedTableWriter('UserActivities', maxsize=1, block_timeout=0.01, spill_path=spill_path)
+        with mock.patch.object(writer, '_ensure_thread'):
+            self.assertTrue(writer.log({'UserId': 'a', 'Timestamp': '1'}))
+            self.assertTrue(writer.log({'UserId': 'a', 'Timestamp': '2'}))
+        stats = writer.stats()
+        self.assertEqual((stats['enqueued'], stats['spilled'], stats['dropped']), (1, 1, 0))
+
+    def test_replay_without_spill_file_takes_no_lock(self):
+        spill_dir = os.path.join(tempfile.mkdtemp(), 'spill')
+        writer = BufferedTableWriter('UserActivities', spill_path=os.path.join(spill_dir, 'spill.jsonl'))
+        with mock.patch.object(writer, '_locked_spill') as locked_spill:
+            self.assertEqual(writer.replay_spill(), 0)
+        locked_spill.assert_not_called()
+        self.assertFalse(os.path.exists(spill_dir))
+
+    def test_spill_waits_for_another_workers_file_lock(self):
+        spill_path = os.path.join(tempfile.mkdtemp(), 'spill.jsonl')
+        writer = BufferedTableWriter('UserActivities', spill_path=spill_path)
+        replayer = BufferedTableWriter('UserActivities', spill_path=spill_path)
+        writer.spill([{'UserId': 'a', 'Timestamp': '1'}])
+
+        # Another worker holds the spill lock while it claims the file
+        with open(f'{spill_path}.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            spilling = threading.Thread(target=writer.spill, args=([{'UserId': 'a', 'Timestamp': '2'}],))
+            spilling.start()
+            spilling.join(0.2)
+            self.assertTrue(spilling.is_alive())
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        spilling.join()
+
+        with mock.patch.object(replayer, 'write_batch', return_value=True) as write_batch:
+            self.assertEqual(replayer.replay_spill(), 2)
+        self.assertEqual([item['Timestamp'] for item in write_batch.call_args.args[0]], ['1', '2'])
+        self.assertFalse(os.path.exists(spill_path))
+
+
+class MarketDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_latest_bar_single_fetch(self, ticker):
+        ticker.return_value.history.return_value = make_history(close=1.1, high=1.2, low=1.0, volume=10)
+        bar = get_latest_bar('EURUSD=X')
+        self.assertEqual(ticker.return_value.history.call_count, 1)
+        self.assertEqual(bar['Close'], 1.1)
+        self.assertEqual(bar['High'], 1.2)
+        self.assertEqual(bar['Low'], 1.0)
+        self.assertEqual(bar['Volume'], 10)
+        self.assertEqual(bar['Timestamp'], '2025-04-08T00:00:00+00:00')
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_latest_bar_empty_history(self, ticker):
+        ticker.return_value.history.return_value = pd.DataFrame()
+        self.assertIsNone(get_latest_bar('EURUSD=X'))
+
+    def test_cached_bar_served_without_upstream_call(self):
+        fetcher = mock.Mock(return_value={'Close': 1.0, 'Timestamp': '2025-04-08T00:00:00'})
+        market_data = MarketDataCache(fetcher=fetcher)
+        market_data.get('RELIANCE.NS')
+        market_data.get('RELIANCE.NS')
+        self.assertEqual(fetcher.call_count, 1)
+        stats = market_data.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_concurrent_misses_coalesced(self):
+        release = threading.Event()
+
+        def slow_fetch(symbol, interval):
+            release.wait(5)
+            return {'Close': 1.0, 'Timestamp': '2025-04-08T00:00:00'}
+
+        fetcher = mock.Mock(side_effect=slow_fetch)
+        market_data = MarketDataCache(fetcher=fetcher)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(market_data.get('EURUSD=X')))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while market_data.stats()['coalesced_waiters'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(fetcher.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(bar['Close'] == 1.0 for bar in results))
+
+
+class PrefetcherTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_refresh_warms_cache_and_backs_off_failures(self):
+        def fetch(symbol, interval):
+            if symbol == 'BAD.NS':
+                raise ValueError("No data found")
+            return {'Close': 1.0, 'Timestamp': '2025-04-08T00:00:00'}
+
+        market_data = MarketDataCache(fetcher=fetch)
+        prefetcher = Prefetcher(['TCS.NS', 'BAD.NS'], interval=60, jitter=0, market_data=market_data)
+        prefetcher.next_run = dict.fromkeys(prefetcher.symbols, 0)
+
+        self.assertEqual(prefetcher.run_once(), 1)
+        self.assertEqual(prefetcher.failures, {'TCS.NS': 0, 'BAD.NS': 1})
+        self.assertEqual(prefetcher.due(), [])
+        self.assertAlmostEqual(prefetcher.next_run['BAD.NS'] - time.monotonic(), 120, delta=1)
+
+        with override_settings(MARKET_DATA_PREFETCHED=True), \
+                mock.patch('app.market_data.cache_is_shared', return_value=True):
+            self.assertEqual(market_data.get('TCS.NS')['Close'], 1.0)
+            self.assertIsNone(market_data.get('BAD.NS'))
+        self.assertEqual(market_data.stats()['cold_misses'], 1)
+
+    @override_settings(MARKET_DATA_PREFETCHED=True)
+    def test_prefetched_mode_fetches_with_a_process_local_cache(self):
+        market_data = MarketDataCache(fetcher=lambda symbol, interval: {'Close': 2.0})
+        self.assertEqual(market_data.get('TCS.NS')['Close'], 2.0)
+        self.assertEqual(market_data.stats()['cold_misses'], 0)
+
+    def test_command_refuses_a_process_local_cache(self):
+        with self.assertRaisesMessage(CommandError, 'local to this process'):
+            call_command('prefetch_market_data', '--once')
+
+class OHLCVStoreTests(TestCase):
+    def setUp(self):
+        self.store = OHLCVStore(tempfile.mkdtemp())
+
+    def _bars(self, start, periods):
+        index = pd.date_range(start, periods=periods, freq='D', tz='UTC')
+        values = np.arange(periods, dtype=float) + index.day.to_numpy()
+        return pd.DataFrame({'Open': values, 'High': values + 1, 'Low': values - 1,
+                             'Close': values, 'Volume': values * 10}, index=index)
+
+    def test_append_only_writes_missing_bars(self):
+        self.assertEqual(self.store.append('TCS.NS', self._bars('2025-01-01', 5)), 5)
+        self.assertEqual(self.store.append('TCS.NS', self._bars('2025-01-06', 3)), 3)
+        self.assertEqual(self.store.append('TCS.NS', self._bars('2025-01-01', 3)), 0)
+        self.assertEqual(self.store.append('TCS.NS', self._bars('2025-01-06', 3)), 0)
+        self.assertEqual(len(self.store.segments('TCS.NS')), 2)
+        self.assertEqual(self.store.last_timestamp('TCS.NS'), pd.Timestamp('2025-01-08', tz='UTC'))
+
+    def test_append_replaces_an_updated_last_bar(self):
+        self.store.append('TCS.NS', self._bars('2025-01-01', 5))
+        self.store.append('TCS.NS', self._bars('2025-01-06', 2))
+        final = self._bars('2025-01-07', 2)
+        final.iloc[0] = [50.0, 55.0, 45.0, 52.0, 999.0]  # The partial 2025-01-07 bar, now settled
+
+        self.assertEqual(self.store.append('TCS.NS', final), 2)
+        frame = self.store.read_frame('TCS.NS')
+        self.assertEqual(len(frame), 8)
+        self.assertTrue(frame.index.is_unique and frame.index.is_monotonic_increasing)
+        self.assertEqual(frame.loc['2025-01-07', 'Close'], 52.0)
+        self.assertEqual(frame.loc['2025-01-07', 'Volume'], 999.0)
+        self.assertEqual(len(self.store.segments('TCS.NS')), 2)
+
+    def test_range_read_within_segment_is_zero_copy(self):
+        self.store.append('TCS.NS', self._bars('2025-01-01', 10))
+        columns = self.store.read('TCS.NS', start='2025-01-03', end='2025-01-06')
+        self.assertEqual(len(columns['Close']), 3)
+        self.assertIsInstance(columns['Close'].base, np.memmap)
+
+    def test_compact_merges_segments(self):
+        self.store.append('TCS.NS', self._bars('2025-01-01', 5))
+        self.store.append('TCS.NS', self._bars('2025-01-06', 5))
+        before = self.store.read_frame('TCS.NS')
+
+        self.assertEqual(self.store.compact('TCS.NS'), 2)
+        self.assertEqual(len(self.store.segments('TCS.NS')), 1)
+        pd.testing.assert_frame_equal(self.store.read_frame('TCS.NS'), before)
+
+    def test_interrupted_replace_never_duplicates_a_bar(self):
+        self.store.append('TCS.NS', self._bars('2025-01-01', 5))
+        final = self._bars('2025-01-05', 2)
+        final.iloc[0, 3] = 42.0
+
+        # Crash after the new segment is committed but before the old one is deleted
+        with mock.patch.object(self.store, '_remove_replaced'):
+            self.store.append('TCS.NS', final)
+        self.assertEqual(len(os.listdir(os.path.dirname(self.store.segments('TCS.NS')[0]))), 3)
+        frame = self.store.read_frame('TCS.NS')
+        self.assertEqual(len(frame), 6)
+        self.assertEqual(frame.loc['2025-01-05', 'Close'], 42.0)
+
+        # The next writer finishes the cleanup
+        self.assertEqual(self.store.append('TCS.NS', self._bars('2025-01-07', 1)), 1)
+        segments = self.store.segments('TCS.NS')
+        self.assertEqual(sorted(os.listdir(os.path.dirname(segments[0]))), ['.lock', 'seg-00000002', 'seg-00000003'])
+        self.assertEqual(len(self.store.read_frame('TCS.NS')), 7)
+
+    def test_append_waits_for_another_process_file_lock(self):
+        self.store.append('TCS.NS', self._bars('2025-01-01', 5))
+        lock_path = os.path.join(os.path.dirname(self.store.segments('TCS.NS')[0]), '.lock')
+
+        # Another process (sync_ohlcv) holds the symbol's lock
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            appending = threading.Thread(target=self.store.append, args=('TCS.NS', self._bars('2025-01-06', 2)))
+            appending.start()
+            appending.join(0.2)
+            self.assertTrue(appending.is_alive())
+            self.assertEqual(len(self.store.read_frame('TCS.NS')), 5)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        appending.join()
+        self.assertEqual(len(self.store.read_frame('TCS.NS')), 7)
+
+
+@mock_aws
+class PredictionViewTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        session = self.client.session
+        session['user'] = {'username': 'testuser', 'is_authenticated': True}
+        session.save()
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_predict_forex_fetches_market_data_once(self, ticker):
+        ticker.return_value.history.return_value = make_history()
+        response = self.client.post(reverse('predict_forex'), {'forex_symbol': '2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('prediction', response.context)
+        self.assertEqual(ticker.return_value.history.call_count, 1)
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_prediction_logged_under_session_user(self, ticker):
+        ticker.return_value.history.return_value = make_history()
+        with mock.patch.object(prediction_log, 'log') as log:
+            self.client.post(reverse('predict_forex'), {'forex_symbol': '2'})
+        self.assertEqual(log.call_args.args[0]['UserId'], 'testuser')
+
+    @mock.patch('app.market_data.yf.download')
+    def test_predict_stock_batch_single_download(self, download):
+        download.return_value = pd.concat(
+            {'ADANIPORTS.NS': make_history(close=1200.0), 'APOLLOHOSP.NS': make_history(close=float('nan'))},
+            axis=1,
+        )
+        response = self.client.post(reverse('predict_stock_batch'), {'company_symbols': '0,1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(download.call_count, 1)
+
+        body = response.json()
+        self.assertEqual([result['company'] for result in body['results']], ['ADANIPORTS.NS'])
+        self.assertIn('APOLLOHOSP.NS', body['errors'])
+
+    def test_predict_stock_batch_rejects_unknown_symbols(self):
+        response = self.client.post(reverse('predict_stock_batch'), {'company_symbols': '0,999'})
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_predict_forex_batch_shares_bar_between_ask_and_bid(self, ticker):
+        ticker.return_value.history.return_value = make_history()
+        response = self.client.post(reverse('predict_forex_batch'), {'pairs': 'EUR/USD,GBP/USD'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ticker.return_value.history.call_count, 2)
+
+        results = response.json()['results']
+        self.assertEqual([result['pair'] for result in results], ['EUR/USD', 'GBP/USD'])
+        for result in results:
+            self.assertAlmostEqual(result['spread'], result['ask'] - result['bid'])
+
+
+@mock_aws
+class AsyncViewTests(BaseTestCase):
+    def _request(self, method, path, data=None, authenticated=True):
+        request = getattr(AsyncRequestFactory(), method)(path, data or {})
+        request.session = self.client.session
+        if authenticated:
+            request.session['user'] = {'username': 'testuser', 'is_authenticated': True}
+
+        request.user = AnonymousUser()
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        return request
+
+    def test_async_dashboard_requires_login(self):
+        response = async_to_sync(async_views.dashboard)(self._request('get', '/dashboard/', authenticated=False))
+        self.assertEqual(response.status_code, 302)
+
+    def test_async_dashboard_authenticated(self):
+        response = async_to_sync(async_views.dashboard)(self._request('get', '/dashboard/'))
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_async_predict_forex(self, ticker):
+        ticker.return_value.history.return_value = make_history()
+        request = self._request('post', '/predict_forex/', {'forex_symbol': '2'})
+        response = async_to_sync(async_views.predict_forex)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Predicted Forex Price')
+        self.assertEqual(ticker.return_value.history.call_count, 1)
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_async_prediction_logged_under_session_user(self, ticker):
+        ticker.return_value.history.return_value = make_history()
+        logged = threading.Event()
+        with mock.patch.object(prediction_log, 'log', side_effect=lambda item: logged.set()) as log:
+            request = self._request('post', '/predict_forex/', {'forex_symbol': '2'})
+            async_to_sync(async_views.predict_forex)(request)
+            self.assertTrue(logged.wait(5))
+        self.assertEqual(log.call_args.args[0]['UserId'], 'testuser')
+
+
+@mock_aws
+class SessionBackendTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        _near_cache.clear()
+        self.calls = []
+        aws.reset_clients()
+        events = aws.get_dynamodb_resource().meta.client.meta.events
+        events.register('before-call.dynamodb.*', self._record)
+        self.addCleanup(events.unregister, 'before-call.dynamodb.*', self._record)
+
+    def _record(self, event_name, **kwargs):
+        self.calls.append(event_name.rsplit('.', 1)[-1])
+
+    def test_sessions_share_resource_and_check_table_once(self):
+        store = SessionStore()
+        store['user'] = {'username': 'testuser', 'is_authenticated': True}
+        store.save(must_create=True)
+        self.calls.clear()
+
+        for _ in range(3):
+            loaded = SessionStore(store.session_key)
+            self.assertIs(loaded.dynamodb, store.dynamodb)
+            self.assertEqual(loaded.load()['user']['username'], 'testuser')
+
+        self.assertEqual(self.calls.count('GetItem'), 3)
+        self.assertEqual(self.calls.count('DescribeTable'), 0)
+
+    @override_settings(DYNAMODB_SESSION_LAZY_WRITES=True)
+    def test_lazy_writes_skip_unchanged_sessions(self):
+        store = SessionStore()
+        store['user'] = {'username': 'testuser', 'is_authenticated': True}
+        store.save(must_create=True)
+
+        loaded = SessionStore(store.session_key)
+        self.assertEqual(loaded['user']['username'], 'testuser')
+        self.assertFalse(loaded.modified)
+        self.calls.clear()
+        # A later second: the signed encoding differs, the session data does not
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 5):
+            loaded.save()
+        self.assertNotIn('PutItem', self.calls)
+
+        loaded['theme'] = 'dark'
+        loaded.save()
+        self.assertEqual(self.calls.count('PutItem'), 1)
+
+        item = self.dynamodb.Table('django_sessions').get_item(Key={'session_key': store.session_key})['Item']
+        self.assertGreater(int(item['ttl']), time.time())
+
+    @override_settings(DYNAMODB_SESSION_LAZY_WRITES=True, DYNAMODB_SESSION_REFRESH_FRACTION=0)
+    def test_lazy_writes_refresh_expiry(self):
+        store = SessionStore()
+        store['user'] = {'username': 'testuser', 'is_authenticated': True}
+        store.save(must_create=True)
+        self.calls.clear()
+        store.save()
+        self.assertEqual(self.calls.count('PutItem'), 1)
+
+        # An unmodified session read after the refresh point is marked for saving
+        loaded = SessionStore(store.session_key)
+        self.assertEqual(loaded['user']['username'], 'testuser')
+        self.assertTrue(loaded.modified)
+
+    @override_settings(DYNAMODB_SESSION_NEAR_CACHE_TTL=30)
+    def test_near_cache_serves_repeat_reads_until_invalidated(self):
+        store = SessionStore()
+        store['user'] = {'username': 'testuser', 'is_authenticated': True}
+        store.save(must_create=True)
+        self.calls.clear()
+
+        for _ in range(3):
+            self.assertEqual(SessionStore(store.session_key).load()['user']['username'], 'testuser')
+        self.assertEqual(self.calls.count('GetItem'), 1)
+
+        store['theme'] = 'dark'
+        store.save()
+        self.assertEqual(SessionStore(store.session_key).load()['theme'], 'dark')
+        self.assertEqual(self.calls.count('GetItem'), 2)
+
+        store.delete()
+        self.assertEqual(SessionStore(store.session_key).load(), {})
+
+
+class RateLimiterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter()
+
+    def test_window_admits_limit_then_sets_retry_after(self):
+        results = [self.limiter.hit('predict', 'user:a', 5, 3600, now=100) for _ in range(6)]
+        self.assertEqual([allowed for allowed, _, _ in results], [True] * 5 + [False])
+        self.assertEqual(results[4][1], 0)
+        self.assertEqual(results[5][2], 3600 - 100 + 720)  # Next window, once 1/5 of this one slides out
+        # Rejections don't consume quota, and other users and endpoints are unaffected
+        self.assertEqual(cache.get('ratelimit:predict:user:a:0'), 5)
+        self.assertTrue(self.limiter.hit('predict', 'user:b', 5, 3600, now=100)[0])
+        self.assertTrue(self.limiter.hit('other', 'user:a', 5, 3600, now=100)[0])
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        for _ in range(4):
+            self.limiter.hit('predict', 'user:a', 4, 60, now=10)
+        # Halfway through the next window the previous four count as two
+        self.assertEqual([self.limiter.hit('predict', 'user:a', 4, 60, now=90)[0] for _ in range(3)],
+                         [True, True, False])
+
+    def test_concurrent_hits_never_over_admit(self):
+        barrier = threading.Barrier(20)
+        admitted = []
+
+        def worker():
+            barrier.wait()
+            admitted.append(self.limiter.hit('predict', 'user:a', 5, 3600)[0])
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(admitted.count(True), 5)
+
+
+@mock_aws
+class RateLimitViewTests(BaseTestCase):
+    def _login(self, client, username):
+        session = client.session
+        session['user'] = {'username': username, 'is_authenticated': True}
+        session.save()
+        return client
+
+    def test_quota_keyed_on_session_user(self):
+        client = self._login(self.client, 'testuser')
+        responses = [client.get(reverse('predict_stock')) for _ in range(6)]
+        self.assertEqual([response.status_code for response in responses], [200] * 5 + [429])
+        self.assertEqual(responses[0]['X-RateLimit-Remaining'], '4')
+        self.assertGreater(int(responses[5]['Retry-After']), 0)
+
+        other = self._login(Client(), 'otheruser')
+        self.assertEqual(other.get(reverse('predict_stock')).status_code, 200)
+
+    @override_settings(RATE_LIMIT_USER_QUOTAS={'testuser': {'predict_stock': '1/m'}})
+    def test_per_user_endpoint_override(self):
+        client = self._login(self.client, 'testuser')
+        self.assertEqual(client.get(reverse('predict_stock')).status_code, 200)
+        self.assertEqual(client.get(reverse('predict_stock')).status_code, 429)
+        self.assertEqual(client.get(reverse('predict_forex')).status_code, 200)
+
+    def test_anonymous_requests_redirect_before_rate_limiting(self):
+        for name in ('predict_stock', 'predict_stock_batch', 'predict_forex', 'predict_forex_batch'):
+            with mock.patch.object(SlidingWindowLimiter, 'hit') as hit:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 302, name)
+            hit.assert_not_called()
+
+
+@mock_aws
+class NewsCacheTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dynamodb.create_table(
+            TableName='NewsCache',
+            KeySchema=[{'AttributeName': 'Company', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'Company', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        self.session = mock.Mock()
+        self.session.get.return_value.json.return_value = {'articles': [{'title': 'Fresh'}]}
+        patcher = mock.patch('app.news.build_http_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tiers_fetch_upstream_once(self):
+        news = NewsCache()
+        self.assertEqual(news.get('TCS'), [{'title': 'Fresh'}])
+        self.assertEqual(news.get('TCS'), [{'title': 'Fresh'}])
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(self.session.get.call_args.kwargs['timeout'], news.timeout)
+
+        # A new process (empty LRU) is served from the NewsCache table
+        other = NewsCache()
+        self.assertEqual(other.get('TCS'), [{'title': 'Fresh'}])
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual((news.stats()['local_hits'], other.stats()['table_hits']), (1, 1))
+        self.assertEqual(cache.get('gnews_daily_counter'), 1)
+
+    def test_stale_entry_served_while_refreshing(self):
+        news = NewsCache(fresh_ttl=60)
+        self.dynamodb.Table('NewsCache').put_item(Item={
+            'Company': 'TCS',
+            'Articles': [{'title': 'Old'}],
+            'Timestamp': (datetime.now() - timedelta(hours=2)).isoformat(),
+        })
+        self.assertEqual(news.get('TCS'), [{'title': 'Old'}])
+        news._executor.shutdown(wait=True)
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(news.get('TCS'), [{'title': 'Fresh'}])
+        self.assertEqual(news.stats()['stale_served'], 1)
+
+    def test_stale_refresh_uses_a_fresh_table_row_from_another_worker(self):
+        news = NewsCache(fresh_ttl=60)
+        news._local.set('TCS', ([{'title': 'Old'}], datetime.now() - timedelta(hours=2)))
+        self.dynamodb.Table('NewsCache').put_item(Item={
+            'Company': 'TCS',
+            'Articles': [{'title': 'Peer'}],
+            'Timestamp': datetime.now().isoformat(),
+        })
+        self.assertEqual(news.get('TCS'), [{'title': 'Old'}])
+        news._executor.shutdown(wait=True)
+        self.session.get.assert_not_called()
+        self.assertEqual(news.get('TCS'), [{'title': 'Peer'}])
+        self.assertIsNone(cache.get('gnews_daily_counter'))
+
+    def test_daily_quota_falls_back_to_cache(self):
+        news = NewsCache(daily_limit=0)
+        self.assertEqual(news.get('TCS'), [])
+        self.session.get.assert_not_called()
+        self.assertEqual(news.stats()['quota_exhausted'], 1)
+
+
+@mock_aws
+class SentimentTests(BaseTestCase):
+    lexicon = pd.Series({'surge': 2.0, 'strong': 1.5, 'loss': -2.5, 'fraud': -3.0})
+
+    def setUp(self):
+        super().setUp()
+        for name in ('NewsCache', 'SentimentCache'):
+            self.dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': 'Company', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'Company', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST',
+            )
+
+    def test_score_texts_matches_vader_normalisation(self):
+        scores = score_texts(['Shares surge on strong results', 'Fraud probe', '', None], self.lexicon)
+        np.testing.assert_allclose(scores, [3.5 / np.sqrt(3.5 ** 2 + 15), -3 / np.sqrt(9 + 15), 0, 0])
+
+    def test_engine_writes_scores_read_by_lookup(self):
+        news = self.dynamodb.Table('NewsCache')
+        news.put_item(Item={'Company': 'TCS.NS', 'Articles': [{'title': 'Shares surge', 'description': 'Strong'}],
+                            'Timestamp': datetime.now().isoformat()})
+        news.put_item(Item={'Company': 'ITC.NS', 'Articles': [{'title': 'Quarterly loss'}],
+                            'Timestamp': datetime.now().isoformat()})
+        news.put_item(Item={'Company': 'WIPRO.NS', 'Articles': [], 'Timestamp': datetime.now().isoformat()})
+
+        self.assertEqual(SentimentEngine(lexicon=self.lexicon).run(), 3)
+
+        scores = SentimentScores(refresh_interval=3600)
+        with mock.patch.object(scores, 'refresh', wraps=scores.refresh) as refresh:
+            self.assertGreater(scores.get('TCS.NS'), 0.5)
+            self.assertLess(scores.get('ITC.NS'), 0.5)
+            self.assertEqual(scores.get('WIPRO.NS'), 0.5)
+            self.assertEqual(scores.get('UNKNOWN.NS'), 0.5)
+        self.assertEqual(refresh.call_count, 1)
+        self.assertIsNotNone(scores.version())
+
+    def test_stale_snapshot_served_while_refreshing_in_background(self):
+        scores = SentimentScores(refresh_interval=60)
+        scores.refresh()
+        scores._loaded_at -= 120
+        scan_started, release = threading.Event(), threading.Event()
+
+        def slow_scan(**kwargs):
+            scan_started.set()
+            release.wait(5)
+            return {'Items': [{'Company': 'TCS.NS', 'Score': '0.9', 'Timestamp': '2025-01-02T00:00:00'}]}
+
+        with mock.patch('app.sentiment.get_table', return_value=mock.Mock(scan=slow_scan)):
+            self.assertEqual(scores.get('TCS.NS'), 0.5)  # Old snapshot, returned without waiting
+            self.assertTrue(scan_started.wait(5))
+            self.assertEqual(scores.get('TCS.NS'), 0.5)
+            release.set()
+            while scores.reloads < 2:
+                time.sleep(0.01)
+        self.assertEqual(scores.get('TCS.NS'), 0.9)
+        self.assertEqual(scores.version(), '2025-01-02T00:00:00')
+
+
+class PasswordHasherTests(TestCase):
+    def test_pool_hashes_with_configured_rounds(self):
+        hasher = PasswordHasher(workers=1, rounds=4)
+        self.addCleanup(hasher.shutdown)
+        hashed = hasher.hash('s3cret-pass')
+        self.assertEqual(hash_rounds(hashed), 4)
+        self.assertTrue(hasher.check('s3cret-pass', hashed))
+        self.assertFalse(hasher.check('wrong-pass', hashed))
+        self.assertFalse(hasher.needs_rehash(hashed))
+        self.assertTrue(PasswordHasher(workers=0, rounds=5).needs_rehash(hashed))
+
+    def test_full_queue_rejects(self):
+        hasher = PasswordHasher(workers=0, rounds=4, max_pending=1, queue_timeout=0)
+        hasher._ensure_pool()
+        hasher._slots.acquire()
+        with self.assertRaises(PasswordHasherBusy):
+            hasher.hash('s3cret-pass')
+        self.assertEqual(hasher.stats()['rejected'], 1)
+
+
+@mock_aws
+class PasswordUpgradeTests(BaseTestCase):
+    @override_settings(BCRYPT_ROUNDS=5)
+    def test_login_rehashes_with_new_cost(self):
+        old_hash = bcrypt.hashpw(b'upgrade-pass', bcrypt.gensalt(rounds=4)).decode('utf-8')
+        self.dynamodb.Table('Users').put_item(Item={'username': 'upgrader', 'password': old_hash, 'is_active': True})
+
+        response = self.client.post(reverse('login'), {'username': 'upgrader', 'password': 'upgrade-pass'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+        stored = get_dynamodb_user('upgrader')['password']
+        self.assertEqual(hash_rounds(stored), 5)
+        self.assertTrue(bcrypt.checkpw(b'upgrade-pass', stored.encode('utf-8')))
+
+
+ITEM_OPERATIONS = {'GetItem', 'PutItem', 'UpdateItem', 'DeleteItem', 'Query', 'Scan',
+                   'BatchGetItem', 'BatchWriteItem', 'TransactGetItems', 'TransactWriteItems'}
+
+
+@contextlib.contextmanager
+def count_dynamodb_calls():
+    """
+    Count DynamoDB item operations made on the calling thread, keyed by (operation, table).
+    Table management calls (e.g. the session backend's test-mode table setup) are ignored.
+    """
+    calls = collections.Counter()
+    thread = threading.current_thread()
+    make_api_call = botocore.client.BaseClient._make_api_call
+
+    def counting(client, operation_name, api_params):
+        if threading.current_thread() is thread and operation_name in ITEM_OPERATIONS:
+            calls[(operation_name, api_params.get('TableName'))] += 1
+        return make_api_call(client, operation_name, api_params)
+
+    with mock.patch.object(botocore.client.BaseClient, '_make_api_call', counting):
+        yield calls
+
+
+@mock_aws
+class LoginRoundTripTests(BaseTestCase):
+    # Synchronous DynamoDB calls allowed on the request path
+    LOGIN_CALL_BUDGET = {('GetItem', 'Users'): 1, ('PutItem', settings.DYNAMODB_SESSIONS_TABLE_NAME): 1}
+    REGISTER_CALL_BUDGET = {('PutItem', 'Users'): 1}
+
+    def test_login_call_budget(self):
+        with count_dynamodb_calls() as calls:
+            response = self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass123'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertEqual(dict(calls), self.LOGIN_CALL_BUDGET)
+
+        # Activity and last_login land once the background writers flush
+        self.assertTrue(activity_log.flush())
+        self.assertEqual(user_updates.flush(), 1)
+        self.assertIsNotNone(get_dynamodb_user('testuser')['last_login'])
+
+    def test_repeated_logins_coalesce_last_login(self):
+        for _ in range(3):
+            self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(user_updates.flush(), 1)
+
+    def test_register_call_budget(self):
+        data = {'username': 'budgetuser', 'email': 'budget@example.com',
+                'password': 'budgetpass123', 'confirm_password': 'budgetpass123'}
+        with count_dynamodb_calls() as calls:
+            response = self.client.post(reverse('register'), data)
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertEqual(dict(calls), self.REGISTER_CALL_BUDGET)
+
+    def test_register_existing_username_is_one_conditional_write(self):
+        data = {'username': 'testuser', 'email': 'other@example.com',
+                'password': 'otherpass123', 'confirm_password': 'otherpass123'}
+        with count_dynamodb_calls() as calls:
+            response = self.client.post(reverse('register'), data)
+        self.assertContains(response, 'Username already exists.')
+        self.assertEqual(dict(calls), self.REGISTER_CALL_BUDGET)
+        self.assertEqual(get_dynamodb_user('testuser')['email'], 'testuser@example.com')
+
+    def test_failed_user_update_is_retried_under_newer_values(self):
+        updates = DeferredUserUpdates(flush_interval=60)
+        self.addCleanup(updates.close)
+        updates.update('testuser', last_login='first', email='new@example.com')
+        throttled = ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'UpdateItem')
+        with mock.patch.object(updates._get_table(), 'update_item', side_effect=throttled):
+            self.assertEqual(updates.flush(), 0)
+        updates.update('testuser', last_login='second')
+
+        self.assertEqual(updates.flush(), 1)
+        user = get_dynamodb_user('testuser')
+        self.assertEqual((user['last_login'], user['email']), ('second', 'new@example.com'))
+        self.assertEqual(updates.stats()['requeued'], 1)
+
+    def test_close_stops_the_flusher_before_the_final_flush(self):
+        updates = DeferredUserUpdates(flush_interval=60)
+        updates.update('testuser', last_login='at-exit')
+        flusher = updates._thread
+
+        self.assertEqual(updates.close(), 1)
+        self.assertFalse(flusher.is_alive())
+        self.assertEqual(get_dynamodb_user('testuser')['last_login'], 'at-exit')
+
+
+@mock_aws
+class ActivityFeedTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.dynamodb.Table('UserActivities').batch_writer() as batch:
+            for i in range(25):
+                batch.put_item(Item={'UserId': 'testuser', 'Timestamp': f'2025-01-01T00:00:{i:02d}',
+                                     'Activity': f'Event{i}', 'UserAgent': 'x' * 500})
+        session = self.client.session
+        session['user'] = {'username': 'testuser', 'is_authenticated': True}
+        session.save()
+
+    def test_cursor_pagination_with_projection(self):
+        feed = ActivityFeed(page_size=10)
+        seen, cursor = [], None
+        with count_dynamodb_calls() as calls:
+            while True:
+                activities, cursor = feed.page('testuser', cursor)
+                seen.extend(activities)
+                if cursor is None:
+                    break
+        self.assertEqual([item['Activity'] for item in seen], [f'Event{i}' for i in range(24, -1, -1)])
+        self.assertEqual(set(seen[0]), {'Activity', 'Timestamp'})
+        self.assertEqual(calls[('Query', 'UserActivities')], 3)
+
+    def test_pages_cached_until_activity_written(self):
+        feed = ActivityFeed(page_size=5)
+        first, _ = feed.page('testuser')
+        with count_dynamodb_calls() as calls:
+            self.assertEqual(feed.page('testuser')[0], first)
+        self.assertEqual(dict(calls), {})
+
+        writer = BufferedTableWriter('UserActivities', on_written=feed.invalidate_items)
+        self.addCleanup(writer.close)
+        writer.log({'UserId': 'testuser', 'Timestamp': '2025-01-02T00:00:00', 'Activity': 'Newest'})
+        self.assertTrue(writer.flush())
+        self.assertEqual(feed.page('testuser')[0][0]['Activity'], 'Newest')
+
+    def test_generations_are_bounded(self):
+        feed = ActivityFeed(maxsize=3)
+        for i in range(10):
+            feed.invalidate(f'user{i}')
+        self.assertEqual(len(feed._generations), 3)
+        self.assertEqual(feed._generation('user9'), 10)
+
+    def test_evicted_generation_never_serves_pages_cached_before_invalidation(self):
+        feed = ActivityFeed(page_size=5, maxsize=3)
+        stale, _ = feed.page('testuser')
+        self.dynamodb.Table('UserActivities').put_item(
+            Item={'UserId': 'testuser', 'Timestamp': '2025-01-02T00:00:00', 'Activity': 'Newest'})
+        feed.invalidate('testuser')
+        for i in range(5):
+            feed.invalidate(f'user{i}')  # Evicts testuser's generation
+
+        activities, _ = feed.page('testuser')
+        self.assertNotEqual(activities, stale)
+        self.assertEqual(activities[0]['Activity'], 'Newest')
+
+    def test_json_feed_rejects_foreign_cursor(self):
+        response = self.client.get(reverse('activity_feed'), {'limit': 20})
+        body = response.json()
+        self.assertEqual(len(body['activities']), 20)
+        self.assertIsNotNone(body['next_cursor'])
+        self.assertEqual(len(self.client.get(reverse('activity_feed'), {'cursor': body['next_cursor']})
+                             .json()['activities']), 5)
+
+        for timestamp in ('1', '2'):
+            self.dynamodb.Table('UserActivities').put_item(Item={'UserId': 'other', 'Timestamp': timestamp})
+        _, foreign_cursor = ActivityFeed().page('other', limit=1)
+        response = self.client.get(reverse('activity_feed'), {'cursor': foreign_cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_profile_page_lists_activity(self):
+        response = self.client.get(reverse('user_profile'))
+        self.assertContains(response, 'Event24')
+        self.assertContains(response, 'Older activity')
+
+
+
+class StartupImportTests(TestCase):
+    def test_lazy_module_imports_on_first_attribute(self):
+        module = lazy_import('json')
+        self.assertIn('not loaded', repr(module))
+        self.assertEqual(module.dumps([1]), '[1]')
+        self.assertIn("'json' (loaded)", repr(module))
+
+    def test_url_conf_does_not_import_heavy_dependencies(self):
+        heavy = ('pandas', 'numpy', 'sklearn', 'yfinance', 'joblib', 'boto3', 'requests')
+        code = ("import sys, django; django.setup(); import app.urls; "
+                f"print(','.join(m for m in {heavy!r} if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True,
+                                text=True, env=dict(os.environ, DJANGO_SETTINGS_MODULE='stock_forex_app.settings'))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+
+@mock_aws
+class MetricsAccessTests(TestCase):
+    def test_loopback_only_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7',
+                                   HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('model_registry', response.json())
+
+
+class PreforkTests(TestCase):
+    @mock_aws
+    def test_reset_after_fork_drops_shared_clients(self):
+        client = aws.get_s3_client()
+        self.assertIs(aws.get_s3_client(), client)
+        prefork.reset_after_fork()
+        self.assertIsNot(aws.get_s3_client(), client)
+
+
+@mock_aws
+class ApiTests(BaseTestCase):
+    def auth(self, username='testuser'):
+        return {'HTTP_AUTHORIZATION': f'Bearer {issue_token(username)}'}
+
+    def test_token_exchange(self):
+        response = self.client.post(reverse('api_token'), {'username': 'testuser', 'password': 'testpass123'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        token = response.json()['token']
+
+        response = self.client.post(reverse('api_token'), {'username': 'testuser', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get(reverse('api_predict_stock'), {'company_symbol': 'x'},
+                                   HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_refused_for_inactive_user(self):
+        self.dynamodb.Table('Users').update_item(Key={'username': 'testuser'}, UpdateExpression='SET is_active = :f',
+                                                 ExpressionAttributeValues={':f': False})
+        response = self.client.post(reverse('api_token'), {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('token', response.json())
+
+    def test_predictions_require_a_valid_token(self):
+        response = self.client.get(reverse('api_predict_stock'), {'company_symbol': '0'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+        response = self.client.get(reverse('api_predict_stock'), {'company_symbol': '0'},
+                                   HTTP_AUTHORIZATION=f'Bearer {issue_token("testuser")}x')
+        self.assertEqual(response.status_code, 401)
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_predict_stock_without_session_round_trips(self, ticker):
+        ticker.return_value.history.return_value = make_history(close=1200.0)
+        with count_dynamodb_calls() as calls:
+            response = self.client.get(reverse('api_predict_stock'), {'company_symbol': '0'}, **self.auth())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([key for key in calls if key[1] in ('Users', settings.DYNAMODB_SESSIONS_TABLE_NAME)], [])
+
+        body = response.json()
+        self.assertEqual(body['company'], 'ADANIPORTS.NS')
+        self.assertEqual(body['timestamp'], '2025-04-08T00:00:00+00:00')
+        self.assertIsInstance(body['prediction'], float)
+        self.assertIsNotNone(body['model_version'])
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_predict_forex_status_codes(self, ticker):
+        ticker.return_value.history.return_value = make_history()
+        response = self.client.get(reverse('api_predict_forex'), {'pair': 'eur/usd'}, **self.auth())
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertAlmostEqual(body['spread'], body['ask'] - body['bid'])
+        self.assertEqual(set(body['model_version']), {'ask', 'bid'})
+
+        self.assertEqual(self.client.get(reverse('api_predict_forex'), {'pair': 'ABC/XYZ'},
+                                         **self.auth()).status_code, 400)
+        self.assertEqual(self.client.post(reverse('api_predict_forex'), **self.auth()).status_code, 405)
+
+        cache.clear()
+        ticker.return_value.history.return_value = make_history().iloc[:0]
+        response = self.client.get(reverse('api_predict_forex'), {'pair': 'GBP/USD'}, **self.auth())
+        self.assertEqual(response.status_code, 503)
+
+
+@mock_aws
+class PredictionCacheTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        prediction_cache.clear()
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_token("testuser")}'}
+
+    def test_key_changes_with_bar_model_and_sentiment(self):
+        bar = {'Timestamp': '2025-04-08T00:00:00+00:00', 'Open': 1.0, 'High': 1.2, 'Low': 1.0, 'Close': 1.1,
+               'Volume': 0.0}
+        key = PredictionCache.key('m.joblib', 'v1', 'EURUSD=X', bar, 's1')
+        self.assertEqual(key, PredictionCache.key('m.joblib', 'v1', 'EURUSD=X', dict(bar), 's1'))
+        self.assertNotEqual(key, PredictionCache.key('m.joblib', 'v2', 'EURUSD=X', bar, 's1'))
+        self.assertNotEqual(key, PredictionCache.key('m.joblib', 'v1', 'EURUSD=X', dict(bar, Close=1.15), 's1'))
+        self.assertNotEqual(key, PredictionCache.key('m.joblib', 'v1', 'EURUSD=X',
+                                                     dict(bar, Timestamp='2025-04-09T00:00:00+00:00'), 's1'))
+        self.assertNotEqual(key, PredictionCache.key('m.joblib', 'v1', 'EURUSD=X', bar, 's2'))
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_api_reports_hits_until_a_new_bar_arrives(self, ticker):
+        ticker.return_value.history.return_value = make_history(close=1200.0)
+        url = reverse('api_predict_stock')
+        first = self.client.get(url, {'company_symbol': '0'}, **self.auth).json()
+        second = self.client.get(url, {'company_symbol': '0'}, **self.auth).json()
+        self.assertFalse(first['cache_hit'])
+        self.assertTrue(second['cache_hit'])
+        self.assertEqual(first['prediction'], second['prediction'])
+
+        cache.clear()  # Next market data fetch returns a new bar
+        ticker.return_value.history.return_value = make_history(close=1250.0, index=['2025-04-09 00:00:00+00:00'])
+        self.assertFalse(self.client.get(url, {'company_symbol': '0'}, **self.auth).json()['cache_hit'])
+
+    @mock.patch('app.market_data.yf.Ticker')
+    def test_html_view_reports_cache_status(self, ticker):
+        ticker.return_value.history.return_value = make_history()
+        session = self.client.session
+        session['user'] = {'username': 'testuser', 'is_authenticated': True}
+        session.save()
+        self.assertEqual(self.client.post(reverse('predict_forex'), {'forex_symbol': '2'})['X-Prediction-Cache'],
+                         'miss')
+        self.assertEqual(self.client.post(reverse('predict_forex'), {'forex_symbol': '2'})['X-Prediction-Cache'],
+                         'hit')
+
+    @mock.patch('app.market_data.yf.download')
+    def test_batch_only_predicts_misses(self, download):
+        download.return_value = pd.concat(
+            {'ADANIPORTS.NS': make_history(close=1200.0), 'APOLLOHOSP.NS': make_history(close=5000.0)}, axis=1)
+        first, _ = predict_stocks([0])
+        self.assertFalse(first[0]['cache_hit'])
+
+        results, _ = predict_stocks([0, 1])
+        self.assertEqual([result['cache_hit'] for result in results], [True, False])
+        self.assertEqual(results[0]['prediction'], first[0]['prediction'])
+
+    def test_stock_key_uses_the_sentiment_passed_in(self):
+        model = mock.Mock()
+        model.predict.side_effect = lambda features: features['Sentiment_Score'].to_numpy()
+        bar = {'Timestamp': '2025-04-08T00:00:00+00:00', 'Open': 1.0, 'High': 1.2, 'Low': 1.0, 'Close': 1.1,
+               'Volume': 0.0}
+        self.assertEqual(score_stock(0, bar, model, 'v1', sentiment=0.9), (0.9, False))
+        self.assertEqual(score_stock(0, bar, model, 'v1', sentiment=0.1), (0.1, False))
+        self.assertEqual(score_stock(0, bar, model, 'v1', sentiment=0.9), (0.9, True))
+
+
+class BacktestTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        store = OHLCVStore(self.root)
+        index = pd.date_range('2024-01-01', periods=60, freq='D', tz='UTC')
+        close = 100 + np.cumsum(np.sin(np.arange(60)))
+        for symbol, scale in (('ADANIPORTS.NS', 12.0), ('APOLLOHOSP.NS', 60.0), ('EURUSD=X', 0.01)):
+            prices = close * scale
+            store.append(symbol, pd.DataFrame({'Open': prices, 'High': prices * 1.01, 'Low': prices * 0.99,
+                                               'Close': prices, 'Volume': 0.0}, index=index))
+        self.close = close
+
+    def test_scores_every_symbol_with_history(self):
+        metrics = run_backtest('all', self.root, settings.MODEL_LOCAL_DIR, workers=0)
+        self.assertEqual(sorted(zip(metrics['model'], metrics['symbol'])), [
+            ('EUR/USD ASK', 'EURUSD=X'), ('EUR/USD BID', 'EURUSD=X'),
+            ('stock_price_predictor_model.joblib', 'ADANIPORTS.NS'), ('stock_price_predictor_model.joblib', 'APOLLOHOSP.NS'),
+        ])
+        self.assertTrue((metrics['bars'] == 59).all())
+
+        adani = metrics[metrics['symbol'] == 'ADANIPORTS.NS'].iloc[0]
+        self.assertAlmostEqual(adani['naive_mae'], np.abs(np.diff(self.close * 12.0)).mean())
+        self.assertEqual(adani['start'], pd.Timestamp('2024-01-02', tz='UTC'))
+
+    def test_command_runs_on_a_process_pool(self):
+        out = io.StringIO()
+        call_command('backtest', '--kind', 'forex', '--store', self.root, '--workers', '2', '--start', '2024-02-01',
+                     stdout=out)
+        self.assertIn('EUR/USD BID', out.getvalue())
+        self.assertIn('Scored 56 bars for 2 symbol/model pairs', out.getvalue())
+
+
+class TrainingTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.output = tempfile.mkdtemp()
+        store = OHLCVStore(self.root)
+        index = pd.date_range('2024-01-01', periods=60, freq='D', tz='UTC')
+        close = 100 + np.cumsum(np.sin(np.arange(60)))
+        for symbol, scale in (('ADANIPORTS.NS', 12.0), ('APOLLOHOSP.NS', 60.0), ('EURUSD=X', 0.01)):
+            prices = close * scale
+            store.append(symbol, pd.DataFrame({'Open': prices, 'High': prices * 1.01, 'Low': prices * 0.99,
+                                               'Close': prices, 'Volume': 0.0}, index=index))
+
+    def read_metadata(self, version_dir, model_file):
+        with open(os.path.join(version_dir, f'{model_file}.json')) as f:
+            return json.load(f)
+
+    def test_trains_models_with_history_and_writes_metadata(self):
+        version_dir, manifest = train_all(self.root, self.output, workers=0, version='v1')
+        self.assertEqual(sorted(manifest['models']), [
+            'EUR-USD-ASK.joblib', 'EUR-USD-BID.joblib', 'stock_price_predictor_model.joblib',
+        ])
+
+        metadata = self.read_metadata(version_dir, 'stock_price_predictor_model.joblib')
+        self.assertEqual(metadata['features'], ['Close_Lagged', 'Sentiment_Score', 'Company'])
+        self.assertEqual(metadata['estimator'], 'Ridge')
+        self.assertEqual(metadata['training_window'], {
+            'start': '2024-01-02T00:00:00+00:00', 'end': '2024-02-29T00:00:00+00:00', 'rows': 118,
+        })
+        model = joblib.load(os.path.join(version_dir, 'stock_price_predictor_model.joblib'))
+        self.assertEqual(list(model.feature_names_in_), metadata['features'])
+
+        forex = joblib.load(os.path.join(version_dir, 'EUR-USD-ASK.joblib'))
+        self.assertFalse(hasattr(forex, 'feature_names_in_'))
+        self.assertEqual(forex.n_features_in_, 4)
+
+    def test_pool_reproduces_the_inline_run(self):
+        _, inline = train_all(self.root, self.output, kind='forex', workers=0, version='inline')
+        _, pooled = train_all(self.root, self.output, kind='forex', workers=2, threads=1, version='pooled')
+        self.assertEqual(inline['models'], pooled['models'])
+
+    def test_command_promotes_the_trained_version(self):
+        models_dir = tempfile.mkdtemp()
+        out = io.StringIO()
+        with override_settings(MODEL_LOCAL_DIR=models_dir):
+            call_command('train_models', '--store', self.root, '--output', self.output,
+                         '--name', 'v2', '--workers', '0', '--end', '2024-02-01', '--promote', stdout=out)
+        self.assertIn('Trained 3 models', out.getvalue())
+        self.assertIn('Left 2 forex models alone', out.getvalue())
+        self.assertEqual(sorted(os.listdir(models_dir)), [
+            'stock_price_predictor_model.joblib', 'stock_price_predictor_model.joblib.json',
+        ])
+        metadata = self.read_metadata(models_dir, 'stock_price_predictor_model.joblib')
+        self.assertEqual(metadata['training_window']['rows'], 60)
+
+    def test_forex_sides_are_only_promoted_on_request(self):
+        version_dir, _ = train_all(self.root, self.output, kind='forex', workers=0, version='v3')
+        models_dir = tempfile.mkdtemp()
+        self.assertEqual(promote(version_dir, models_dir), [])
+        self.assertEqual(os.listdir(models_dir), [])
+
+        self.assertEqual(promote(version_dir, models_dir, forex_sides=['BID']), ['EUR-USD-BID.joblib'])
+        self.assertEqual(sorted(os.listdir(models_dir)), ['EUR-USD-BID.joblib', 'EUR-USD-BID.joblib.json'])
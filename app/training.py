@@ -0,0 +1,189 @@
+# app/training.py
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.linear_model import Lasso, Ridge
+
+from app.backtest import forex_frame, stock_frame
+from app.mappings import company_mapping, forex_mapping
+from app.model_registry import STOCK_MODEL_FILE
+from app.ohlcv_store import OHLCVStore
+from app.predictions import FOREX_FEATURES, STOCK_FEATURES
+
+logger = logging.getLogger(__name__)
+
+# Estimators and hyperparameters of the shipped models
+ESTIMATORS = {
+    'stock': (Ridge, {'alpha': 1.0}),
+    'forex': (Lasso, {'alpha': 0.01, 'max_iter': 1000}),
+}
+
+# The OHLCV store holds one price series per symbol, not separate quote sides, so
+# both the ASK and BID models are fitted to the next bar's close.
+TARGET = 'next Close'
+
+# Quote side (ASK or BID) of every forex model file
+FOREX_SIDES = {details['model_file']: details['name'].rsplit(' ', 1)[1] for details in forex_mapping.values()}
+
+
+def _sha256(*arrays):
+    digest = hashlib.sha256()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def training_data(kind, symbols, store, start=None, end=None, interval='1d'):
+    """
+    Lagged features and targets for one model, built like the backtest's: features
+    from bar t-1, target the close of bar t. Returns ``(X, y, frame)``.
+    """
+    if kind == 'stock':
+        frame = stock_frame(store, symbols, start, end, interval)
+        return frame[STOCK_FEATURES].astype(np.float64), frame['target'].to_numpy(dtype=np.float64), frame
+    frame = forex_frame(store, forex_mapping[symbols[0]]['symbol'], start, end, interval)
+    # The forex models are fitted (and served) without feature names
+    return frame[FOREX_FEATURES].to_numpy(dtype=np.float64), frame['target'].to_numpy(dtype=np.float64), frame
+
+
+def train_model(kind, model_file, symbols, store_root, output_dir, version, start=None, end=None,
+                interval='1d', threads=1):
+    """
+    Fit one model and write ``<output_dir>/<model_file>`` plus a ``.json`` metadata file.
+    Runs in a worker process: BLAS/OpenMP pools are limited to ``threads`` threads so
+    parallel workers don't oversubscribe the CPUs. Returns the metadata dict, or None
+    if there is no history for the model's symbols.
+    """
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    X, y, frame = training_data(kind, symbols, OHLCVStore(store_root), start, end, interval)
+    if len(y) == 0:
+        logger.warning(f"No history to train {model_file}")
+        return None
+
+    estimator_class, params = ESTIMATORS[kind]
+    estimator = estimator_class(**params)
+    with threadpool_limits(limits=threads):
+        estimator.fit(X, y)
+
+    path = os.path.join(output_dir, model_file)
+    joblib.dump(estimator, path)
+    timestamps = pd.to_datetime(frame['timestamp'].to_numpy(), utc=True)
+    metadata = {
+        'model_file': model_file,
+        'version': version,
+        'estimator': type(estimator).__name__,
+        'params': estimator.get_params(),
+        'features': STOCK_FEATURES if kind == 'stock' else FOREX_FEATURES,
+        'target': TARGET,
+        'interval': interval,
+        'symbols': sorted(frame['symbol'].unique().tolist()),
+        'training_window': {
+            'start': timestamps.min().isoformat(),
+            'end': timestamps.max().isoformat(),
+            'rows': int(len(y)),
+        },
+        'data_sha256': _sha256(np.asarray(X, dtype=np.float64), y),
+        'artifact_sha256': _file_sha256(path),
+        'sklearn_version': sklearn.__version__,
+        'train_seconds': round(time.perf_counter() - started, 3),
+    }
+    with open(f'{path}.json', 'w') as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    return metadata
+
+
+def plan(kind='all'):
+    """``(kind, model_file, symbols)`` for every model: the stock model and each forex model."""
+    tasks = []
+    if kind in ('stock', 'all'):
+        tasks.append(('stock', STOCK_MODEL_FILE, list(company_mapping)))
+    if kind in ('forex', 'all'):
+        tasks.extend(('forex', details['model_file'], [forex_symbol])
+                     for forex_symbol, details in forex_mapping.items())
+    return tasks
+
+
+def train_all(store_root, output_root, kind='all', start=None, end=None, interval='1d', workers=None,
+              threads=None, version=None):
+    """
+    Train every model into ``<output_root>/<version>/`` on a process pool of ``workers``
+    processes (default: one per CPU; 0 trains in this process), each limited to
+    ``threads`` BLAS threads (default: the CPUs divided between the workers). Writes a
+    ``manifest.json`` listing every artifact. Returns ``(version_dir, manifest)``.
+    """
+    cpus = os.cpu_count() or 1
+    if workers is None:
+        workers = cpus
+    if threads is None:
+        threads = max(1, cpus // max(workers, 1))
+    version = version or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    version_dir = os.path.join(output_root, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    args = [(task_kind, model_file, symbols, str(store_root), version_dir, version, start, end, interval, threads)
+            for task_kind, model_file, symbols in plan(kind)]
+    if workers == 0:
+        results = [train_model(*task_args) for task_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args)),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(train_model, *zip(*args)))
+
+    models = {metadata['model_file']: metadata for metadata in results if metadata is not None}
+    manifest = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'workers': workers,
+        'threads_per_worker': threads,
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'models': {name: {'artifact_sha256': metadata['artifact_sha256'],
+                          'data_sha256': metadata['data_sha256']} for name, metadata in models.items()},
+    }
+    with open(os.path.join(version_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(f"Trained {len(models)} models into {version_dir} in {manifest['wall_seconds']} s")
+    return version_dir, manifest
+
+
+def promote(version_dir, models_dir, forex_sides=()):
+    """
+    Copy a trained version's artifacts (and metadata) over the models the registry
+    loads locally. Both quote sides are fitted to the same target (see TARGET), so
+    a forex model is only copied if its side (ASK or BID) is listed in
+    ``forex_sides``; otherwise the shipped ASK/BID models are left alone. Returns
+    the promoted model files.
+    """
+    with open(os.path.join(version_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    promoted = []
+    for model_file in manifest['models']:
+        side = FOREX_SIDES.get(model_file)
+        if side is not None and side not in forex_sides:
+            logger.info(f"Not promoting {model_file}: {side} models are trained on {TARGET}")
+            continue
+        for name in (model_file, f'{model_file}.json'):
+            shutil.copy2(os.path.join(version_dir, name), os.path.join(models_dir, name))
+        promoted.append(model_file)
+    return promoted
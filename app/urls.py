@@ -1,14 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
+
+# Under ASGI, serve the I/O-heavy pages from their async versions
+io_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', views.home, name='home'),
-    path('predict_stock/', views.predict_stock, name='predict_stock'),
-    path('predict_forex/', views.predict_forex, name='predict_forex'),
+    path('predict_stock/', io_views.predict_stock, name='predict_stock'),
+    path('predict_stock/batch/', views.predict_stock_batch, name='predict_stock_batch'),
+    path('predict_forex/', io_views.predict_forex, name='predict_forex'),
+    path('predict_forex/batch/', views.predict_forex_batch, name='predict_forex_batch'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.custom_logout, name='logout'),
     path('register/', views.register, name='register'),
     path('health/', views.health_check, name='health_check'),
-    path('profile/', views.user_profile, name='user_profile'),
-    path('dashboard/', views.dashboard, name='dashboard'),  # Add this line
+    path('metrics/', views.metrics, name='metrics'),
+    path('profile/', io_views.user_profile, name='user_profile'),
+    path('profile/activity/', views.activity_feed_api, name='activity_feed'),
+    path('dashboard/', io_views.dashboard, name='dashboard'),  # Add this line
+    path('api/v1/token/', api.token, name='api_token'),
+    path('api/v1/predict/stock/', api.predict_stock, name='api_predict_stock'),
+    path('api/v1/predict/forex/', api.predict_forex, name='api_predict_forex'),
 ]
\ No newline at end of file
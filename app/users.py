@@ -0,0 +1,124 @@
+# app/users.py
+import atexit
+import logging
+import os
+import threading
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+
+from app.aws import create_resource
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredUserUpdates:
+    """
+    Coalesces per-user attribute updates (such as ``last_login``) and applies them
+    from a background thread.
+
+    ``update`` only records the latest values for a user in memory, so repeated
+    logins within ``flush_interval`` seconds cost one UpdateItem instead of one each,
+    and none of them wait on DynamoDB. An UpdateItem that fails is re-queued under
+    any newer values and retried on the next flush. At process exit the flusher is
+    stopped and pending updates are written once more; any that still fail are lost
+    (and logged). Updates never create users: a user deleted in the meantime is skipped.
+    """
+
+    def __init__(self, table_name='Users', flush_interval=5.0):
+        self.table_name = table_name
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._pid = os.getpid()
+        self._table = None
+        self._counters = {'updates': 0, 'coalesced': 0, 'written': 0, 'failed': 0, 'requeued': 0}
+        atexit.register(self.close)
+
+    def update(self, username, **attributes):
+        """Record new values for ``username``'s attributes, to be written shortly."""
+        self._ensure_thread()
+        with self._lock:
+            self._counters['updates'] += 1
+            if username in self._pending:
+                self._counters['coalesced'] += 1
+            self._pending.setdefault(username, {}).update(attributes)
+
+    def _ensure_thread(self):
+        # Threads don't survive fork(); start a fresh flusher in each worker process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Updates recorded before fork belong to the parent
+                self._pending = {}
+                self._table = None
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=f'deferred-{self.table_name}', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+
+    def _get_table(self):
+        if self._table is None:
+            self._table = create_resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def flush(self):
+        """Write every pending update now. Returns the number of users updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            written = 0
+            for username, attributes in pending.items():
+                names = {f'#a{i}': name for i, name in enumerate(attributes)}
+                values = {f':v{i}': value for i, value in enumerate(attributes.values())}
+                try:
+                    self._get_table().update_item(
+                        Key={'username': username},
+                        UpdateExpression='SET ' + ', '.join(f'#a{i} = :v{i}' for i in range(len(attributes))),
+                        ConditionExpression='attribute_exists(username)',
+                        ExpressionAttributeNames=names,
+                        ExpressionAttributeValues=values,
+                    )
+                    written += 1
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        self._requeue(username, attributes, e)
+                except BotoCoreError as e:
+                    self._requeue(username, attributes, e)
+            with self._lock:
+                self._counters['written'] += written
+            return written
+
+    def _requeue(self, username, attributes, error):
+        # Values recorded since this flush started are newer and win
+        with self._lock:
+            self._counters['failed'] += 1
+            self._counters['requeued'] += 1
+            self._pending[username] = {**attributes, **self._pending.get(username, {})}
+        logger.error(f"Error updating user {username}, will retry: {error}")
+
+    def close(self, timeout=5.0):
+        """Stop the flusher thread, then write every pending update."""
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        return self.flush()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters['pending'] = len(self._pending)
+        return counters
+
+
+user_updates = DeferredUserUpdates(flush_interval=settings.USER_UPDATE_FLUSH_INTERVAL)
@@ -1,98 +1,76 @@
 # app/views.py
 import os
 
-import requests
 from botocore.exceptions import ClientError, BotoCoreError
 from django.conf import settings
 from django.core.cache import cache
 from django.shortcuts import render
 from django.shortcuts import redirect
 from django.contrib import messages
-import joblib
-import yfinance as yf
 import logging
-import boto3
 from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
-import pandas as pd
 from django.contrib.auth import logout as auth_logout
-from app.decorators import dynamodb_login_required
+from app.activity_feed import InvalidCursor, activity_feed
+from app.audit_log import activity_log, prediction_log
+from app.aws import get_s3_client, get_table
+from app.decorators import dynamodb_login_required, internal_only, session_username
+from app.dynamodb_session_backend import session_stats
+from app.market_data import get_latest_bar, market_data_cache
+from app.mappings import company_mapping, forex_mapping, forex_pairs
+from app.model_registry import model_registry
+from app.news import fetch_recent_news, news_cache
+from app.passwords import PasswordHasherBusy, check_password, hash_password, password_hasher
+from app.ratelimit import limiter, rate_limit
+from app.sentiment import sentiment_scores
+from app.users import user_updates
+from app.lazy import lazy_import
+from app.predictions import (
+    PredictionError, prediction_cache, predict_forex_pairs, predict_forex_price, predict_stock_price, predict_stocks,
+)
 
 # In app/views.py
 from django.http import HttpResponse, JsonResponse
-import bcrypt
+
+# Heavy dependencies, imported by the views that use them
+joblib = lazy_import('joblib')
+pd = lazy_import('pandas')
 
 
 def health_check(request):
     return HttpResponse("OK", status=200)
 
 
-# Configure logging
-logger = logging.getLogger(__name__)
-
-# Initialize AWS clients with configuration from settings
-s3_client = boto3.client(
-    's3',
-    region_name=settings.AWS_REGION,
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-)
+@internal_only
+def metrics(request):
+    """Expose in-process performance counters as JSON (loopback or METRICS_TOKEN only)."""
+    return JsonResponse({
+        'model_registry': model_registry.stats(),
+        'market_data': market_data_cache.stats(),
+        'prediction_cache': prediction_cache.stats(),
+        'sessions': session_stats(),
+        'activity_log': activity_log.stats(),
+        'prediction_log': prediction_log.stats(),
+        'rate_limiter': limiter.stats(),
+        'news': news_cache.stats(),
+        'sentiment': sentiment_scores.stats(),
+        'passwords': password_hasher.stats(),
+        'user_updates': user_updates.stats(),
+        'activity_feed': activity_feed.stats(),
+    })
 
-dynamodb = boto3.resource(
-    'dynamodb',
-    region_name=settings.AWS_REGION,
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-)
 
-# Add to your imports at the top
-users_table = dynamodb.Table('Users')
-
-# Reference DynamoDB tables
-news_cache_table = dynamodb.Table('NewsCache')
-sentiment_cache_table = dynamodb.Table('SentimentCache')
-predictions_table = dynamodb.Table('Predictions')
-user_activities_table = dynamodb.Table('UserActivities')
-
-# Define mappings (replace with your actual mappings)
-company_mapping = {
-    0: 'ADANIPORTS.NS', 1: 'APOLLOHOSP.NS', 2: 'ASIANPAINT.NS', 3: 'AXISBANK.NS',
-    4: 'BAJAJ-AUTO.NS', 5: 'BAJAJFINSV.NS', 6: 'BPCL.NS', 7: 'BRITANNIA.NS', 8: 'CIPLA.NS', 9: 'COALINDIA.NS',
-    10: 'DIVISLAB.NS', 11: 'DRREDDY.NS', 12: 'EICHERMOT.NS', 13: 'GRASIM.NS', 14: 'HCLTECH.NS', 15: 'HDFCLIFE.NS',
-    16: 'HDFCBANK.NS', 17: 'HEROMOTOCO.NS', 18: 'HINDALCO.NS', 19: 'HINDUNILVR.NS', 20: 'ICICIBANK.NS',
-    21: 'INDUSINDBK.NS', 22: 'INFY.NS', 23: 'ITC.NS', 24: 'JIOFIN.NS', 25: 'JSWSTEEL.NS', 26: 'KOTAKBANK.NS',
-    27: 'LT.NS', 28: 'LTIM.NS', 29: 'M&M.NS', 30: 'MARUTI.NS', 31: 'NESTLEIND.NS', 32: 'NIFTY50.NS', 33: 'NTPC.NS',
-    34: 'ONGC.NS', 35: 'POWERGRD.NS', 36: 'RELIANCE.NS', 37: 'SBILIFE.NS', 38: 'SBIN.NS', 39: 'SUNPHARMA.NS',
-    40: 'TCS.NS', 41: 'TATACONSUM.NS', 42: 'TATAMOTORS.NS', 43: 'TATASTEEL.NS', 44: 'TECHM.NS', 45: 'TITAN.NS',
-    46: 'ULTRACEMCO.NS', 47: 'UPL.NS', 48: 'WIPRO.NS'
-}
-
-forex_mapping = {
-    0: {'name': 'AUD/USD ASK', 'model_file': 'AUD-USD-ASK.joblib', 'symbol': 'AUDUSD=X'},
-    1: {'name': 'AUD/USD BID', 'model_file': 'AUD-USD-BID.joblib', 'symbol': 'AUDUSD=X'},
-    2: {'name': 'EUR/USD ASK', 'model_file': 'EUR-USD-ASK.joblib', 'symbol': 'EURUSD=X'},
-    3: {'name': 'EUR/USD BID', 'model_file': 'EUR-USD-BID.joblib', 'symbol': 'EURUSD=X'},
-    4: {'name': 'GBP/USD ASK', 'model_file': 'GBP-USD-ASK.joblib', 'symbol': 'GBPUSD=X'},
-    5: {'name': 'GBP/USD BID', 'model_file': 'GBP-USD-BID.joblib', 'symbol': 'GBPUSD=X'},
-    6: {'name': 'NZD/USD ASK', 'model_file': 'NZD-USD-ASK.joblib', 'symbol': 'NZDUSD=X'},
-    7: {'name': 'NZD/USD BID', 'model_file': 'NZD-USD-BID.joblib', 'symbol': 'NZDUSD=X'},
-    8: {'name': 'USD/CAD ASK', 'model_file': 'USD-CAD-ASK.joblib', 'symbol': 'USDCAD=X'},
-    9: {'name': 'USD/CAD BID', 'model_file': 'USD-CAD-BID.joblib', 'symbol': 'USDCAD=X'},
-    10: {'name': 'USD/CHF ASK', 'model_file': 'USD-CHF-ASK.joblib', 'symbol': 'USDCHF=X'},
-    11: {'name': 'USD/CHF BID', 'model_file': 'USD-CHF-BID.joblib', 'symbol': 'USDCHF=X'},
-    12: {'name': 'USD/JPY ASK', 'model_file': 'USD-JPY-ASK.joblib', 'symbol': 'USDJPY=X'},
-    13: {'name': 'USD/JPY BID', 'model_file': 'USD-JPY-BID.joblib', 'symbol': 'USDJPY=X'},
-    14: {'name': 'XAG/USD ASK', 'model_file': 'XAG-USD-ASK.joblib', 'symbol': 'XAGUSD=X'},
-    15: {'name': 'XAG/USD BID', 'model_file': 'XAG-USD-BID.joblib', 'symbol': 'XAGUSD=X'},
-}
+# Configure logging
+logger = logging.getLogger(__name__)
 
+# AWS clients and tables come from app.aws, created on first use rather than at import
 
 def load_model_from_s3(bucket_name, model_key):
     """
     Downloads a model file from S3 and loads it using joblib.
     """
-    # Initialize the S3 client
-    s3 = boto3.client('s3')
+    # Shared S3 client
+    s3 = get_s3_client()
 
     # Define the local path for the downloaded model
     local_path = os.path.join('/tmp', model_key.split('/')[-1])
@@ -134,18 +112,6 @@ def api_usage(request):
     })
 
 
-def rate_limit(view_func):
-    def wrapped_view(request, *args, **kwargs):
-        user_key = f"rate_limit_{request.user.id}"
-        count = cache.get(user_key, 0)
-        if count >= 5:  # 5 requests per hour
-            return JsonResponse({"error": "Rate limit exceeded"}, status=429)
-        cache.set(user_key, count + 1, timeout=3600)  # 1 hour
-        return view_func(request, *args, **kwargs)
-
-    return wrapped_view
-
-
 def home(request):
     """Render the home page."""
     return render(request, 'home.html')
@@ -153,18 +119,13 @@ def home(request):
 @dynamodb_login_required
 def dashboard(request):
     """Render the dashboard page for authenticated users."""
-    try:
-        # Store user activity in DynamoDB
-        user_activities_table.put_item(
-            Item={
-                'UserId': str(request.user.id),
-                'Activity': 'AccessedDashboard',
-                'Timestamp': datetime.now().isoformat(),
-                'UserAgent': request.META.get('HTTP_USER_AGENT', '')
-            }
-        )
-    except ClientError as e:
-        logger.error(f"Error logging user activity: {e}")
+    # Store user activity in DynamoDB (written in the background)
+    activity_log.log({
+        'UserId': session_username(request),
+        'Activity': 'AccessedDashboard',
+        'Timestamp': datetime.now().isoformat(),
+        'UserAgent': request.META.get('HTTP_USER_AGENT', '')
+    })
 
     return render(request, 'dashboard.html', {'username': request.user.username})
 
@@ -200,58 +161,29 @@ def predict_stock(request):
                 error = "Invalid company_symbol. It should be an integer."
                 return render(request, "predict_stock.html", {"company_mapping": company_mapping, "error": error})
 
-            company = company_mapping[company_symbol]
-
-            # Fetch stock data (closing price)
-            closing_price = get_current_closing(company)
-            if closing_price is None:
-                error = "Failed to fetch stock data."
-                return render(request, "predict_stock.html", {"company_mapping": company_mapping, "error": error})
-
-            # Load model from S3 or fallback to local storage
-            try:
-                bucket_name = 'stock-forex-app'  # Replace with your S3 bucket name
-                model_key = 'models/stock_price_predictor_model.joblib'
-                s3_client.download_file(bucket_name, model_key, '/tmp/stock_price_predictor_model.joblib')
-                model = joblib.load('/tmp/stock_price_predictor_model.joblib')
-            except Exception as e:
-                logger.error(f"Error loading model: {e}")
-                error = "Model loading failed."
-                return render(request, "predict_stock.html", {"company_mapping": company_mapping, "error": error})
-
-            # Prepare data for prediction
+            # Market data, model and sentiment through the shared prediction core
             try:
-                data = pd.DataFrame({
-                    'Close_Lagged': [closing_price],
-                    'Sentiment_Score': [get_current_sentiment(company)],
-                    'Company': [company_symbol],
-                })
-                X_test = data[['Close_Lagged', 'Sentiment_Score', 'Company']]
-                prediction = model.predict(X_test)[0]
-            except Exception as e:
-                logger.error(f"Error during prediction: {e}")
-                error = "Prediction failed."
-                return render(request, "predict_stock.html", {"company_mapping": company_mapping, "error": error})
-
-            # Log prediction in DynamoDB
-            try:
-                dynamodb = boto3.resource('dynamodb',region_name='us-east-1')
-                table = dynamodb.Table('Predictions')
-                table.put_item(Item={
-                    'UserId': str(request.user.id),
-                    'PredictionType': 'Stock',
-                    'Company': company,
-                    'PredictionValue': str(prediction),
-                    'Timestamp': pd.Timestamp.now().isoformat(),
-                })
-            except ClientError as e:
-                logger.error(f"Error logging prediction: {e}")
+                result = predict_stock_price(company_symbol)
+            except PredictionError as e:
+                return render(request, "predict_stock.html", {"company_mapping": company_mapping, "error": e.message})
+            company, prediction = result['company'], result['prediction']
+
+            # Log prediction in DynamoDB (queued and written in batches off the request thread)
+            prediction_log.log({
+                'UserId': session_username(request),
+                'PredictionType': 'Stock',
+                'Company': company,
+                'PredictionValue': str(prediction),
+                'Timestamp': pd.Timestamp.now().isoformat(),
+            })
 
             # Render the template with the prediction result
-            return render(request, "predict_stock.html", {
+            response = render(request, "predict_stock.html", {
                 "company_mapping": company_mapping,
                 "prediction": prediction,
             })
+            response['X-Prediction-Cache'] = 'hit' if result['cache_hit'] else 'miss'
+            return response
 
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
@@ -259,8 +191,52 @@ def predict_stock(request):
             return JsonResponse({"error": "An unexpected error occurred."}, status=500)
 
 
+@dynamodb_login_required
 @rate_limit
+def predict_stock_batch(request):
+    """
+    Predict every requested company in one request.
+
+    Accepts ``company_symbols`` as repeated or comma-separated company_mapping keys;
+    omit it (or pass ``all``) to predict the whole company_mapping universe.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed."}, status=405)
+
+    raw_symbols = [value for item in request.POST.getlist("company_symbols") for value in item.split(",")]
+    raw_symbols = [value.strip() for value in raw_symbols if value.strip()]
+    if not raw_symbols or raw_symbols == ["all"]:
+        company_symbols = list(company_mapping)
+    else:
+        try:
+            company_symbols = list(dict.fromkeys(int(value) for value in raw_symbols))
+        except ValueError:
+            return JsonResponse({"error": "Invalid company_symbols. They should be integers."}, status=400)
+        unknown = [value for value in company_symbols if value not in company_mapping]
+        if unknown:
+            return JsonResponse({"error": f"Invalid company_symbols: {unknown}"}, status=400)
+
+    try:
+        results, errors = predict_stocks(company_symbols)
+    except Exception as e:
+        logger.error(f"Error during batch prediction: {e}")
+        return JsonResponse({"error": "Prediction failed."}, status=500)
+
+    # Log predictions in DynamoDB (queued and written in batches off the request thread)
+    for result in results:
+        prediction_log.log({
+            'UserId': session_username(request),
+            'PredictionType': 'Stock',
+            'Company': result['company'],
+            'PredictionValue': str(result['prediction']),
+            'Timestamp': pd.Timestamp.now().isoformat(),
+        })
+
+    return JsonResponse({"results": results, "errors": errors})
+
+
 @dynamodb_login_required
+@rate_limit
 def predict_forex(request):
     # Initialize variables for rendering
     prediction = None
@@ -288,208 +264,105 @@ def predict_forex(request):
                 error = "Invalid forex_symbol. It should be an integer."
                 return render(request, "predict_forex.html", {"forex_mapping": forex_mapping, "error": error})
 
-            # Get the forex pair details
-            forex_pair_details = forex_mapping[forex_symbol]
-            forex_pair_name = forex_pair_details['name']  # User-friendly name
-            model_file = forex_pair_details['model_file']  # Actual .joblib filename
-            symbol = forex_pair_details['symbol']  # Correct symbol for yfinance
-
-            # Load model from S3 or fallback to local storage
-            bucket_name = 'stock-forex-app'  # Replace with your S3 bucket name
-            model_key = f'models/{model_file}'  # Path to the model in S3
+            # Market data and model through the shared prediction core
             try:
-                s3_client.download_file(bucket_name, model_key, f'/tmp/{model_file}')
-                model = joblib.load(f'/tmp/{model_file}')
-            except Exception as e:
-                logger.error(f"Error loading model: {e}")
-                error = "Model loading failed."
-                return render(request, "predict_forex.html", {"forex_mapping": forex_mapping, "error": error})
-
-            # Prepare data for prediction
-            try:
-                closing_price = get_current_closing(symbol)
-                high_price = get_current_high(symbol)
-                low_price = get_current_low(symbol)
-                volume = get_current_volume(symbol)
-
-                if closing_price is None or high_price is None or low_price is None or volume is None:
-                    error = "Failed to fetch forex data."
-                    return render(request, "predict_forex.html", {"forex_mapping": forex_mapping, "error": error})
-
-                data = pd.DataFrame({
-                    'Close': [closing_price],
-                    'High': [high_price],
-                    'Low': [low_price],
-                    'Volume': [volume]
-                })
-                prediction = model.predict(data)[0]
-            except Exception as e:
-                logger.error(f"Error during prediction: {e}")
-                error = "Prediction failed."
-                return render(request, "predict_forex.html", {"forex_mapping": forex_mapping, "error": error})
-
-            # Log prediction in DynamoDB
-            try:
-                dynamodb = boto3.resource('dynamodb',region_name='us-east-1')
-                table = dynamodb.Table('Predictions')
-                table.put_item(Item={
-                    'UserId': str(request.user.id),
-                    'PredictionType': 'Forex',
-                    'ForexPair': forex_pair_name,  # Use the user-friendly name
-                    'PredictionValue': str(prediction),
-                    'Timestamp': pd.Timestamp.now().isoformat()
-                })
-            except ClientError as e:
-                logger.error(f"Error logging prediction: {e}")
+                result = predict_forex_price(forex_symbol)
+            except PredictionError as e:
+                return render(request, "predict_forex.html", {"forex_mapping": forex_mapping, "error": e.message})
+            forex_pair_name, prediction = result['name'], result['prediction']  # User-friendly name
+
+            # Log prediction in DynamoDB (queued and written in batches off the request thread)
+            prediction_log.log({
+                'UserId': session_username(request),
+                'PredictionType': 'Forex',
+                'ForexPair': forex_pair_name,  # Use the user-friendly name
+                'PredictionValue': str(prediction),
+                'Timestamp': pd.Timestamp.now().isoformat()
+            })
 
             # Render the template with the prediction result
-            return render(request, "predict_forex.html", {
+            response = render(request, "predict_forex.html", {
                 "forex_mapping": forex_mapping,
                 "prediction": prediction,
                 "forex_pair_name": forex_pair_name,  # Pass the user-friendly name to the frontend
             })
+            response['X-Prediction-Cache'] = 'hit' if result['cache_hit'] else 'miss'
+            return response
 
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
             error = "An unexpected error occurred."
             return render(request, "predict_forex.html", {"forex_mapping": forex_mapping, "error": error})
 
-def get_current_closing(symbol):
+@dynamodb_login_required
+@rate_limit
+def predict_forex_batch(request):
     """
-    Fetch current closing price for a stock or forex pair.
+    Predict bid, ask and spread for several forex pairs in one request.
+
+    Accepts ``pairs`` as repeated or comma-separated pair names (e.g. ``EUR/USD``);
+    omit it (or pass ``all``) to predict every pair in forex_mapping.
     """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed."}, status=405)
+
+    pair_names = [value for item in request.POST.getlist("pairs") for value in item.split(",")]
+    pair_names = [value.strip().upper() for value in pair_names if value.strip()]
+    if not pair_names or pair_names == ["ALL"]:
+        pair_names = list(forex_pairs)
+    else:
+        pair_names = list(dict.fromkeys(pair_names))
+        unknown = [name for name in pair_names if name not in forex_pairs]
+        if unknown:
+            return JsonResponse({"error": f"Invalid pairs: {unknown}"}, status=400)
+
     try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period="1d")
-        if data.empty:
-            raise ValueError(f"No data found for symbol: {symbol}")
-        return data['Close'].iloc[-1]
+        results, errors = predict_forex_pairs(pair_names)
     except Exception as e:
-        logger.error(f"Error fetching closing price for {symbol}: {e}")
-        return None
+        logger.error(f"Error during forex batch prediction: {e}")
+        return JsonResponse({"error": "Prediction failed."}, status=500)
+
+    # Log predictions in DynamoDB (queued and written in batches off the request thread)
+    for result in results:
+        for side in ('ASK', 'BID'):
+            prediction_log.log({
+                'UserId': session_username(request),
+                'PredictionType': 'Forex',
+                'ForexPair': f"{result['pair']} {side}",
+                'PredictionValue': str(result[side.lower()]),
+                'Timestamp': pd.Timestamp.now().isoformat(),
+            })
+
+    return JsonResponse({"results": results, "errors": errors})
+
+def get_current_closing(symbol):
+    """
+    Fetch current closing price for a stock or forex pair.
+    """
+    bar = get_latest_bar(symbol)
+    return bar['Close'] if bar is not None else None
 
 def get_current_high(symbol):
     """
     Fetch current high price for a stock or forex pair.
     """
-    try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period="1d")
-        if data.empty:
-            raise ValueError(f"No data found for symbol: {symbol}")
-        return data['High'].iloc[-1]
-    except Exception as e:
-        logger.error(f"Error fetching high price for {symbol}: {e}")
-        return None
+    bar = get_latest_bar(symbol)
+    return bar['High'] if bar is not None else None
 
 def get_current_low(symbol):
     """
     Fetch current low price for a stock or forex pair.
     """
-    try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period="1d")
-        if data.empty:
-            raise ValueError(f"No data found for symbol: {symbol}")
-        return data['Low'].iloc[-1]
-    except Exception as e:
-        logger.error(f"Error fetching low price for {symbol}: {e}")
-        return None
+    bar = get_latest_bar(symbol)
+    return bar['Low'] if bar is not None else None
 
 def get_current_volume(symbol):
     """
     Fetch current trading volume for a stock or forex pair.
     """
-    try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period="1d")
-        if data.empty:
-            raise ValueError(f"No data found for symbol: {symbol}")
-        return data['Volume'].iloc[-1]
-    except Exception as e:
-        logger.error(f"Error fetching volume for {symbol}: {e}")
-        return None
-
-# Load environment variables
-GNEWS_API_KEY = os.getenv('GNEWS_API_KEY')
-GNEWS_BASE_URL = "https://gnews.io/api/v4/search"
-
-
-def fetch_recent_news(company_name):
-    """
-    Fetch recent news articles about a company using the GNews API.
-    Cache results in DynamoDB to minimize API calls.
-    Track daily API usage to stay within Free Tier limits (100 requests/day).
-    """
-    try:
-        # Check if cached news exists and is less than 24 hours old
-        response = news_cache_table.get_item(Key={'Company': company_name})
-        if 'Item' in response:
-            item = response['Item']
-            timestamp = datetime.fromisoformat(item['Timestamp'])
-            if datetime.now() - timestamp < timedelta(hours=24):
-                return item['Articles']
-    except ClientError as e:
-        print(f"Error accessing DynamoDB: {e}")
-
-    # Check daily API usage counter
-    news_counter_key = "gnews_daily_counter"
-    count = cache.get(news_counter_key, 0)
-    if count >= 100:  # GNews Free Tier limit
-        print("Daily GNews API limit reached. Using cached data only.")
-        return []
-
-    # Fetch news from GNews API
-    try:
-        params = {
-            'q': company_name,
-            'lang': 'en',
-            'max': 5,
-            'apikey': GNEWS_API_KEY
-        }
-        response = requests.get(GNEWS_BASE_URL, params=params)
-        print(GNEWS_BASE_URL)
-        print(requests.get(GNEWS_BASE_URL, params=params))
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-
-            # Cache the result in DynamoDB
-            news_cache_table.put_item(
-                Item={
-                    'Company': company_name,
-                    'Articles': articles,
-                    'Timestamp': datetime.now().isoformat()
-                }
-            )
-
-            # Increment daily API usage counter
-            cache.set(news_counter_key, count + 1, timeout=86400)  # Reset after 24 hours
-            return articles
-        else:
-            print(f"Error fetching news: {response.status_code}")
-            return []
-    except Exception as e:
-        print(f"Unexpected error in fetching news: {e}")
-        return []
-
-
-def get_current_sentiment(company):
-    """
-    Fetch sentiment score for a company.
-    Since sentiment analysis is removed, always return 0.5 (neutral sentiment).
-    """
-    return 0.5
-
-
-# Helper functions for password hashing
-def hash_password(password):
-    """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    bar = get_latest_bar(symbol)
+    return bar['Volume'] if bar is not None else None
 
-def check_password(password, hashed_password):
-    """Check if password matches the hashed version"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def register(request):
     if request.method == 'POST':
@@ -510,17 +383,12 @@ def register(request):
             return render(request, 'register.html')
 
         try:
-            # Check if user exists
-            response = users_table.get_item(Key={'username': username})
-            if 'Item' in response:
-                messages.error(request, 'Username already exists.')
-                return render(request, 'register.html')
-
             # Hash the password
             hashed_password = hash_password(password)
 
-            # Create new user in DynamoDB
-            users_table.put_item(
+            # Create new user in DynamoDB; the condition makes the existence check
+            # and the write one atomic call
+            get_table('Users').put_item(
                 Item={
                     'username': username,
                     'email': email,
@@ -528,13 +396,20 @@ def register(request):
                     'created_at': datetime.now().isoformat(),
                     'last_login': None,
                     'is_active': True
-                }
+                },
+                ConditionExpression='attribute_not_exists(username)'
             )
 
             messages.success(request, 'Registration successful! Please login.')
             return redirect('login')
 
+        except PasswordHasherBusy:
+            messages.error(request, 'The server is busy. Please try again shortly.')
+            return render(request, 'register.html', status=503)
         except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                messages.error(request, 'Username already exists.')
+                return render(request, 'register.html')
             logger.error(f"Error during registration: {e}")
             messages.error(request, 'Registration failed. Please try again.')
             return render(request, 'register.html')
@@ -542,6 +417,11 @@ def register(request):
     return render(request, 'register.html')
 
 def user_login(request):
+    """
+    Log a user in with one DynamoDB call on the request path: the GetItem on Users
+    (plus the session write). The activity record and last_login update are queued
+    and written in the background; only a bcrypt cost upgrade adds a synchronous write.
+    """
     if request.method == 'POST':
         username = request.POST.get('username')
         password = request.POST.get('password')
@@ -552,7 +432,7 @@ def user_login(request):
 
         try:
             # Get user from DynamoDB
-            response = users_table.get_item(Key={'username': username})
+            response = get_table('Users').get_item(Key={'username': username})
             user_data = response.get('Item')
 
             if not user_data:
@@ -569,23 +449,34 @@ def user_login(request):
                 messages.error(request, 'Account is disabled.')
                 return render(request, 'login.html')
 
-            # Log activity
-            user_activities_table.put_item(
-                Item={
-                    'UserId': username,
-                    'Activity': 'Login',
-                    'Timestamp': datetime.now().isoformat(),
-                    'IPAddress': request.META.get('REMOTE_ADDR', ''),
-                    'UserAgent': request.META.get('HTTP_USER_AGENT', '')
-                }
-            )
+            # Log activity (written in the background)
+            activity_log.log({
+                'UserId': username,
+                'Activity': 'Login',
+                'Timestamp': datetime.now().isoformat(),
+                'IPAddress': request.META.get('REMOTE_ADDR', ''),
+                'UserAgent': request.META.get('HTTP_USER_AGENT', '')
+            })
 
-            # Update last login timestamp
-            users_table.update_item(
-                Key={'username': username},
-                UpdateExpression='SET last_login = :val',
-                ExpressionAttributeValues={':val': datetime.now().isoformat()}
-            )
+            # Update last login timestamp (coalesced and written in the background)
+            user_updates.update(username, last_login=datetime.now().isoformat())
+
+            # Upgrade the stored hash if the bcrypt cost changed, unless the password
+            # was changed concurrently
+            if password_hasher.needs_rehash(user_data['password']):
+                try:
+                    get_table('Users').update_item(
+                        Key={'username': username},
+                        UpdateExpression='SET password = :pw',
+                        ConditionExpression='password = :old',
+                        ExpressionAttributeValues={
+                            ':pw': password_hasher.rehash(password),
+                            ':old': user_data['password'],
+                        }
+                    )
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
 
             # Store user information in session
             request.session['user'] = {
@@ -596,6 +487,9 @@ def user_login(request):
             messages.success(request, 'Login successful!')
             return redirect('home')
 
+        except PasswordHasherBusy:
+            messages.error(request, 'The server is busy. Please try again shortly.')
+            return render(request, 'login.html', status=503)
         except ClientError as e:
             logger.error(f"Error during login: {e}")
             messages.error(request, 'Login failed. Please try again.')
@@ -618,7 +512,7 @@ def change_password(request):
 
         try:
             # Get user from DynamoDB
-            response = users_table.get_item(Key={'username': request.user.username})
+            response = get_table('Users').get_item(Key={'username': request.user.username})
             user_data = response.get('Item')
 
             if not user_data:
@@ -631,7 +525,7 @@ def change_password(request):
                 return redirect('profile')
 
             # Update password
-            users_table.update_item(
+            get_table('Users').update_item(
                 Key={'username': request.user.username},
                 UpdateExpression='SET password = :val',
                 ExpressionAttributeValues={
@@ -642,6 +536,9 @@ def change_password(request):
             messages.success(request, 'Password changed successfully!')
             return redirect('profile')
 
+        except PasswordHasherBusy:
+            messages.error(request, 'The server is busy. Please try again shortly.')
+            return redirect('profile')
         except ClientError as e:
             logger.error(f"Error changing password: {e}")
             messages.error(request, 'Failed to change password. Please try again.')
@@ -653,19 +550,15 @@ def change_password(request):
 def custom_logout(request):
     try:
         # Log logout event in the UserActivity table
-        if request.user.is_authenticated:
-            dynamodb = boto3.resource('dynamodb', region_name='us-east-1')  # Replace with your AWS region
-            table = dynamodb.Table('UserActivities')  # Use the UserActivity table
-
-            table.put_item(
-                Item={
-                    'UserId': str(request.user.id),
-                    'Activity': 'Logout',
-                    'Timestamp': datetime.now().isoformat(),
-                    'IPAddress': request.META.get('REMOTE_ADDR', ''),
-                    'UserAgent': request.META.get('HTTP_USER_AGENT', ''),
-                }
-            )
+        username = session_username(request)
+        if username:
+            activity_log.log({
+                'UserId': username,
+                'Activity': 'Logout',
+                'Timestamp': datetime.now().isoformat(),
+                'IPAddress': request.META.get('REMOTE_ADDR', ''),
+                'UserAgent': request.META.get('HTTP_USER_AGENT', ''),
+            })
 
         # Perform logout using Django's built-in logout function
         auth_logout(request)
@@ -685,34 +578,44 @@ def custom_logout(request):
 @dynamodb_login_required
 def user_profile(request):
     """
-    Display user profile with activity history.
+    Display user profile with activity history, one page at a time
+    (``?cursor=`` comes from the previous page's "Older activity" link).
     """
-    try:
-        # Fetch user activities from DynamoDB
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table('UserActivities')
-        response = table.query(
-            KeyConditionExpression='UserId = :uid',
-            ExpressionAttributeValues={':uid': str(request.user.id)},
-            Limit=10,  # Show the last 10 activities
-            ScanIndexForward=False  # Sort by most recent first
-        )
-        activities = response.get('Items', [])
-    except ClientError as e:
-        logger.error(f"Error fetching user activities: {e}")
-        activities = []
+    username = session_username(request)
+    activities, next_cursor = activity_feed.safe_page(username, request.GET.get('cursor'))
 
     return render(request, 'profile.html', {
         'user': request.user,
-        'activities': activities
+        'username': username,
+        'activities': activities,
+        'next_cursor': next_cursor,
     })
 
+
+@dynamodb_login_required
+def activity_feed_api(request):
+    """
+    JSON page of the user's activity, newest first.
+    Query parameters: ``cursor`` (``next_cursor`` from the previous page) and ``limit``.
+    """
+    try:
+        limit = int(request.GET.get('limit', activity_feed.page_size))
+    except ValueError:
+        return JsonResponse({"error": "Invalid limit."}, status=400)
+    try:
+        activities, next_cursor = activity_feed.page(session_username(request), request.GET.get('cursor'), limit)
+    except InvalidCursor as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f"Error fetching user activities: {e}")
+        return JsonResponse({"error": "Failed to fetch activity."}, status=503)
+    return JsonResponse({"activities": activities, "next_cursor": next_cursor})
+
 # # Add these helper functions for DynamoDB user operations
 def create_dynamodb_user(username, email, password):
     """Create a new user in DynamoDB"""
     try:
-        users_table = dynamodb.Table('Users')
-        users_table.put_item(
+        get_table('Users').put_item(
             Item={
                 'username': username,
                 'email': email,
@@ -734,8 +637,7 @@ def create_dynamodb_user(username, email, password):
 def get_dynamodb_user(username):
     """Retrieve a user from DynamoDB"""
     try:
-        users_table = dynamodb.Table('Users')
-        response = users_table.get_item(Key={'username': username})
+        response = get_table('Users').get_item(Key={'username': username})
         return response.get('Item')
     except ClientError as e:
         logger.error(f"Error fetching user: {e}")
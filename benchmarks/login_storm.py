@@ -0,0 +1,127 @@
+"""
+Benchmark: how a login storm affects other endpoints.
+
+Runs the Django app in-process with DynamoDB served by moto. ``--logins`` threads
+log in as fast as they can for ``--duration`` seconds while one probe thread
+requests /health/. Every login runs one bcrypt check. The run is repeated with
+bcrypt inline on the request threads (PASSWORD_HASH_WORKERS=0) and in the
+password-hashing process pool. The benchmark reports login throughput and the
+probe's latency percentiles.
+
+    python benchmarks/login_storm.py [--logins 8] [--duration 5] [--rounds 12] [--workers 2]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_forex_app.settings')
+os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+import boto3  # noqa: E402
+import django  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from app import aws  # noqa: E402
+from app.passwords import password_hasher  # noqa: E402
+
+
+def create_tables():
+    resource = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
+    resource.create_table(
+        TableName='Users',
+        KeySchema=[{'AttributeName': 'username', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'username', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    resource.create_table(
+        TableName='UserActivities',
+        KeySchema=[{'AttributeName': 'UserId', 'KeyType': 'HASH'},
+                   {'AttributeName': 'Timestamp', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'UserId', 'AttributeType': 'S'},
+                              {'AttributeName': 'Timestamp', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    resource.create_table(
+        TableName=settings.DYNAMODB_SESSIONS_TABLE_NAME,
+        KeySchema=[{'AttributeName': 'session_key', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'session_key', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    return resource
+
+
+def storm(name, logins, duration):
+    stop = threading.Event()
+    completed = []
+    latencies = []
+
+    def login_loop(index):
+        client = Client()
+        count = 0
+        while not stop.is_set():
+            client.post('/login/', {'username': f'storm{index}', 'password': 'storm-password'})
+            count += 1
+        completed.append(count)
+
+    def probe_loop():
+        client = Client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/health/')
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(logins)]
+    threads.append(threading.Thread(target=probe_loop))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f'{name:<7} logins/s {sum(completed) / duration:7.1f}   '
+          f'/health/ p50 {statistics.median(latencies):7.2f} ms  p99 {p99:7.2f} ms  max {latencies[-1]:7.2f} ms')
+
+
+@mock_aws
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=8, help="Concurrent login threads.")
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rounds', type=int, default=settings.BCRYPT_ROUNDS)
+    parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    aws.reset_clients()
+    users = create_tables().Table('Users')
+    password_hasher._rounds = args.rounds
+    password_hasher._workers = 0
+    hashed = password_hasher.hash('storm-password')
+    for i in range(args.logins):
+        users.put_item(Item={'username': f'storm{i}', 'password': hashed, 'is_active': True})
+
+    storm('inline', args.logins, args.duration)
+
+    password_hasher.shutdown()
+    password_hasher._workers = args.workers
+    password_hasher.warm()
+    storm('pool', args.logins, args.duration)
+    password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Microbenchmark: cost of a stock prediction with and without the prediction cache.
+
+Scores one company on a fixed bar with the bundled stock model. ``miss`` clears
+the cache before every call, so it pays for building the feature frame and
+model.predict. ``hit`` serves the same prediction from the cache. S3 and
+DynamoDB are served in-process by moto (the model loads from the local copy).
+
+    python benchmarks/prediction_cache.py [--iterations 2000]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_forex_app.settings')
+os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+import django  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+django.setup()
+
+from app.model_registry import STOCK_MODEL_FILE  # noqa: E402
+from app.predictions import load_model, prediction_cache, score_stock  # noqa: E402
+
+BAR = {'Timestamp': '2025-04-08T00:00:00+00:00', 'Open': 1190.0, 'High': 1210.0, 'Low': 1185.0,
+       'Close': 1200.0, 'Volume': 1000.0}
+
+
+def run(name, iterations, clear):
+    model, version = load_model(STOCK_MODEL_FILE)
+    score_stock(0, BAR, model, version)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if clear:
+            prediction_cache.clear()
+        score_stock(0, BAR, model, version)
+    elapsed = time.perf_counter() - started
+    print(f'{name:<5} {elapsed / iterations * 1e6:10.1f} us/prediction')
+
+
+@mock_aws
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')
+
+    run('miss', args.iterations, clear=True)
+    run('hit', args.iterations, clear=False)
+
+
+if __name__ == '__main__':
+    main()
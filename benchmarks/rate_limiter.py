@@ -0,0 +1,91 @@
+"""
+Microbenchmark: per-request overhead of the rate limiter.
+
+Times the previous get/set check against app.ratelimit's sliding-window
+limiter on the configured Django cache (LocMemCache unless
+DJANGO_CACHE_BACKEND says otherwise), then fires a burst of concurrent
+requests at a 5/hour quota to show how many each one admits.
+
+    python benchmarks/rate_limiter.py [--iterations 20000] [--threads 32]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_forex_app.settings')
+os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+
+from app.ratelimit import SlidingWindowLimiter  # noqa: E402
+
+LIMIT = 5
+PERIOD = 3600
+
+
+def legacy_check(identity, yield_between=False):
+    """What rate_limit used to do: read the count, then write it back."""
+    key = f"rate_limit_{identity}"
+    count = cache.get(key, 0)
+    if count >= LIMIT:
+        return False
+    if yield_between:
+        time.sleep(0)  # Let other threads run between the read and the write, as a network cache would
+    cache.set(key, count + 1, timeout=PERIOD)
+    return True
+
+
+limiter = SlidingWindowLimiter()
+
+
+def sliding_check(identity):
+    return limiter.hit('benchmark', identity, LIMIT, PERIOD)[0]
+
+
+def time_check(name, check, iterations):
+    cache.clear()
+    started = time.perf_counter()
+    for i in range(iterations):
+        check(f'user:{i % 1000}')
+    elapsed = time.perf_counter() - started
+    print(f'{name:<8} {elapsed / iterations * 1e6:8.2f} us/request')
+
+
+def burst(name, check, threads):
+    cache.clear()
+    barrier = threading.Barrier(threads)
+    admitted = []
+
+    def worker():
+        barrier.wait()
+        admitted.append(check('user:burst'))
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    print(f'{name:<8} admitted {admitted.count(True)} of {threads} concurrent requests (quota {LIMIT})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    time_check('legacy', legacy_check, args.iterations)
+    time_check('sliding', sliding_check, args.iterations)
+    burst('legacy', lambda identity: legacy_check(identity, yield_between=True), args.threads)
+    burst('sliding', sliding_check, args.threads)
+
+
+if __name__ == '__main__':
+    main()
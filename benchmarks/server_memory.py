@@ -0,0 +1,163 @@
+"""
+Per-pod memory and throughput of the gunicorn setups.
+
+Starts gunicorn twice on a free port with the same number of worker processes:
+
+* ``legacy``  -- the previous Dockerfile command: sync workers, no config file,
+  so every worker imports the app and loads its own copy of the models;
+* ``prefork`` -- gunicorn.conf.py: the app, libraries and models are loaded in
+  the master before fork, and workers run ``--threads`` threads each.
+
+For each it reports the time to the first response and until every worker has
+booted, requests/s for a fixed number of concurrent clients, and memory summed
+over the master and workers:
+RSS counts shared pages once per process, PSS splits them between the sharers,
+so PSS is the real per-pod footprint. Linux only (/proc).
+
+S3 is pointed at a closed local port, so models load from the bundled copies.
+
+    python benchmarks/server_memory.py [--workers 4] [--threads 4] [--clients 16] [--duration 10]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENV = dict(
+    os.environ,
+    DJANGO_SETTINGS_MODULE='stock_forex_app.settings',
+    DJANGO_SECRET_KEY=os.environ.get('DJANGO_SECRET_KEY', 'benchmark'),
+    AWS_ACCESS_KEY_ID=os.environ.get('AWS_ACCESS_KEY_ID', 'testing'),
+    AWS_SECRET_ACCESS_KEY=os.environ.get('AWS_SECRET_ACCESS_KEY', 'testing'),
+    AWS_ENDPOINT_URL='http://127.0.0.1:9',
+    AWS_MAX_ATTEMPTS='1',
+    PYTHONWARNINGS='ignore',
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The command name may contain spaces; fields resume after the last ')'
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        found.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return found
+
+
+def cpu_ticks(pids):
+    total = 0
+    for pid in pids:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        total += int(fields[11]) + int(fields[12])  # utime + stime
+    return total
+
+
+def settle(pid, quiet=0.5):
+    """Wait until the server and its workers stop using CPU, i.e. every worker has booted."""
+    previous = None
+    while True:
+        ticks = cpu_ticks([pid] + children(pid))
+        if ticks == previous:
+            return
+        previous = ticks
+        time.sleep(quiet)
+
+
+def memory_kb(pids):
+    totals = {'Rss': 0, 'Pss': 0}
+    for pid in pids:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                field, value = line.split(':', 1)
+                if field in totals:
+                    totals[field] += int(value.split()[0])
+    return totals
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        response.read()
+        return response.status
+
+
+def load(url, clients, duration):
+    counts = [0] * clients
+    deadline = time.perf_counter() + duration
+
+    def client(i):
+        while time.perf_counter() < deadline:
+            if get(url) == 200:
+                counts[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+
+def run(name, extra_args, env, args):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', 'stock_forex_app.wsgi:application',
+               '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers), *extra_args]
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if server.poll() is not None or time.perf_counter() - started > 120:
+                raise RuntimeError(f'{name}: gunicorn did not start')
+            try:
+                if len(children(server.pid)) == args.workers and get(f'http://127.0.0.1:{port}/health/') == 200:
+                    break
+            except OSError:
+                time.sleep(0.05)
+        first_response = time.perf_counter() - started
+        settle(server.pid)
+        ready = time.perf_counter() - started
+
+        url = f'http://127.0.0.1:{port}{args.path}'
+        load(url, args.clients, 1)  # Warm-up
+        throughput = load(url, args.clients, args.duration)
+        memory = memory_kb([server.pid] + children(server.pid))
+        print(f'{name:<8} first response {first_response:5.1f} s   all booted {ready:5.1f} s   '
+              f'{throughput:6.0f} req/s   RSS {memory["Rss"] / 1024:7.0f} MB   PSS {memory["Pss"] / 1024:7.0f} MB')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--path', default='/metrics/')
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers, {args.clients} concurrent clients on {args.path} for {args.duration:g} s')
+    run('legacy', ['--config', '/dev/null'], ENV, args)
+    run('prefork', ['--config', 'gunicorn.conf.py'], dict(ENV, GUNICORN_THREADS=str(args.threads)), args)
+
+
+if __name__ == '__main__':
+    main()
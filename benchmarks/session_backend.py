@@ -0,0 +1,96 @@
+"""
+Microbenchmark: per-request cost of the DynamoDB session backend.
+
+Compares the previous per-request pattern (a new boto3 resource plus a
+DescribeTable check before every GetItem) with the shared resource and
+once-per-process table check in app.dynamodb_session_backend. DynamoDB is
+served in-process by moto, so the numbers isolate client-side overhead and
+API call counts rather than network latency.
+
+    python benchmarks/session_backend.py [--iterations 500]
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_forex_app.settings')
+os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+import boto3  # noqa: E402
+import django  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from app import aws  # noqa: E402
+from app.dynamodb_session_backend import SessionStore  # noqa: E402
+
+calls = collections.Counter()
+
+
+def count_call(event_name, **kwargs):
+    calls[event_name.rsplit('.', 1)[-1]] += 1
+
+
+def legacy_load(session_key):
+    """What every request used to do: build a resource, DescribeTable, then GetItem."""
+    dynamodb = boto3.resource(
+        'dynamodb',
+        region_name=settings.AWS_REGION,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+    )
+    table = dynamodb.Table(settings.DYNAMODB_SESSIONS_TABLE_NAME)
+    table.table_status
+    return table.get_item(Key={'session_key': session_key}, ConsistentRead=True)
+
+
+def shared_load(session_key):
+    return SessionStore(session_key).load()
+
+
+def run(name, func, session_key, iterations):
+    calls.clear()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(session_key)
+    elapsed = time.perf_counter() - started
+    per_request = ', '.join(f'{op} {count / iterations:g}' for op, count in sorted(calls.items()))
+    print(f'{name:<8} {elapsed / iterations * 1000:8.3f} ms/request   API calls/request: {per_request}')
+
+
+@mock_aws
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    # Count API calls made by every client created from the default session
+    boto3.setup_default_session()
+    boto3.DEFAULT_SESSION.events.register('before-call.dynamodb.*', count_call)
+    aws.reset_clients()
+
+    resource = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
+    resource.create_table(
+        TableName=settings.DYNAMODB_SESSIONS_TABLE_NAME,
+        KeySchema=[{'AttributeName': 'session_key', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'session_key', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    store = SessionStore()
+    store['user'] = {'username': 'benchmark', 'is_authenticated': True}
+    store.save(must_create=True)
+
+    run('legacy', legacy_load, store.session_key, args.iterations)
+    run('shared', shared_load, store.session_key, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
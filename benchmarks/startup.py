@@ -0,0 +1,155 @@
+"""
+Startup profile: what a fresh worker process imports and how long it takes to
+answer its first request.
+
+Every measurement runs in a new interpreter so nothing is already imported:
+
+* an ``-X importtime`` report of ``app.urls``, grouped by top-level package;
+* time from interpreter start to the first /health/ response through the WSGI
+  handler, with the settings from the environment (importing the WSGI module
+  loads no models, so this is what any non-gunicorn server pays);
+* with ``--gunicorn``, time from launching gunicorn with gunicorn.conf.py to its
+  first /health/ response over HTTP, once with preload_app (the master runs
+  app.prefork.warm, models included when MODEL_REGISTRY_WARM_ON_START is set,
+  before forking) and once without.
+
+Pass ``--budget-ms`` to exit non-zero when the median time to first response
+exceeds it, so the benchmark can guard against cold-start regressions.
+
+    python benchmarks/startup.py [--runs 5] [--top 15] [--gunicorn] [--budget-ms 1500]
+"""
+import argparse
+import collections
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENV = dict(
+    os.environ,
+    DJANGO_SETTINGS_MODULE='stock_forex_app.settings',
+    DJANGO_SECRET_KEY=os.environ.get('DJANGO_SECRET_KEY', 'benchmark'),
+    AWS_ACCESS_KEY_ID=os.environ.get('AWS_ACCESS_KEY_ID', 'testing'),
+    AWS_SECRET_ACCESS_KEY=os.environ.get('AWS_SECRET_ACCESS_KEY', 'testing'),
+    PYTHONPATH=ROOT,
+)
+
+HEAVY_MODULES = ('pandas', 'numpy', 'sklearn', 'yfinance', 'joblib', 'boto3', 'requests')
+
+IMPORT_APP = 'import django; django.setup(); import app.urls'
+
+FIRST_RESPONSE = f"""
+import json, sys, time
+started = time.perf_counter()
+from stock_forex_app.wsgi import application
+imported = time.perf_counter()
+status = []
+environ = {{
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': '/health/', 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'wsgi.url_scheme': 'http', 'wsgi.input': sys.stdin.buffer,
+    'wsgi.errors': sys.stderr,
+}}
+b''.join(application(environ, lambda s, h, exc_info=None: status.append(s)))
+done = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'first_response_ms': (done - started) * 1000,
+    'status': status[0],
+    'heavy_loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=ENV, capture_output=True, text=True, check=True)
+
+
+def importtime_report(top):
+    """Self time per top-level package for importing app.urls, largest first."""
+    stderr = python('-X', 'importtime', '-c', IMPORT_APP).stderr
+    by_package = collections.Counter()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        by_package[name.strip().split('.')[0]] += int(self_us)
+    total = sum(by_package.values())
+    print(f'import app.urls: {total / 1000:.0f} ms total self time')
+    for package, us in by_package.most_common(top):
+        print(f'  {package:<28} {us / 1000:8.1f} ms')
+
+
+def first_response(runs):
+    results = [json.loads(python('-c', FIRST_RESPONSE).stdout) for _ in range(runs)]
+    imports = [r['import_ms'] for r in results]
+    firsts = [r['first_response_ms'] for r in results]
+    print(f'wsgi import        median {statistics.median(imports):7.0f} ms   min {min(imports):7.0f} ms')
+    print(f'first /health/     median {statistics.median(firsts):7.0f} ms   min {min(firsts):7.0f} ms'
+          f'   status {results[0]["status"]}')
+    print(f'heavy modules loaded before first response: {", ".join(results[0]["heavy_loaded"]) or "none"}')
+    return statistics.median(firsts)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def gunicorn_boot(runs, preload, timeout=60):
+    times = []
+    env = dict(ENV, GUNICORN_PRELOAD='TRUE' if preload else 'FALSE')
+    for _ in range(runs):
+        port = free_port()
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'stock_forex_app.wsgi:application',
+             '--bind', f'127.0.0.1:{port}', '--workers', '1'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if time.perf_counter() - started > timeout or proc.poll() is not None:
+                    raise RuntimeError('gunicorn did not start')
+                try:
+                    with urllib.request.urlopen(f'http://127.0.0.1:{port}/health/', timeout=1) as response:
+                        if response.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.01)
+            times.append((time.perf_counter() - started) * 1000)
+        finally:
+            proc.terminate()
+            proc.wait()
+    label = 'preload' if preload else 'no preload'
+    print(f'gunicorn boot ({label:<10}) to first /health/   median {statistics.median(times):7.0f} ms'
+          f'   min {min(times):7.0f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--gunicorn', action='store_true', help='also time gunicorn boots with and without preload')
+    parser.add_argument('--budget-ms', type=float, help='fail if the median first response is slower')
+    args = parser.parse_args()
+
+    importtime_report(args.top)
+    print(f'MODEL_REGISTRY_WARM_ON_START={os.environ.get("MODEL_REGISTRY_WARM_ON_START", "TRUE")}')
+    median = first_response(args.runs)
+    if args.gunicorn:
+        gunicorn_boot(args.runs, preload=True)
+        gunicorn_boot(args.runs, preload=False)
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f'FAIL: first response {median:.0f} ms exceeds budget {args.budget_ms:.0f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: wall-clock time of manage.py train_models by worker count.
+
+Builds a synthetic OHLCV store (random-walk daily bars for every company and
+forex symbol) in a temporary directory and trains all 17 models with 1 worker
+and then with each of ``--workers``. Each worker is limited to ``cpus // workers``
+BLAS threads. Artifacts go to a temporary directory; the models/ copies are not touched.
+
+    python benchmarks/training.py [--bars 5000] [--workers 2 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_forex_app.settings')
+os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.mappings import company_mapping, forex_mapping  # noqa: E402
+from app.ohlcv_store import OHLCVStore  # noqa: E402
+from app.training import train_all  # noqa: E402
+
+
+def build_store(root, bars):
+    store = OHLCVStore(root)
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2000-01-01', periods=bars, freq='D', tz='UTC')
+    symbols = set(company_mapping.values()) | {details['symbol'] for details in forex_mapping.values()}
+    for symbol in sorted(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+        store.append(symbol, pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                                           'Close': close, 'Volume': rng.integers(1, 10**6, bars)}, index=index))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[os.cpu_count() or 1])
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')
+
+    with tempfile.TemporaryDirectory() as store_root, tempfile.TemporaryDirectory() as output:
+        build_store(store_root, args.bars)
+        print(f'{os.cpu_count()} CPUs, {args.bars} bars per symbol')
+        baseline = None
+        for workers in [1] + [w for w in args.workers if w != 1]:
+            _, manifest = train_all(store_root, output, workers=workers, version=f'w{workers}')
+            baseline = baseline or manifest['wall_seconds']
+            print(f'workers={workers:<3} threads={manifest["threads_per_worker"]:<3} '
+                  f'{manifest["wall_seconds"]:8.2f} s  speedup {baseline / manifest["wall_seconds"]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
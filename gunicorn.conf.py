@@ -0,0 +1,48 @@
+# gunicorn.conf.py
+#
+# Production server settings, picked up automatically when gunicorn runs from
+# the project root:
+#
+#     gunicorn stock_forex_app.wsgi:application
+#
+# With GUNICORN_PRELOAD=TRUE (the default) the master imports the app, the
+# heavy libraries and every model once (app.prefork.warm) and then forks, so
+# workers share those pages copy-on-write instead of each loading their own
+# copy. Each worker re-creates its AWS and database connections in post_fork.
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Worker processes, and threads per worker. Threads share one copy of the models
+# and serve I/O-bound requests (DynamoDB, S3, market data) concurrently; with
+# more than one thread gunicorn uses the gthread worker.
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Load the app in the master before forking
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'TRUE') == 'TRUE'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers after this many requests (0 disables); replacements are forked
+# from the warm master, so this is cheap with preload_app
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+
+def when_ready(server):
+    if preload_app:
+        from app.prefork import warm
+
+        warm()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app.prefork import reset_after_fork
+
+        reset_after_fork()
@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 # from dotenv import load_dotenv
@@ -17,6 +18,11 @@ DEBUG = os.environ.get("DEBUG", "FALSE") == "TRUE"  # Convert string to boolean
 
 # Root URL configuration
 ROOT_URLCONF = 'stock_forex_app.urls'
+
+# Serve predict_stock, predict_forex, dashboard and user_profile from app/async_views.py.
+# Enable when running under ASGI, e.g.
+#   gunicorn stock_forex_app.asgi:application -k uvicorn.workers.UvicornWorker
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'FALSE') == 'TRUE'
 LOGIN_URL = '/login/'
 
 # AWS Configuration
@@ -31,6 +37,120 @@ AWS_DEFAULT_ACL = None
 STATIC_URL = f"https://d1bomvpkbhm8k4.cloudfront.net/static/"
 DYNAMODB_SESSIONS_TABLE_NAME='django_sessions'
 
+# Model registry: models are loaded once per process and the S3 ETag is
+# re-checked in the background at most every MODEL_REGISTRY_CHECK_INTERVAL
+# seconds (0 disables). MODEL_REGISTRY_WARM_ON_START loads every model in the
+# gunicorn master before it forks (gunicorn.conf.py); other servers load each
+# model on first use.
+MODEL_BUCKET_NAME = os.environ.get('MODEL_BUCKET_NAME', AWS_STORAGE_BUCKET_NAME)
+MODEL_KEY_PREFIX = 'models/'
+MODEL_CACHE_DIR = os.environ.get('MODEL_CACHE_DIR', '/tmp')
+MODEL_LOCAL_DIR = BASE_DIR / 'models'
+MODEL_REGISTRY_CHECK_INTERVAL = int(os.environ.get('MODEL_REGISTRY_CHECK_INTERVAL', 300))
+MODEL_REGISTRY_WARM_ON_START = os.environ.get('MODEL_REGISTRY_WARM_ON_START', 'TRUE') == 'TRUE'
+
+# Cache: LocMemCache is per process; point this at a shared backend (e.g.
+# django.core.cache.backends.redis.RedisCache with redis://host:6379/0, as in
+# docker-compose.yml) to share market data, fetch locks, rate-limit and GNews quota
+# counters across workers and with the prefetcher. MARKET_DATA_PREFETCHED needs one.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+
+# Prediction cache: model outputs per (model version, symbol, bar, sentiment score), kept
+# in-process. Keys change with every new bar, model or sentiment score, so no TTL is needed.
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 4096))
+
+# Market data cache: bars live for one bar interval, capped at MARKET_DATA_MAX_TTL seconds
+MARKET_DATA_MAX_TTL = int(os.environ.get('MARKET_DATA_MAX_TTL', 300))
+MARKET_DATA_LOCK_TIMEOUT = 10  # Seconds a worker may hold the fetch lock for a symbol
+MARKET_DATA_POLL_INTERVAL = 0.05  # Seconds between polls while another worker fetches
+MARKET_DATA_FETCH_WORKERS = int(os.environ.get('MARKET_DATA_FETCH_WORKERS', 8))  # Concurrent upstream fetches per request
+
+# Background prefetcher (manage.py prefetch_market_data). With MARKET_DATA_PREFETCHED
+# enabled, request handlers only read bars the prefetcher has written and never call
+# Yahoo themselves; a cold cache then fails the prediction instead of blocking it.
+MARKET_DATA_PREFETCHED = os.environ.get('MARKET_DATA_PREFETCHED', 'FALSE') == 'TRUE'
+MARKET_DATA_PREFETCH_INTERVAL = int(os.environ.get('MARKET_DATA_PREFETCH_INTERVAL', 60))
+MARKET_DATA_PREFETCH_WORKERS = int(os.environ.get('MARKET_DATA_PREFETCH_WORKERS', 4))
+
+# Audit logging (UserActivities): items are queued in memory and written in batches
+# by a background thread; items arriving while the queue is full are dropped and counted
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 1.0))
+
+# Prediction log (Predictions): same batching, but a full queue makes the request wait
+# up to PREDICTION_LOG_BLOCK_TIMEOUT seconds, then spills to PREDICTION_LOG_SPILL_PATH;
+# throttled batches are retried PREDICTION_LOG_MAX_RETRIES times before spilling too
+PREDICTION_LOG_QUEUE_SIZE = int(os.environ.get('PREDICTION_LOG_QUEUE_SIZE', 10000))
+PREDICTION_LOG_FLUSH_INTERVAL = float(os.environ.get('PREDICTION_LOG_FLUSH_INTERVAL', 1.0))
+PREDICTION_LOG_BLOCK_TIMEOUT = float(os.environ.get('PREDICTION_LOG_BLOCK_TIMEOUT', 0.05))
+PREDICTION_LOG_MAX_RETRIES = int(os.environ.get('PREDICTION_LOG_MAX_RETRIES', 3))
+PREDICTION_LOG_SPILL_PATH = os.environ.get('PREDICTION_LOG_SPILL_PATH', BASE_DIR / 'data' / 'prediction_log.jsonl')
+
+# Rate limits as '<requests>/<period>' (s, m, h, d; e.g. '100/10m'), keyed by view name.
+# Each endpoint has its own quota per session user (or client IP when logged out).
+# RATE_LIMIT_USER_QUOTAS overrides them per username, either with one rate for every
+# endpoint or a {view name: rate} dict. Counters live in the Django cache, so use a
+# shared backend (DJANGO_CACHE_BACKEND) to enforce quotas across workers.
+RATE_LIMITS = {
+    'default': os.environ.get('RATE_LIMIT_DEFAULT', '5/h'),
+    **json.loads(os.environ.get('RATE_LIMITS', '{}')),
+}
+RATE_LIMIT_USER_QUOTAS = json.loads(os.environ.get('RATE_LIMIT_USER_QUOTAS', '{}'))
+
+# JSON API (/api/v1/): lifetime in seconds of the signed bearer tokens from /api/v1/token/.
+# Tokens are checked by signature and age only; rotate DJANGO_SECRET_KEY to revoke them all.
+API_TOKEN_MAX_AGE = int(os.environ.get('API_TOKEN_MAX_AGE', 3600))
+
+# /metrics/: when METRICS_TOKEN is set, scrapers send it as "Authorization: Bearer <token>";
+# when it is empty, the endpoint only answers loopback clients
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# News (GNews, 100 requests/day on the free tier). Articles are cached in-process and in
+# the NewsCache table; entries older than NEWS_CACHE_TTL seconds are still served for up
+# to NEWS_CACHE_STALE_TTL seconds while a background refresh fetches a new copy.
+# GNEWS_DAILY_LIMIT is counted in the Django cache: it is per process unless
+# DJANGO_CACHE_BACKEND is shared.
+GNEWS_API_KEY = os.environ.get('GNEWS_API_KEY')
+GNEWS_DAILY_LIMIT = int(os.environ.get('GNEWS_DAILY_LIMIT', 100))
+NEWS_CACHE_TTL = int(os.environ.get('NEWS_CACHE_TTL', 86400))
+NEWS_CACHE_STALE_TTL = int(os.environ.get('NEWS_CACHE_STALE_TTL', 7 * 86400))
+NEWS_CACHE_LOCAL_SIZE = int(os.environ.get('NEWS_CACHE_LOCAL_SIZE', 256))
+NEWS_CONNECT_TIMEOUT = float(os.environ.get('NEWS_CONNECT_TIMEOUT', 3.05))
+NEWS_READ_TIMEOUT = float(os.environ.get('NEWS_READ_TIMEOUT', 10))
+
+# Sentiment: manage.py score_sentiment scores cached news into SentimentCache every
+# SENTIMENT_SCORE_INTERVAL seconds; web workers reload the scores every
+# SENTIMENT_REFRESH_INTERVAL seconds
+SENTIMENT_SCORE_INTERVAL = int(os.environ.get('SENTIMENT_SCORE_INTERVAL', 3600))
+SENTIMENT_REFRESH_INTERVAL = int(os.environ.get('SENTIMENT_REFRESH_INTERVAL', 300))
+
+# Password hashing: bcrypt runs in PASSWORD_HASH_WORKERS spawned processes (0 = inline on
+# the request thread). Stored hashes with a different cost are upgraded on next login.
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+# Users.last_login updates are coalesced in memory and written every
+# USER_UPDATE_FLUSH_INTERVAL seconds
+USER_UPDATE_FLUSH_INTERVAL = float(os.environ.get('USER_UPDATE_FLUSH_INTERVAL', 5))
+
+# Activity feed (profile page and /profile/activity/): pages are cached per user for
+# ACTIVITY_FEED_CACHE_TTL seconds and invalidated when new activity is written
+ACTIVITY_FEED_PAGE_SIZE = int(os.environ.get('ACTIVITY_FEED_PAGE_SIZE', 10))
+ACTIVITY_FEED_CACHE_TTL = int(os.environ.get('ACTIVITY_FEED_CACHE_TTL', 30))
+
+# Local columnar OHLCV history (manage.py sync_ohlcv)
+OHLCV_STORE_DIR = os.environ.get('OHLCV_STORE_DIR', BASE_DIR / 'data' / 'ohlcv')
+
+# Versioned model artifacts (manage.py train_models), one subdirectory per training run
+MODEL_TRAINING_DIR = os.environ.get('MODEL_TRAINING_DIR', BASE_DIR / 'data' / 'models')
+
 
 
 # Allowed hosts
@@ -96,4 +216,16 @@ MIDDLEWARE = [
 SESSION_ENGINE = 'app.dynamodb_session_backend'
 SESSION_COOKIE_AGE = 1209600
 AWS_DYNAMODB_SESSION_TABLE_NAME = 'django_sessions'
+# Lazy session writes: skip put_item when session data is unchanged and less than
+# DYNAMODB_SESSION_REFRESH_FRACTION of SESSION_COOKIE_AGE has passed since the last
+# write, and leave expired items to DynamoDB's TTL sweeper (enable TTL on the
+# DYNAMODB_SESSION_TTL_ATTRIBUTE attribute) instead of deleting them on read
+DYNAMODB_SESSION_LAZY_WRITES = os.environ.get('DYNAMODB_SESSION_LAZY_WRITES', 'FALSE') == 'TRUE'
+DYNAMODB_SESSION_REFRESH_FRACTION = float(os.environ.get('DYNAMODB_SESSION_REFRESH_FRACTION', 0.1))
+DYNAMODB_SESSION_TTL_ATTRIBUTE = 'ttl'
+# In-process near-cache for session reads (0 disables). Staleness bound: a session
+# written by another worker may be served from the old copy for up to
+# DYNAMODB_SESSION_NEAR_CACHE_TTL seconds; writes from the same worker are seen immediately.
+DYNAMODB_SESSION_NEAR_CACHE_TTL = float(os.environ.get('DYNAMODB_SESSION_NEAR_CACHE_TTL', 0))
+DYNAMODB_SESSION_NEAR_CACHE_SIZE = int(os.environ.get('DYNAMODB_SESSION_NEAR_CACHE_SIZE', 10000))
 AWS_DYNAMODB_REGION = os.environ.get('AWS_REGION', 'us-east-1')
\ No newline at end of file